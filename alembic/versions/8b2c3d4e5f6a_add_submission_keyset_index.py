@@ -0,0 +1,31 @@
+"""add_submission_keyset_index
+
+Revision ID: 8b2c3d4e5f6a
+Revises: 6f4d0c206cd5
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2c3d4e5f6a'
+down_revision: Union[str, None] = '6f4d0c206cd5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite index for keyset pagination of a template's submissions
+    op.create_index(
+        'ix_form_submissions_template_created_id',
+        'form_submissions',
+        ['template_id', 'created_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_form_submissions_template_created_id', table_name='form_submissions')
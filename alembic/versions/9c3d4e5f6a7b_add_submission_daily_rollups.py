@@ -0,0 +1,56 @@
+"""add_submission_daily_rollups
+
+Revision ID: 9c3d4e5f6a7b
+Revises: 8b2c3d4e5f6a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d4e5f6a7b'
+down_revision: Union[str, None] = '8b2c3d4e5f6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'form_submissions',
+        sa.Column('is_processed', sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+
+    # Daily submission counts per template, filled by analytics compaction
+    op.create_table(
+        'submission_daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('template_id', sa.String(), nullable=False),
+        sa.Column('project_id', sa.String(length=100), nullable=False),
+        sa.Column('submission_count', sa.Integer(), nullable=False),
+        sa.Column('processed_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'template_id')
+    )
+    op.create_index(
+        'ix_submission_daily_rollups_project_day',
+        'submission_daily_rollups',
+        ['project_id', 'day']
+    )
+
+    op.create_table(
+        'analytics_rollup_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('compacted_until', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_rollup_state')
+    op.drop_index('ix_submission_daily_rollups_project_day', table_name='submission_daily_rollups')
+    op.drop_table('submission_daily_rollups')
+    op.drop_column('form_submissions', 'is_processed')
@@ -0,0 +1,27 @@
+"""add_submission_processed_at
+
+Revision ID: ad4e5f6a7b8c
+Revises: 9c3d4e5f6a7b
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad4e5f6a7b8c'
+down_revision: Union[str, None] = '9c3d4e5f6a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Time-to-process analytics
+    op.add_column('form_submissions', sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('form_submissions', 'processed_at')
@@ -0,0 +1,50 @@
+"""add_esb_case_outbox
+
+Revision ID: be5f6a7b8c9d
+Revises: ad4e5f6a7b8c
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'be5f6a7b8c9d'
+down_revision: Union[str, None] = 'ad4e5f6a7b8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ESB cases to create, written together with the B2B support submission
+    op.create_table(
+        'esb_case_outbox',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('submission_id', sa.String(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('case_id', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['submission_id'], ['form_submissions.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('submission_id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(
+        'ix_esb_case_outbox_status_next_attempt',
+        'esb_case_outbox',
+        ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_esb_case_outbox_status_next_attempt', table_name='esb_case_outbox')
+    op.drop_table('esb_case_outbox')
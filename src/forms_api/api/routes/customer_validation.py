@@ -7,6 +7,8 @@ import httpx
 import logging
 import os
 
+from src.forms_api.services.http_clients import http_clients
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Customer Validation"])
@@ -66,8 +68,8 @@ async def validate_customer(
         
         logger.debug(f"Making request to {url} with params {params}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params, headers=headers)
+        # Shared pooled client: reuses the connection to the Husqvarna API
+        response = await http_clients.get("esb").get(url, params=params, headers=headers)
             
         logger.debug(f"Husqvarna API response status: {response.status_code}")
         
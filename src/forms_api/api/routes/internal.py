@@ -0,0 +1,116 @@
+"""
+Internal operations endpoints for HSQ Forms API.
+
+These expose runtime telemetry for capacity planning and debugging. They are
+mounted outside the /api prefix and should not be routed through the public
+ingress.
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from src.forms_api.db import engine, get_async_engine_if_created, get_db
+from src.forms_api.pool_metrics import pool_snapshot
+from src.forms_api.services.case_outbox import case_counts, case_dispatcher
+from src.forms_api.services.http_clients import http_clients
+from src.forms_api.services.webhook_queue import delivery_counts, webhook_dispatcher
+from src.forms_api.services.webhook_routing import webhook_router
+from src.forms_api.services.webhook_service import webhook_limits, webhook_metrics
+from src.forms_api.startup import startup_timings
+from src.forms_api.utils.cache import cache_registry
+from src.forms_api.utils.singleflight import single_flight_stats
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/db/pool")
+def db_pool_stats() -> Dict[str, Any]:
+    """
+    Connection pool statistics for this worker process.
+
+    Multiply `max_connections` by workers per replica and replica count to
+    get the worst-case connection demand on Postgres.
+    """
+    pools = {"sync": pool_snapshot(engine.pool)}
+
+    async_engine = get_async_engine_if_created()
+    if async_engine is not None:
+        pools["async"] = pool_snapshot(async_engine.pool)
+
+    return {"pools": pools}
+
+
+@router.get("/caches")
+def cache_stats() -> Dict[str, Any]:
+    """
+    Size, memory use and hit/miss/eviction counters of the in-process caches
+    for this worker, for tuning sizes, TTLs and CACHE_MEMORY_BUDGET_MB.
+    """
+    return {"caches": cache_registry.stats()}
+
+
+@router.get("/esb-cases")
+def esb_case_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    ESB case outbox: rows per status across all workers, and this worker's
+    dispatcher counters. A growing `pending` count means the ESB is behind.
+    """
+    return {"outbox": case_counts(db), "dispatcher": case_dispatcher.stats()}
+
+
+@router.get("/http-clients")
+def http_client_stats() -> Dict[str, Any]:
+    """
+    Outbound connection counters per shared HTTP client for this worker.
+
+    A low `reuse_ratio` means most calls pay for a new TCP/TLS handshake;
+    non-empty `waiting_for_connection` means the per-host cap is the limit.
+    """
+    return {"clients": http_clients.stats()}
+
+
+@router.get("/webhooks")
+def webhook_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Webhook deliveries per status across all workers, this worker's
+    dispatcher counters and its latency/error metrics per receiving
+    endpoint, and each receiver's current rate and concurrency limits.
+    `dead` rows are listed and replayed through /api/webhooks/deliveries;
+    connection reuse is under /internal/http-clients.
+    """
+    return {
+        "deliveries": delivery_counts(db),
+        "dispatcher": webhook_dispatcher.stats(),
+        "endpoints": webhook_metrics.snapshot(),
+        "subscribers": webhook_limits.stats(),
+        "routing": webhook_router.stats(),
+    }
+
+
+@router.post("/webhooks/routes/reload")
+def reload_webhook_routes() -> Dict[str, Any]:
+    """
+    Rebuild this worker's webhook routing table from the settings and
+    WEBHOOK_ROUTES_FILE now, instead of at the next file check.
+    """
+    webhook_router.reload()
+    return webhook_router.stats()
+
+
+@router.get("/singleflight")
+def singleflight_stats() -> Dict[str, Any]:
+    """
+    Upstream calls made versus collapsed into an in-flight call, per
+    single-flight group (template loads, customer validation).
+    """
+    return {"groups": single_flight_stats()}
+
+
+@router.get("/startup")
+def startup_report() -> Dict[str, Any]:
+    """
+    Cold-start timings for this worker: import, app construction and first
+    request, plus the outcome of the startup schema step.
+    """
+    return startup_timings.report()
@@ -0,0 +1,56 @@
+"""
+Webhook delivery router: inspect the delivery queue and replay dead letters.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from src.forms_api.db import get_db
+from src.forms_api.schemas import (
+    WebhookDeliveryResponse,
+    WebhookReplayRequest,
+    WebhookReplayResponse,
+)
+from src.forms_api.services.webhook_queue import (
+    DEAD,
+    DELIVERED,
+    PENDING,
+    list_deliveries,
+    replay_deliveries,
+    webhook_dispatcher,
+)
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+@router.get("/deliveries", response_model=List[WebhookDeliveryResponse])
+def get_webhook_deliveries(
+    status: Optional[str] = Query(None, description="pending, delivered or dead"),
+    url: Optional[str] = Query(None, description="Only deliveries to this URL"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """List webhook deliveries, most recently updated first; `status=dead` lists the dead letters"""
+    if status is not None and status not in (PENDING, DELIVERED, DEAD):
+        raise HTTPException(status_code=400, detail=f"Unknown delivery status: {status}")
+    return list_deliveries(db, status=status, url=url, limit=limit)
+
+
+@router.post("/deliveries/replay", response_model=WebhookReplayResponse)
+def replay_webhook_deliveries(request: WebhookReplayRequest, db: Session = Depends(get_db)):
+    """Queue dead deliveries again, e.g. after a receiver has been fixed"""
+    replayed = replay_deliveries(db, ids=request.ids, url=request.url)
+    if replayed:
+        webhook_dispatcher.notify()
+    return WebhookReplayResponse(replayed=replayed)
+
+
+@router.post("/deliveries/{delivery_id}/replay", response_model=WebhookReplayResponse)
+def replay_webhook_delivery(delivery_id: str, db: Session = Depends(get_db)):
+    """Queue one dead delivery again"""
+    replayed = replay_deliveries(db, ids=[delivery_id])
+    if not replayed:
+        raise HTTPException(status_code=404, detail="No dead delivery with this id")
+    webhook_dispatcher.notify()
+    return WebhookReplayResponse(replayed=replayed)
@@ -1,22 +1,92 @@
 """
 HSQ Forms API application
 """
+# Imported first so cold-start timings include the rest of the imports
+from src.forms_api.startup import FirstRequestTimer, prepare_schema, startup_timings
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
-from src.forms_api.db import engine, Base
+from src.forms_api.config import get_settings
+from src.forms_api.db import engine, dispose_async_engine
 from src.forms_api import models  # Import models to register them
 from src.forms_api.routes import router
+from src.forms_api.async_routes import router as async_router
+from src.forms_api.api.routes.internal import router as internal_router
+from src.forms_api.api.routes.webhooks import router as webhooks_router
+from src.forms_api.services.analytics import rollup_compactor
+from src.forms_api.services.case_outbox import case_dispatcher
+from src.forms_api.services.cache_backend import attach_shared_backend, detach_shared_backend
+from src.forms_api.services.http_clients import http_clients
+from src.forms_api.services.ingestion import submission_ingestor
+from src.forms_api.services.validation_executor import validation_executor
+from src.forms_api.services.webhook_queue import webhook_dispatcher
+from src.forms_api.services.webhook_routing import webhook_router
+from src.forms_api.utils.cache import cache_registry
+from src.forms_api.utils.circuit_breaker import OPEN, circuit_breaker_states
+from src.forms_api.utils.pagination import PAGINATION_HEADERS
+
+startup_timings.mark("imports")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the schema and start and stop background services."""
+    settings = get_settings()
+
+    schema_check = None
+    if settings.db_schema_startup == "check":
+        # Verify the Alembic revision in the background; it does not gate serving
+        schema_check = asyncio.create_task(prepare_schema("check", engine, startup_timings))
+    else:
+        await prepare_schema(settings.db_schema_startup, engine, startup_timings)
+
+    if settings.submission_ingest_mode == "journal":
+        # Replays any journal segments left behind by a crash before serving
+        await asyncio.to_thread(submission_ingestor.start)
+
+    rollup_compactor.start(
+        settings.analytics_rollup_interval_seconds, settings.analytics_rollup_reopen_days
+    )
+    case_dispatcher.start(settings.esb_case_dispatch_interval_seconds)
+    await asyncio.to_thread(webhook_router.reload)
+    webhook_dispatcher.start(settings.webhook_delivery_interval_seconds)
+
+    # Shared L2 tier behind the registered caches (CACHE_BACKEND)
+    await asyncio.to_thread(attach_shared_backend)
+    cache_registry.start_sweeper(settings.cache_sweep_interval_seconds)
+
+    yield
+
+    await asyncio.to_thread(cache_registry.stop_sweeper)
+    await asyncio.to_thread(detach_shared_backend)
+    await asyncio.to_thread(rollup_compactor.stop)
+
+    if schema_check is not None and not schema_check.done():
+        schema_check.cancel()
+        with suppress(asyncio.CancelledError):
+            await schema_check
+
+    await webhook_dispatcher.stop()
+    await case_dispatcher.stop()
+    await http_clients.aclose()
+    await asyncio.to_thread(submission_ingestor.stop)
+    await asyncio.to_thread(validation_executor.shutdown)
+    await dispose_async_engine()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 # Create FastAPI app
 app = FastAPI(
     title="HSQ Forms API",
     description="API for handling dynamic forms and submissions",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -26,10 +96,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGINATION_HEADERS + ["ETag"],
 )
 
+# Time the first request served by this worker, see /internal/startup
+app.add_middleware(FirstRequestTimer, timings=startup_timings)
+
 # Include routes
+if get_settings().db_async_enabled:
+    # Async variants are matched first and take over the same template/submission paths
+    app.include_router(async_router, prefix="/api")
 app.include_router(router, prefix="/api")
+app.include_router(webhooks_router, prefix="/api")
+app.include_router(internal_router)
 
 @app.get("/")
 def read_root():
@@ -37,7 +116,13 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    # An open circuit means fallbacks are being served, not that this API is down
+    circuits = circuit_breaker_states()
+    degraded = any(circuit["state"] == OPEN for circuit in circuits.values())
+    return {"status": "degraded" if degraded else "healthy", "circuits": circuits}
+
+
+startup_timings.mark("app_constructed")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,156 @@
+"""
+Async API routes for templates and submissions.
+
+These mirror the template/submission routes in routes.py but run on the
+AsyncSession stack, so a request waiting on Postgres does not occupy a
+threadpool worker. They are registered ahead of the sync routes when
+DB_ASYNC_ENABLED is set.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from src.forms_api.config import get_settings
+from src.forms_api.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.forms_api.db import get_async_db
+from src.forms_api.schemas import (
+    FormTemplateCreate,
+    FormTemplateResponse,
+    FormSubmissionCreate,
+    FormSubmissionResponse
+)
+from src.forms_api.services import FormBuilderService
+from src.forms_api.services.ingestion import submission_ingestor
+from src.forms_api.services.template_cache import template_cache
+from src.forms_api.utils.pagination import set_pagination_headers
+from src.forms_api.utils.serialization import json_bytes_response, submissions_to_json
+from src.forms_api.utils.singleflight import single_flight
+
+router = APIRouter()
+
+# Shared with the sync routes: collapses concurrent cache misses per template or listing
+template_loads = single_flight("template_loads")
+
+
+@router.post("/templates", response_model=FormTemplateResponse)
+async def create_template_async(
+    template_data: FormTemplateCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new form template"""
+    try:
+        template = await FormBuilderService.create_form_template_async(db, template_data)
+        return FormTemplateResponse.model_validate(template)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/templates", response_model=List[FormTemplateResponse])
+async def list_templates_async(
+    request: Request,
+    project_id: str = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List all form templates (cached, supports If-None-Match)"""
+    cached = await template_cache.aget_list(project_id)
+    if cached is None:
+        async def load():
+            generation = template_cache.generation
+            templates = await FormBuilderService.list_templates_async(db, project_id)
+            return await template_cache.astore_list(project_id, templates, generation)
+
+        # Concurrent misses share one database load
+        cached = await template_loads.do(("list", project_id), load)
+    return template_cache.response(request, cached)
+
+
+@router.get("/templates/{template_id}", response_model=FormTemplateResponse)
+async def get_template_async(
+    template_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific form template (cached, supports If-None-Match)"""
+    cached = await template_cache.aget_template(template_id)
+    if cached is None:
+        async def load():
+            generation = template_cache.generation
+            template = await FormBuilderService.get_template_async(db, template_id)
+            if not template:
+                raise HTTPException(status_code=404, detail="Template not found")
+            return await template_cache.astore_template(template, generation)
+
+        # Concurrent misses share one database load
+        cached = await template_loads.do(("template", template_id), load)
+    return template_cache.response(request, cached)
+
+
+@router.post("/templates/{template_id}/submit", response_model=FormSubmissionResponse)
+async def submit_form_async(
+    template_id: str,
+    submission_data: FormSubmissionCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit form data"""
+    try:
+        ip_address = request.client.host if request.client else None
+
+        # Write-behind mode: acknowledge once journaled, flushed in batches
+        if get_settings().submission_ingest_mode == "journal":
+            if not await FormBuilderService.get_template_async(db, template_id):
+                raise ValueError(f"Template {template_id} not found")
+            submission = await run_in_threadpool(
+                submission_ingestor.enqueue,
+                None,
+                template_id=template_id,
+                data=submission_data.data,
+                submitted_from=submission_data.submitted_from,
+                ip_address=ip_address
+            )
+            return FormSubmissionResponse.model_validate(submission)
+
+        submission = await FormBuilderService.create_submission_async(
+            db,
+            template_id=template_id,
+            data=submission_data.data,
+            submitted_from=submission_data.submitted_from,
+            ip_address=ip_address
+        )
+        return FormSubmissionResponse.model_validate(submission)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/templates/{template_id}/submissions", response_model=List[FormSubmissionResponse])
+async def get_submissions_async(
+    template_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the previous page's X-Next-Cursor header"
+    ),
+    include_total: bool = Query(
+        False, description="Return X-Total-Count (estimated above SUBMISSION_COUNT_CAP)"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get submissions for a template, newest first, keyset-paginated on (created_at, id)"""
+    try:
+        submissions, next_cursor = await FormBuilderService.get_template_submissions_page_async(
+            db, template_id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total, is_estimate = None, False
+    if include_total:
+        total, is_estimate = await FormBuilderService.count_template_submissions_async(
+            db, template_id, get_settings().submission_count_cap
+        )
+    # Encode rows straight to JSON bytes instead of via per-item response models
+    response = json_bytes_response(submissions_to_json(submissions))
+    set_pagination_headers(response, next_cursor, total, is_estimate)
+    return response
@@ -8,7 +8,7 @@ and .env files.
 import os
 import json
 import logging
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, ConfigDict, validator
@@ -74,6 +74,11 @@ class Settings(BaseSettings):
     db_pool_size: int = 5
     db_max_overflow: int = 10
     db_pool_timeout: int = 30
+    db_pool_pre_ping: bool = True  # Test connections on checkout so dropped ones are replaced
+    db_pool_recycle: int = 1800  # Recycle connections after this (Azure idles out ~30 min)
+    db_async_enabled: bool = False  # Serve template/submission routes from the AsyncSession stack
+    async_database_url: Optional[str] = None
+    db_schema_startup: str = "create"  # create (create_all), check (Alembic head) or skip
     
     @property
     def effective_database_url(self) -> str:
@@ -81,6 +86,22 @@ class Settings(BaseSettings):
         if self.database_url:
             return self.database_url
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+
+    @property
+    def effective_async_database_url(self) -> str:
+        """Get the async driver URL - ASYNC_DATABASE_URL if set, else derived from the sync URL."""
+        if self.async_database_url:
+            return self.async_database_url
+        url = self.effective_database_url
+        for sync_prefix, async_prefix in (
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("postgres://", "postgresql+asyncpg://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix):]
+        return url
     
     # Storage settings
     storage_type: str = "local"  # local or azure
@@ -119,12 +140,67 @@ class Settings(BaseSettings):
     def allowed_file_types_list(self) -> List[str]:
         """Convert allowed file types string to list."""
         return self.allowed_file_types.split(',')
-    
+
+    # Submission ingestion settings
+    submission_ingest_mode: str = "direct"  # direct or journal (write-behind, batched INSERTs)
+    submission_journal_dir: str = "./data/submission-journal"  # One worker-N subdir per process
+    submission_journal_fsync: bool = True
+    submission_flush_batch_size: int = 500
+    submission_flush_interval_ms: int = 200
+    batch_submission_max_items: int = 5000  # Max submissions accepted by one bulk upload
+    batch_submission_chunk_size: int = 500  # Rows per INSERT ... RETURNING in bulk uploads
+
+    # Listing settings
+    submission_count_cap: int = 10000  # Exact counts up to this many rows, estimated above
+    export_batch_size: int = 1000  # Rows fetched per round trip when streaming submission exports
+
+    # Analytics settings
+    analytics_rollup_interval_seconds: int = 900  # Rollup compaction period (0 disables)
+    analytics_rollup_reopen_days: int = 3  # Compacted days recomputed on each run
+
+    # In-process cache settings
+    cache_memory_budget_mb: int = 64  # Memory budget shared by the in-process caches
+    cache_sweep_interval_seconds: int = 30  # How often expired cache entries are swept
+    cache_backend: str = "none"  # Shared cache tier across replicas: none, memory, sqlite or redis
+    cache_backend_url: str = ""  # redis[s]://[user:password@]host:port/db, or the sqlite file path
+
+    # Template cache settings
+    template_cache_size: int = 512  # Max cached template bodies (single templates and listings)
+    template_cache_ttl_seconds: int = 30  # Upper bound on staleness across workers
+    template_cache_max_age_seconds: int = 60  # Cache-Control max-age sent to browsers and CDNs
+
+    # Validation settings
+    validator_cache_size: int = 256  # Max number of compiled template schema validators
+    validation_executor: str = "thread"  # inline, thread or process (parallel batch validation)
+    validation_workers: int = 4
+    validation_max_pending: int = 32  # Chunks in flight across all batches before callers block
+    validation_chunk_size: int = 50  # Submissions per validation task
+
     # Webhook settings
     webhooks_enabled: bool = False
     webhook_urls: str = ""  # Comma-separated list of webhook URLs for form submissions
     webhook_form_specific_urls: str = "{}"  # JSON string mapping form IDs to webhook URLs
+    webhook_batching: str = "{}"  # JSON: URL -> {"max_events": n, "max_wait_seconds": s}
     webhook_secret: str = ""  # Secret key for webhook authentication
+    webhook_timeout_seconds: float = 10.0  # Timeout per webhook request
+    webhook_max_connections_per_host: int = 10  # Max concurrent requests per receiver per worker
+    webhook_http2: bool = False  # HTTP/2 to receivers (requires the h2 package)
+    webhook_delivery_interval_seconds: float = 2.0  # Poll for due deliveries (0 disables)
+    webhook_delivery_batch_size: int = 100  # Most deliveries claimed at once
+    webhook_delivery_concurrency: int = 10  # Sends in flight at once per worker
+    webhook_delivery_max_attempts: int = 8  # Then dead-letter the delivery
+    webhook_retry_base_seconds: float = 5.0  # First retry delay ceiling, doubled per attempt
+    webhook_retry_max_seconds: float = 3600.0  # Cap on the retry delay
+    webhook_delivery_lease_seconds: float = 60.0  # Unsettled claims are retried after this
+    webhook_subscriber_limits: str = "{}"  # JSON: URL -> overrides of the limits below
+    webhook_subscriber_rate_per_second: float = 20.0  # Sustained rate per receiver (0 = unlimited)
+    webhook_subscriber_burst: int = 40  # Requests to one receiver allowed in a burst above the rate
+    webhook_subscriber_initial_concurrency: int = 4  # Starting adaptive in-flight limit
+    webhook_subscriber_max_concurrency: int = 10  # Upper bound of the adaptive in-flight limit
+    webhook_subscriber_slow_seconds: float = 5.0  # Slower answers lower the in-flight limit
+    webhook_subscriber_max_wait_seconds: float = 2.0  # Longest wait for limits, then defer
+    webhook_routes_file: str = ""  # Optional JSON file of extra routes, hot-reloaded
+    webhook_routes_reload_seconds: float = 5.0  # How often the routes file is checked
     
     @validator("webhooks_enabled", pre=True)
     def parse_webhooks_enabled(cls, v: Union[str, bool]) -> bool:
@@ -133,14 +209,17 @@ class Settings(BaseSettings):
             return v
         return str(v).lower() == "true"
     
-    @property
+    # The webhook settings below are parsed once per Settings instance (which
+    # get_settings() caches); routing reads them through the compiled table in
+    # services/webhook_routing.py rather than per event.
+    @cached_property
     def webhook_urls_list(self) -> List[str]:
         """Convert webhook URLs string to list."""
         if not self.webhook_urls:
             return []
-        return [url.strip() for url in self.webhook_urls.split(",")]
+        return [url.strip() for url in self.webhook_urls.split(",") if url.strip()]
     
-    @property
+    @cached_property
     def webhook_form_specific_config(self) -> Dict[str, str]:
         """Parse form-specific webhook configuration."""
         try:
@@ -149,10 +228,71 @@ class Settings(BaseSettings):
             logger.warning(f"Failed to parse webhook_form_specific_urls: {e}")
             return {}
     
+    @cached_property
+    def webhook_batching_config(self) -> Dict[str, Dict[str, float]]:
+        """Parse per-URL webhook batching configuration, filling in defaults."""
+        try:
+            return {
+                url: {
+                    "max_events": max(1, int(options.get("max_events", 50))),
+                    "max_wait_seconds": max(0.0, float(options.get("max_wait_seconds", 30))),
+                }
+                for url, options in json.loads(self.webhook_batching).items()
+            }
+        except Exception as e:
+            logger.warning(f"Failed to parse webhook_batching: {e}")
+            return {}
+
+    @cached_property
+    def webhook_subscriber_limits_config(self) -> Dict[str, Dict[str, float]]:
+        """Parse per-URL overrides of the webhook subscriber limits."""
+        keys = ("rate_per_second", "burst", "initial_concurrency", "max_concurrency")
+        try:
+            return {
+                url: {key: float(value) for key, value in options.items() if key in keys}
+                for url, options in json.loads(self.webhook_subscriber_limits).items()
+            }
+        except Exception as e:
+            logger.warning(f"Failed to parse webhook_subscriber_limits: {e}")
+            return {}
+
+    # Outbound HTTP client settings (shared pooled clients, per upstream)
+    http_client_max_connections: int = 100  # Max open connections per client
+    http_client_max_keepalive_connections: int = 20  # Idle connections kept alive for reuse
+    http_client_keepalive_expiry_seconds: float = 30.0  # How long an idle connection is kept
+    http_client_max_connections_per_host: int = 20  # Max busy connections to one host
+    http_client_timeout_seconds: float = 30.0  # Default request timeout
+    http_client_http2: bool = False  # Negotiate HTTP/2 (requires the h2 package)
+
     # Husqvarna ESB Integration settings
     husqvarna_esb_api_key: str = ""
     husqvarna_esb_base_url: str = "https://api-qa.integration.husqvarnagroup.com/hqw170/v1"
     husqvarna_esb_apac_customer_codes: str = ""  # Comma-separated list of APAC customer codes
+
+    # ESB circuit breaker and adaptive timeout settings
+    esb_circuit_failure_rate: float = 0.5  # Open the circuit when this share of calls fail
+    esb_circuit_slow_call_seconds: float = 5.0  # Calls slower than this count as slow
+    esb_circuit_slow_call_rate: float = 0.8  # Open the circuit when this share of calls are slow
+    esb_circuit_minimum_calls: int = 10  # Calls needed in the window before the rates are judged
+    esb_circuit_window_seconds: int = 30  # Rolling window of call outcomes
+    esb_circuit_open_seconds: int = 15  # How long the circuit stays open before a trial call
+    esb_timeout_min_seconds: float = 1.0  # Floor of the adaptive ESB timeout
+    esb_timeout_max_seconds: float = 30.0  # Ceiling, and the timeout until latencies are known
+    esb_timeout_p99_multiplier: float = 2.0  # Adaptive timeout = observed p99 latency x this
+
+    # ESB case outbox settings
+    esb_case_dispatch_interval_seconds: float = 5.0  # Poll for due cases (0 disables)
+    esb_case_dispatch_batch_size: int = 20  # Cases claimed and sent concurrently per round
+    esb_case_max_attempts: int = 10  # Give up and mark the case failed after this many attempts
+    esb_case_retry_base_seconds: float = 10.0  # First retry delay, doubled per attempt
+    esb_case_retry_max_seconds: float = 3600.0  # Cap on the retry delay
+    esb_case_lease_seconds: float = 120.0  # Unsettled claims are retried after this
+
+    # Customer validation cache settings
+    customer_validation_cache_ttl_seconds: int = 300  # How long a found customer is cached
+    customer_validation_negative_ttl_seconds: int = 30  # How long a "not found" result is cached
+    customer_validation_stale_seconds: int = 600  # Serve expired hits this long while refreshing
+    customer_validation_cache_size: int = 10000  # Max cached lookups per worker
     
     @property
     def husqvarna_esb_apac_codes_list(self) -> List[str]:
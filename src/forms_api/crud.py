@@ -5,6 +5,7 @@ from .db import get_db
 from fastapi import HTTPException, status, Depends
 from typing import List, Optional
 import uuid
+from datetime import datetime, timezone
 
 def create_submission(
     db: Session,
@@ -81,6 +82,10 @@ def update_submission_status(
     Uppdatera bearbetningsstatus för en formulärinlämning
     """
     submission = get_submission(db, submission_id)
+    if is_processed and not submission.is_processed:
+        submission.processed_at = datetime.now(timezone.utc)
+    elif not is_processed:
+        submission.processed_at = None
     submission.is_processed = is_processed
     
     try:
@@ -1,18 +1,60 @@
 """
 Database connection and session management.
 """
+from typing import Any, AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from src.forms_api.config import settings
+from src.forms_api.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    PoolStatistics,
+)
+
+# Telemetri för anslutningspoolerna, exponeras via /internal/db/pool
+sync_pool_statistics = PoolStatistics("sync")
+async_pool_statistics = PoolStatistics("async")
+
+
+def _pool_options(url: str, pool_class: type) -> Dict[str, Any]:
+    """Poolinställningar från Settings (SQLite använder SQLAlchemys standardpool)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
 
 # Skapa SQLAlchemy engine
-engine = create_engine(settings.effective_database_url)
+engine = create_engine(
+    settings.effective_database_url,
+    **_pool_options(settings.effective_database_url, InstrumentedQueuePool)
+)
+if isinstance(engine.pool, InstrumentedQueuePool):
+    engine.pool.statistics = sync_pool_statistics
 
 # Skapa sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine och sessionmaker skapas först vid behov, så att async-drivrutinen
+# bara krävs när DB_ASYNC_ENABLED används
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
 # Bas för SQLAlchemy modeller
 Base = declarative_base()
 
@@ -28,9 +70,57 @@ def get_db():
     finally:
         db.close()
 
+
+def get_async_engine() -> AsyncEngine:
+    """Hämta (och skapa vid första anropet) den asynkrona engine:n"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        url = settings.effective_async_database_url
+        _async_engine = create_async_engine(
+            url, **_pool_options(url, InstrumentedAsyncAdaptedQueuePool)
+        )
+        if isinstance(_async_engine.pool, InstrumentedAsyncAdaptedQueuePool):
+            _async_engine.pool.statistics = async_pool_statistics
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+
+def get_async_engine_if_created() -> Optional[AsyncEngine]:
+    """Hämta async engine:n utan att skapa den"""
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Hämta sessionmaker för AsyncSession"""
+    get_async_engine()
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency för att få en AsyncSession som automatiskt stängs när den är klar.
+    Blockerar inte threadpool-workers medan databasen svarar.
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Stäng async-poolen vid nedstängning"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
 def init_db():
     """Initialisera databasen och skapa tabeller"""
     # Import models so they are registered with the Base
     from src.forms_api import models
-    
+
     Base.metadata.create_all(bind=engine)
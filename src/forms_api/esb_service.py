@@ -8,9 +8,47 @@ import logging
 import httpx
 from typing import Optional, Dict, Any
 from .config import get_settings
+from .services.customer_validation_cache import customer_validation_cache
+from .services.http_clients import http_clients
+from .utils.circuit_breaker import CircuitOpenError, circuit_breaker
 
 logger = logging.getLogger(__name__)
 
+_settings = get_settings()
+# Shared by every ESB call (this service and the Husqvarna validation proxy)
+esb_breaker = circuit_breaker(
+    "esb",
+    failure_rate_threshold=_settings.esb_circuit_failure_rate,
+    slow_call_seconds=_settings.esb_circuit_slow_call_seconds,
+    slow_call_rate_threshold=_settings.esb_circuit_slow_call_rate,
+    minimum_calls=_settings.esb_circuit_minimum_calls,
+    window_seconds=_settings.esb_circuit_window_seconds,
+    open_seconds=_settings.esb_circuit_open_seconds,
+    min_timeout=_settings.esb_timeout_min_seconds,
+    max_timeout=_settings.esb_timeout_max_seconds,
+    timeout_multiplier=_settings.esb_timeout_p99_multiplier
+)
+
+
+async def esb_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a request to the ESB through the circuit breaker, with the adaptive timeout.
+
+    Server errors (5xx) are raised so they count against the circuit; other
+    responses are returned for the caller to interpret.
+
+    Raises:
+        CircuitOpenError: If the ESB circuit is open
+    """
+    async def send(timeout: float) -> httpx.Response:
+        response = await http_clients.get("esb").request(method, url, timeout=timeout, **kwargs)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+    return await esb_breaker.call(send)
+
+
 class HusqvarnaESBService:
     """Service for integrating with Husqvarna ESB API."""
     
@@ -38,6 +76,9 @@ class HusqvarnaESBService:
         """
         Validate customer number and return account ID if valid.
         
+        Results are cached per (customer_number, customer_code), including
+        "not found"; concurrent lookups of the same customer share one call.
+
         Args:
             customer_number: Customer number to validate
             customer_code: Customer code (default: DOJ)
@@ -52,6 +93,13 @@ class HusqvarnaESBService:
             logger.error("ESB API key not configured")
             raise Exception("ESB integration not configured")
         
+        return await customer_validation_cache.get_or_load(
+            ("esb", customer_number, customer_code),
+            lambda: self._fetch_account_id(customer_number, customer_code)
+        )
+
+    async def _fetch_account_id(self, customer_number: str, customer_code: str) -> Optional[str]:
+        """Look up the account ID for a customer number in the ESB."""
         url = f"{self.base_url}/accounts"
         params = {
             "customerNumber": customer_number,
@@ -59,30 +107,37 @@ class HusqvarnaESBService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    url,
-                    params=params,
-                    headers=self._get_headers(),
-                    timeout=30.0
-                )
-                
-                logger.info(f"Customer validation response: {response.status_code}")
+            response = await esb_request(
+                "GET",
+                url,
+                params=params,
+                headers=self._get_headers()
+            )
+
+            logger.info(f"Customer validation response: {response.status_code}")
+
+            if response.status_code == 200:
+                data = response.json()
+                account_id = data.get("accountId")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    account_id = data.get("accountId")
-                    
-                    if account_id:
-                        logger.info(f"Customer {customer_number} validated successfully, account_id: {account_id}")
-                        return account_id
-                    else:
-                        logger.info(f"Customer {customer_number} not found")
-                        return None
+                if account_id:
+                    logger.info(
+                        f"Customer {customer_number} validated successfully, "
+                        f"account_id: {account_id}"
+                    )
+                    return account_id
                 else:
-                    logger.error(f"Customer validation failed: {response.status_code} - {response.text}")
-                    response.raise_for_status()
-                    
+                    logger.info(f"Customer {customer_number} not found")
+                    return None
+            else:
+                logger.error(
+                    f"Customer validation failed: {response.status_code} - {response.text}"
+                )
+                response.raise_for_status()
+
+        except CircuitOpenError as e:
+            logger.warning(f"Customer validation skipped: {e}")
+            raise Exception("ESB temporarily unavailable")
         except httpx.TimeoutException:
             logger.error("Customer validation timeout")
             raise Exception("Timeout while validating customer")
@@ -93,7 +148,14 @@ class HusqvarnaESBService:
             logger.error(f"Customer validation error: {e}")
             raise
     
-    async def create_case(self, account_id: str, customer_number: str, customer_code: str, description: str) -> Dict[str, Any]:
+    async def create_case(
+        self,
+        account_id: str,
+        customer_number: str,
+        customer_code: str,
+        description: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Create a support case in ESB.
         
@@ -102,6 +164,7 @@ class HusqvarnaESBService:
             customer_number: Customer number
             customer_code: Customer code
             description: Case description
+            idempotency_key: Sent as Idempotency-Key so a retried request creates one case
             
         Returns:
             dict: ESB response data
@@ -126,25 +189,31 @@ class HusqvarnaESBService:
         region = "APAC" if self._is_apac_customer(customer_code) else "EMEA"
         logger.info(f"Creating case for customer {customer_number} in {region} region")
         
+        headers = self._get_headers()
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers=self._get_headers(),
-                    timeout=30.0
-                )
-                
-                logger.info(f"Case creation response: {response.status_code}")
+            response = await esb_request(
+                "POST",
+                url,
+                json=payload,
+                headers=headers
+            )
+
+            logger.info(f"Case creation response: {response.status_code}")
+
+            if response.status_code in [200, 201]:
+                data = response.json()
+                logger.info(f"Case created successfully: {data}")
+                return data
+            else:
+                logger.error(f"Case creation failed: {response.status_code} - {response.text}")
+                response.raise_for_status()
                 
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    logger.info(f"Case created successfully: {data}")
-                    return data
-                else:
-                    logger.error(f"Case creation failed: {response.status_code} - {response.text}")
-                    response.raise_for_status()
-                    
+        except CircuitOpenError as e:
+            logger.warning(f"Case creation skipped: {e}")
+            raise Exception("ESB temporarily unavailable")
         except httpx.TimeoutException:
             logger.error("Case creation timeout")
             raise Exception("Timeout while creating case")
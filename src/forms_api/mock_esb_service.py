@@ -18,6 +18,8 @@ class MockHusqvarnaESBService:
             "123456": {"account_id": "9dd905f4-1ea2-f922-b923-111e4a363e71", "customer_code": "DOJ"},
             "999999": {"account_id": "7bb703e2-0dc0-e800-a701-000c2a141c50", "customer_code": "DOJ"},
         }
+        # Cases by idempotency key, like the ESB deduplicates retried requests
+        self.cases_by_key: Dict[str, Dict[str, Any]] = {}
         
     async def validate_customer(self, customer_number: str, customer_code: str = "DOJ") -> Optional[str]:
         """
@@ -45,7 +47,14 @@ class MockHusqvarnaESBService:
             logger.info(f"Mock: Customer {customer_number} not found in mock database")
             return None
     
-    async def create_case(self, account_id: str, customer_number: str, customer_code: str, description: str) -> Dict[str, Any]:
+    async def create_case(
+        self,
+        account_id: str,
+        customer_number: str,
+        customer_code: str,
+        description: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Mock case creation.
         
@@ -54,6 +63,7 @@ class MockHusqvarnaESBService:
             customer_number: Customer number
             customer_code: Customer code
             description: Case description
+            idempotency_key: Repeating a key returns the case created the first time
             
         Returns:
             dict: Mock ESB response data
@@ -63,6 +73,9 @@ class MockHusqvarnaESBService:
         # Simulate processing delay
         await self._simulate_delay()
         
+        if idempotency_key in self.cases_by_key:
+            return self.cases_by_key[idempotency_key]
+
         # Generate mock case ID
         import uuid
         case_id = f"CASE-{uuid.uuid4().hex[:8].upper()}"
@@ -83,6 +96,8 @@ class MockHusqvarnaESBService:
         }
         
         logger.info(f"Mock: Case created successfully: {mock_response}")
+        if idempotency_key:
+            self.cases_by_key[idempotency_key] = mock_response
         return mock_response
     
     async def _simulate_delay(self):
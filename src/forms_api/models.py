@@ -1,7 +1,9 @@
 """
 SQLAlchemy database models for HSQ Forms API
 """
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import (
+    Column, String, Text, Date, DateTime, Boolean, Integer, JSON, ForeignKey, Index, false
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -44,12 +46,18 @@ class FormSubmission(Base):
     Simple form submission model
     """
     __tablename__ = "form_submissions"
+    __table_args__ = (
+        # Keyset pagination per template over (created_at, id)
+        Index("ix_form_submissions_template_created_id", "template_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     template_id = Column(String, ForeignKey("form_templates.id"), nullable=False)
     data = Column(JSON, nullable=False)  # Form data
     submitted_from = Column(String(255), nullable=True)  # Which app/site submitted this
     ip_address = Column(String(45), nullable=True)
+    is_processed = Column(Boolean, default=False, server_default=false(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)  # When is_processed was set
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationship to template
@@ -65,3 +73,88 @@ class FormSubmission(Base):
             "ip_address": self.ip_address,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class SubmissionDailyRollup(Base):
+    """
+    Submission counts per template and day, maintained by analytics compaction
+    """
+    __tablename__ = "submission_daily_rollups"
+    __table_args__ = (
+        Index("ix_submission_daily_rollups_project_day", "project_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    template_id = Column(String, primary_key=True)
+    project_id = Column(String(100), nullable=False)
+    submission_count = Column(Integer, nullable=False)
+    processed_count = Column(Integer, nullable=False)
+
+
+class AnalyticsRollupState(Base):
+    """
+    Single-row compaction watermark: days before `compacted_until` are rolled up
+    """
+    __tablename__ = "analytics_rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    compacted_until = Column(Date, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class EsbCaseOutbox(Base):
+    """
+    ESB case to create for a submission, written in the submission's transaction
+    and sent by the case dispatcher
+    """
+    __tablename__ = "esb_case_outbox"
+    __table_args__ = (
+        # Dispatcher claims due rows in next_attempt_at order
+        Index("ix_esb_case_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    submission_id = Column(String, ForeignKey("form_submissions.id"), nullable=False, unique=True)
+    # Sent as Idempotency-Key on every attempt
+    idempotency_key = Column(String(64), nullable=False, unique=True)
+    payload = Column(JSON, nullable=False)  # create_case arguments
+    status = Column(String(20), nullable=False, default="pending")  # pending, created, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # Also the lease while an attempt runs
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text, nullable=True)
+    case_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class WebhookDelivery(Base):
+    """
+    One webhook event to deliver to one URL; rows that ran out of attempts
+    stay as the dead-letter store until replayed
+    """
+    __tablename__ = "webhook_deliveries"
+    __table_args__ = (
+        # Dispatcher claims due rows in next_attempt_at order
+        Index("ix_webhook_deliveries_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_type = Column(String(100), nullable=False)
+    url = Column(Text, nullable=False)
+    payload = Column(JSON, nullable=False)  # Webhook body, fixed when the event happened
+    status = Column(String(20), nullable=False, default="pending")  # pending, delivered, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    # Also the lease while an attempt runs
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
@@ -0,0 +1,144 @@
+"""
+Connection pool telemetry for HSQ Forms API.
+
+The pools created in db.py are instrumented subclasses of SQLAlchemy's
+QueuePool that record how long each checkout waited for a connection and
+how often a checkout timed out. Together with the pool's own counters this
+lets us size replicas against Postgres `max_connections` from data.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Upper bounds (ms) for the checkout wait time histogram
+WAIT_TIME_BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolStatistics:
+    """Thread-safe checkout counters and wait time histogram for one pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_time_sum_ms = 0.0
+            self.wait_time_max_ms = 0.0
+            self.bucket_counts = [0] * (len(WAIT_TIME_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float) -> None:
+        """Record a successful checkout and how long it waited."""
+        wait_ms = seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self._observe(wait_ms)
+
+    def record_timeout(self, seconds: float) -> None:
+        """Record a checkout that gave up after pool_timeout."""
+        with self._lock:
+            self.timeouts += 1
+            self._observe(seconds * 1000)
+
+    def _observe(self, wait_ms: float) -> None:
+        self.wait_time_sum_ms += wait_ms
+        self.wait_time_max_ms = max(self.wait_time_max_ms, wait_ms)
+        for index, upper_bound in enumerate(WAIT_TIME_BUCKETS_MS):
+            if wait_ms <= upper_bound:
+                self.bucket_counts[index] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters and a cumulative wait time histogram."""
+        with self._lock:
+            observations = self.checkouts + self.timeouts
+            cumulative = 0
+            buckets = {}
+            for upper_bound, count in zip(WAIT_TIME_BUCKETS_MS, self.bucket_counts):
+                cumulative += count
+                buckets[f"le_{upper_bound:g}ms"] = cumulative
+            buckets["le_inf"] = observations
+
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_ms": {
+                    "count": observations,
+                    "sum": round(self.wait_time_sum_ms, 3),
+                    "avg": round(self.wait_time_sum_ms / observations, 3) if observations else 0.0,
+                    "max": round(self.wait_time_max_ms, 3),
+                    "buckets": buckets,
+                },
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times `_do_get`, the point where a checkout waits for a free connection."""
+
+    statistics: Optional[PoolStatistics] = None
+
+    def _do_get(self):
+        statistics = self.statistics
+        if statistics is None:
+            return super()._do_get()
+
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            statistics.record_timeout(time.perf_counter() - started)
+            raise
+        statistics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Engine.dispose() swaps in a new pool; keep accumulating into the same statistics
+        pool = super().recreate()
+        pool.statistics = self.statistics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout wait time telemetry."""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait time telemetry."""
+
+
+def pool_snapshot(pool: Pool) -> Dict[str, Any]:
+    """
+    Describe the current state of a connection pool.
+
+    Args:
+        pool: The engine's pool (`engine.pool`)
+
+    Returns:
+        Pool occupancy plus the recorded checkout statistics, if any
+    """
+    snapshot: Dict[str, Any] = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "max_connections": pool.size() + max(pool._max_overflow, 0),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # QueuePool counts overflow from -pool_size; only positive values are extra connections
+            "overflow": max(pool.overflow(), 0),
+            "timeout_seconds": pool.timeout(),
+        })
+
+    statistics = getattr(pool, "statistics", None)
+    if statistics is not None:
+        snapshot.update(statistics.snapshot())
+
+    return snapshot
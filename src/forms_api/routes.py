@@ -1,9 +1,10 @@
 """
 API routes for the HSQ Forms API
 """
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from src.forms_api.db import get_db
 from src.forms_api.models import FormTemplate, FormSubmission
@@ -12,21 +13,43 @@ from src.forms_api.schemas import (
     FormTemplateResponse, 
     FormSubmissionCreate, 
     FormSubmissionResponse,
+    BatchSubmissionRequest,
+    BatchSubmissionResponse,
     CustomerValidationRequest,
     CustomerValidationResponse,
     B2BSupportSubmissionRequest,
-    B2BSupportSubmissionResponse
+    B2BSupportSubmissionResponse,
+    B2BCaseStatusResponse
 )
 from src.forms_api.services import FormBuilderService
-from src.forms_api.esb_service import esb_service
+from src.forms_api.services.enhanced_services import EnhancedFormBuilderService
+from src.forms_api.services.case_outbox import (
+    PENDING,
+    case_dispatcher,
+    enqueue_case,
+    get_case_status,
+)
+from src.forms_api.services.ingestion import submission_ingestor
+from src.forms_api.services.export_service import EXPORT_MEDIA_TYPES, export_submissions
+from src.forms_api.services.template_cache import template_cache
+from src.forms_api.esb_service import esb_request, esb_service
+from src.forms_api.services.customer_validation_cache import customer_validation_cache
 from src.forms_api.mock_esb_service import mock_esb_service
 from src.forms_api.config import get_settings
+from src.forms_api.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.forms_api.utils.pagination import set_pagination_headers
+from src.forms_api.utils.serialization import dumps, json_bytes_response, submissions_to_json
+from src.forms_api.utils.circuit_breaker import CircuitOpenError
+from src.forms_api.utils.singleflight import single_flight
 import httpx
 import logging
 import os
 
 router = APIRouter()
 
+# Collapses concurrent cache misses for the same template or listing
+template_loads = single_flight("template_loads")
+
 
 @router.post("/templates", response_model=FormTemplateResponse)
 def create_template(
@@ -43,24 +66,45 @@ def create_template(
 
 @router.get("/templates", response_model=List[FormTemplateResponse])
 def list_templates(
+    request: Request,
     project_id: str = None,
     db: Session = Depends(get_db)
 ):
-    """List all form templates"""
-    templates = FormBuilderService.list_templates(db, project_id) if project_id else FormBuilderService.list_templates(db)
-    return [FormTemplateResponse.model_validate(t) for t in templates]
+    """List all form templates (cached, supports If-None-Match)"""
+    cached = template_cache.get_list(project_id)
+    if cached is None:
+        def load():
+            generation = template_cache.generation
+            if project_id:
+                templates = FormBuilderService.list_templates(db, project_id)
+            else:
+                templates = FormBuilderService.list_templates(db)
+            return template_cache.store_list(project_id, templates, generation)
+
+        # Concurrent misses share one database load
+        cached = template_loads.do_sync(("list", project_id), load)
+    return template_cache.response(request, cached)
 
 
 @router.get("/templates/{template_id}", response_model=FormTemplateResponse)
 def get_template(
     template_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Get a specific form template"""
-    template = db.query(FormTemplate).filter(FormTemplate.id == template_id).first()
-    if not template:
-        raise HTTPException(status_code=404, detail="Template not found")
-    return FormTemplateResponse.model_validate(template)
+    """Get a specific form template (cached, supports If-None-Match)"""
+    cached = template_cache.get_template(template_id)
+    if cached is None:
+        def load():
+            generation = template_cache.generation
+            template = db.query(FormTemplate).filter(FormTemplate.id == template_id).first()
+            if not template:
+                raise HTTPException(status_code=404, detail="Template not found")
+            return template_cache.store_template(template, generation)
+
+        # Concurrent misses share one database load
+        cached = template_loads.do_sync(("template", template_id), load)
+    return template_cache.response(request, cached)
 
 
 @router.post("/templates/{template_id}/submit", response_model=FormSubmissionResponse)
@@ -73,6 +117,18 @@ def submit_form(
     """Submit form data"""
     try:
         ip_address = request.client.host if request.client else None
+
+        # Write-behind mode: acknowledge once journaled, flushed in batches
+        if get_settings().submission_ingest_mode == "journal":
+            submission = submission_ingestor.enqueue(
+                db,
+                template_id=template_id,
+                data=submission_data.data,
+                submitted_from=submission_data.submitted_from,
+                ip_address=ip_address
+            )
+            return FormSubmissionResponse.model_validate(submission)
+
         # Create form submission directly
         submission = FormSubmission(
             template_id=template_id,
@@ -90,14 +146,112 @@ def submit_form(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/templates/{template_id}/submissions:batch", response_model=BatchSubmissionResponse)
+def submit_form_batch(
+    template_id: str,
+    batch: BatchSubmissionRequest,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Submit many queued submissions at once (kiosk and offline-sync clients).
+
+    Items are validated individually and written in chunks; the response
+    reports the outcome of every item in request order. Invalid items do
+    not stop the rest of the batch.
+    """
+    settings = get_settings()
+    if len(batch.submissions) > settings.batch_submission_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch cannot exceed {settings.batch_submission_max_items} submissions"
+        )
+
+    ip_address = request.client.host if request.client else None
+    try:
+        results = EnhancedFormBuilderService.create_batch_submissions(
+            db,
+            template_id,
+            (submission.model_dump() for submission in batch.submissions),
+            chunk_size=settings.batch_submission_chunk_size,
+            ip_address=ip_address
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return json_bytes_response(dumps({
+        "template_id": template_id,
+        "total": len(results),
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }))
+
+
 @router.get("/templates/{template_id}/submissions", response_model=List[FormSubmissionResponse])
 def get_submissions(
     template_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the previous page's X-Next-Cursor header"
+    ),
+    include_total: bool = Query(
+        False, description="Return X-Total-Count (estimated above SUBMISSION_COUNT_CAP)"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Get submissions for a template, newest first.
+
+    Pages are keyset-paginated on (created_at, id); pass the X-Next-Cursor
+    header of a page as `cursor` to get the next one.
+    """
+    try:
+        submissions, next_cursor = FormBuilderService.get_template_submissions_page(
+            db, template_id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total, is_estimate = None, False
+    if include_total:
+        total, is_estimate = FormBuilderService.count_template_submissions(
+            db, template_id, get_settings().submission_count_cap
+        )
+    # Encode rows straight to JSON bytes instead of via per-item response models
+    response = json_bytes_response(submissions_to_json(submissions))
+    set_pagination_headers(response, next_cursor, total, is_estimate)
+    return response
+
+
+@router.get("/templates/{template_id}/submissions/export")
+def export_submissions_stream(
+    template_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
     db: Session = Depends(get_db)
 ):
-    """Get all submissions for a template"""
-    submissions = db.query(FormSubmission).filter(FormSubmission.template_id == template_id).all()
-    return [FormSubmissionResponse.model_validate(s) for s in submissions]
+    """
+    Stream all submissions for a template, oldest first.
+
+    Rows are read from a server-side cursor and written as they arrive, so
+    memory use is independent of the number of submissions. CSV columns
+    are flattened from the template's schema properties.
+    """
+    template = db.query(FormTemplate).filter(FormTemplate.id == template_id).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    stream = export_submissions(
+        template_id, template.schema, format, get_settings().export_batch_size
+    )
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{template_id}-submissions.{format}"'
+        }
+    )
 
 
 # ESB Integration endpoints
@@ -198,45 +352,28 @@ async def submit_b2b_support(
             ip_address=ip_address
         )
         db.add(submission)
+        # Step 3: Queue the ESB case in the same transaction; the case dispatcher
+        # creates it (with retries), so the ESB round-trip is not on this request
+        case = enqueue_case(
+            db,
+            submission,
+            account_id=account_id,
+            customer_number=request.customer_number,
+            customer_code=request.customer_code,
+            description=request.description
+        )
+        submission_id, case_status = submission.id, case.status
         db.commit()
-        db.refresh(submission)
+        case_dispatcher.notify()
         
-        # Step 3: Create case in ESB
-        try:
-            if settings.environment == "development":
-                esb_response = await mock_esb_service.create_case(
-                    account_id=account_id,
-                    customer_number=request.customer_number,
-                    customer_code=request.customer_code,
-                    description=request.description
-                )
-            else:
-                esb_response = await esb_service.create_case(
-                    account_id=account_id,
-                    customer_number=request.customer_number,
-                    customer_code=request.customer_code,
-                    description=request.description
-                )
-            
-            case_id = esb_response.get("caseId") or esb_response.get("id")
-            
-            return B2BSupportSubmissionResponse(
-                success=True,
-                submission_id=submission.id,
-                case_id=case_id,
-                account_id=account_id,
-                message="Ärende skapat framgångsrikt"
-            )
-            
-        except Exception as esb_error:
-            # Form data is saved, but ESB case creation failed
-            return B2BSupportSubmissionResponse(
-                success=True,
-                submission_id=submission.id,
-                case_id=None,
-                account_id=account_id,
-                message=f"Formulär sparat men ärendeeskapande misslyckades: {str(esb_error)}"
-            )
+        return B2BSupportSubmissionResponse(
+            success=True,
+            submission_id=submission_id,
+            case_id=None,
+            case_status=case_status,
+            account_id=account_id,
+            message="Formulär sparat, ärendet skapas i ESB"
+        )
         
     except Exception as e:
         return B2BSupportSubmissionResponse(
@@ -246,6 +383,22 @@ async def submit_b2b_support(
         )
 
 
+@router.get("/esb/b2b-support/{submission_id}/case", response_model=B2BCaseStatusResponse)
+def get_b2b_support_case(submission_id: str, db: Session = Depends(get_db)):
+    """Poll the ESB case of a B2B support submission"""
+    case = get_case_status(db, submission_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail="No ESB case for this submission")
+    return B2BCaseStatusResponse(
+        submission_id=case.submission_id,
+        status=case.status,
+        case_id=case.case_id,
+        attempts=case.attempts,
+        last_error=case.last_error,
+        next_attempt_at=case.next_attempt_at if case.status == PENDING else None
+    )
+
+
 # Direct Husqvarna Group API validation (bypasses CORS)
 @router.get("/husqvarna/validate-customer")
 async def validate_customer_husqvarna(
@@ -294,6 +447,29 @@ async def validate_customer_husqvarna(
     # Log the validation attempt
     logger.info(f"Validating customer {customer_number} with code {customer_code}")
     
+    # Cached per customer; API answers only, never the local fallback
+    return await customer_validation_cache.get_or_load(
+        ("husqvarna", customer_number, customer_code),
+        lambda: query_husqvarna_customer(
+            husqvarna_api_base_url, husqvarna_api_key, customer_number, customer_code
+        ),
+        is_negative=lambda result: not result["valid"],
+        cacheable=lambda result: result["source"] == "husqvarna_api"
+    )
+
+
+async def query_husqvarna_customer(
+    husqvarna_api_base_url: str,
+    husqvarna_api_key: str,
+    customer_number: str,
+    customer_code: str
+):
+    """
+    Look up a customer number in the Husqvarna Group accounts API, falling
+    back to local format validation when the API is unavailable
+    """
+    logger = logging.getLogger(__name__)
+
     try:
         # Call Husqvarna Group API
         url = f"{husqvarna_api_base_url}/accounts"
@@ -308,8 +484,8 @@ async def validate_customer_husqvarna(
         
         logger.debug(f"Making request to {url} with params {params}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params, headers=headers)
+        # Pooled client behind the ESB circuit breaker, with the adaptive timeout
+        response = await esb_request("GET", url, params=params, headers=headers)
             
         logger.debug(f"Husqvarna API response status: {response.status_code}")
         
@@ -361,6 +537,11 @@ async def validate_customer_husqvarna(
             # Fall back to basic format validation
             return await fallback_validation_local(customer_number, customer_code)
             
+    except CircuitOpenError as e:
+        # Don't wait on an API that is known to be failing
+        logger.warning(f"Skipping Husqvarna API call: {e}")
+        return await fallback_validation_local(customer_number, customer_code)
+
     except httpx.TimeoutException:
         logger.error("Timeout when calling Husqvarna API")
         return await fallback_validation_local(customer_number, customer_code)
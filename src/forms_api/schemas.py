@@ -55,6 +55,31 @@ class FormSubmissionResponse(BaseModel):
     created_at: datetime
 
 
+class BatchSubmissionRequest(BaseModel):
+    """Schema for a bulk upload of queued submissions"""
+    submissions: List[FormSubmissionCreate] = Field(
+        ..., min_length=1, description="Submissions in upload order"
+    )
+
+
+class BatchSubmissionItemResult(BaseModel):
+    """Outcome for one item of a bulk upload"""
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="created, invalid or failed")
+    submission_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    errors: Optional[List[str]] = None
+
+
+class BatchSubmissionResponse(BaseModel):
+    """Schema for bulk upload response"""
+    template_id: str
+    total: int
+    created: int
+    failed: int
+    results: List[BatchSubmissionItemResult]
+
+
 # ESB Integration schemas
 class CustomerValidationRequest(BaseModel):
     """Schema for customer validation request"""
@@ -89,5 +114,50 @@ class B2BSupportSubmissionResponse(BaseModel):
     success: bool = Field(..., description="Whether submission was successful")
     submission_id: str = Field(..., description="Form submission ID")
     case_id: Optional[str] = Field(None, description="ESB case ID if created")
+    case_status: Optional[str] = Field(
+        None, description="ESB case status: pending, created or failed"
+    )
     account_id: Optional[str] = Field(None, description="Customer account ID")
     message: str = Field(..., description="Success or error message")
+
+
+class B2BCaseStatusResponse(BaseModel):
+    """Schema for the ESB case status of a B2B support submission"""
+    submission_id: str = Field(..., description="Form submission ID")
+    status: str = Field(..., description="pending, created or failed")
+    case_id: Optional[str] = Field(None, description="ESB case ID once created")
+    attempts: int = Field(..., description="ESB calls made so far")
+    last_error: Optional[str] = Field(None, description="Error of the last failed attempt")
+    next_attempt_at: Optional[datetime] = Field(
+        None, description="When a pending case is tried next"
+    )
+
+
+class WebhookDeliveryResponse(BaseModel):
+    """Schema for a queued, delivered or dead webhook delivery"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    event_type: str
+    url: str
+    status: str = Field(..., description="pending, delivered or dead")
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_status_code: Optional[int] = None
+    last_error: Optional[str] = None
+    delivered_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class WebhookReplayRequest(BaseModel):
+    """Schema for replaying dead webhook deliveries"""
+    ids: Optional[List[str]] = Field(
+        None, description="Deliveries to replay; all dead ones if omitted"
+    )
+    url: Optional[str] = Field(None, description="Only replay deliveries to this URL")
+
+
+class WebhookReplayResponse(BaseModel):
+    """Schema for the result of a webhook replay"""
+    replayed: int = Field(..., description="Dead deliveries queued again")
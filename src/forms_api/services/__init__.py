@@ -3,13 +3,18 @@ Service-lager för formulärhantering
 """
 import json
 from typing import Dict, Any, List, Optional
+from sqlalchemy import func, literal, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.forms_api.models import FormTemplate, FormSubmission
 from src.forms_api.schemas import FormTemplateCreate, FormSubmissionCreate
 import jsonschema
-from jsonschema import validate, ValidationError
-import asyncio
-from .webhook_service import WebhookService
+from jsonschema import ValidationError
+import uuid
+from datetime import datetime, timezone
+from .webhook_queue import enqueue_webhook, webhook_dispatcher
+from .validator_cache import format_validation_errors, validator_registry
+from src.forms_api.utils.pagination import decode_cursor, encode_cursor
 
 
 class FormBuilderService:
@@ -67,28 +72,25 @@ class FormBuilderService:
         return schema
     
     @staticmethod
-    def create_form_template(db: Session, form_data: FormTemplateCreate) -> FormTemplate:
-        """Skapa en ny formulärmall"""
+    def _build_form_template(form_data: FormTemplateCreate) -> FormTemplate:
+        """Bygg en FormTemplate med genererat schema (delas av sync- och async-vägen)"""
         # Konvertera fields till dict format
         fields_dict = [field.model_dump() for field in form_data.fields]
         
         # Generera JSON schema
         schema = FormBuilderService.generate_json_schema(fields_dict)
         
-        # Skapa validation rules (kan utökas senare)
-        validation_rules = {
-            "strict_schema": True,
-            "allow_additional_properties": False
-        }
-        
-        form_template = FormTemplate(
+        return FormTemplate(
             name=form_data.name,
             description=form_data.description,
             project_id=form_data.project_id,
-            schema=schema,
-            validation_rules=validation_rules,
-            created_by=form_data.created_by
+            schema=schema
         )
+
+    @staticmethod
+    def create_form_template(db: Session, form_data: FormTemplateCreate) -> FormTemplate:
+        """Skapa en ny formulärmall"""
+        form_template = FormBuilderService._build_form_template(form_data)
         
         db.add(form_template)
         db.commit()
@@ -96,29 +98,28 @@ class FormBuilderService:
         
         return form_template
     
+    @staticmethod
+    async def create_form_template_async(
+        db: AsyncSession, form_data: FormTemplateCreate
+    ) -> FormTemplate:
+        """Skapa en ny formulärmall (AsyncSession)"""
+        form_template = FormBuilderService._build_form_template(form_data)
+
+        db.add(form_template)
+        await db.commit()
+        await db.refresh(form_template)
+
+        return form_template
+
     @staticmethod
     def validate_submission_data(template: FormTemplate, data: Dict[str, Any]) -> tuple[bool, Optional[List[str]]]:
         """Validera inlämnad data mot formulärschema"""
         try:
-            validate(instance=data, schema=template.schema)
+            # Kompilerad validator återanvänds per template och schemaversion
+            validator_registry.validate(template.id, template.schema, data)
             return True, None
         except ValidationError as e:
-            errors = []
-            
-            # Format validation errors nicely
-            def extract_errors(error, path=""):
-                current_path = f"{path}.{error.path[0]}" if error.path else path
-                current_path = current_path.lstrip(".")
-                
-                if error.context:
-                    for sub_error in error.context:
-                        extract_errors(sub_error, current_path)
-                else:
-                    error_msg = f"{current_path}: {error.message}" if current_path else error.message
-                    errors.append(error_msg)
-            
-            extract_errors(e)
-            return False, errors
+            return False, format_validation_errors(e)
         except Exception as e:
             return False, [f"Schema validation error: {str(e)}"]
     
@@ -146,37 +147,41 @@ class FormBuilderService:
         if not is_valid:
             raise ValueError(f"Validation failed: {'; '.join(errors)}")
         
-        # Skapa submission
+        # Skapa submission; id och tidpunkt sätts här så att webhook-payloaden
+        # kan byggas före commit
         submission = FormSubmission(
+            id=str(uuid.uuid4()),
             template_id=submission_data.template_id,
             data=submission_data.data,
             submitted_from=submission_data.submitted_from,
-            ip_address=ip_address
+            ip_address=ip_address,
+            created_at=datetime.now(timezone.utc)
         )
-        
         db.add(submission)
-        db.commit()
-        db.refresh(submission)
         
-        # Send webhook notification in a non-blocking way
+        # Webhook-leveranser köas i samma transaktion och skickas av webhook-dispatchern
+        deliveries = []
         if send_webhook:
-            # Create a dictionary with submission details for the webhook
             webhook_payload = {
                 "id": submission.id,
                 "template_id": submission.template_id,
                 "template_name": template.name if template else None,
                 "data": submission.data,
-                "submitted_by": submission.submitted_by,
-                "submitted_from_project": submission.submitted_from_project,
-                "submitted_at": submission.created_at.isoformat() if submission.created_at else None
+                "submitted_from": submission.submitted_from,
+                "submitted_at": submission.created_at.isoformat()
             }
-            
-            # Fire and forget - don't wait for webhook to complete
-            asyncio.create_task(WebhookService.send_form_submission_webhook(
+            deliveries = enqueue_webhook(
+                db,
                 event_type="submission_created",
                 form_data=webhook_payload,
-                template_id=submission.template_id
-            ))
+                template_id=submission.template_id,
+                project_id=template.project_id
+            )
+
+        db.commit()
+        db.refresh(submission)
+        if deliveries:
+            webhook_dispatcher.notify()
         
         return submission
     
@@ -189,23 +194,84 @@ class FormBuilderService:
         ).order_by(FormTemplate.created_at.desc()).all()
     
     @staticmethod
-    def get_template_submissions(
-        db: Session, 
-        template_id: str, 
-        limit: int = 20, 
-        offset: int = 0
-    ) -> tuple[List[FormSubmission], int]:
-        """Hämta submissions för en template"""
-        query = db.query(FormSubmission).filter(
-            FormSubmission.template_id == template_id
-        )
+    def _submissions_page_query(template_id: str, limit: int, cursor: Optional[str] = None):
+        """Keyset-fråga över (created_at, id), nyast först.
+
+        Hämtar limit + 1 rader för att se om det finns fler.
+        """
+        query = select(FormSubmission).filter(FormSubmission.template_id == template_id)
         
-        total = query.count()
-        submissions = query.order_by(
-            FormSubmission.created_at.desc()
-        ).limit(limit).offset(offset).all()
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(FormSubmission.created_at, FormSubmission.id) < tuple_(
+                    literal(created_at, FormSubmission.created_at.type),
+                    literal(last_id, FormSubmission.id.type)
+                )
+            )
         
-        return submissions, total
+        return query.order_by(
+            FormSubmission.created_at.desc(),
+            FormSubmission.id.desc()
+        ).limit(limit + 1)
+
+    @staticmethod
+    def _page_with_cursor(
+        rows: List[FormSubmission], limit: int
+    ) -> tuple[List[FormSubmission], Optional[str]]:
+        """Dela upp limit + 1 rader i sida och cursor för nästa sida"""
+        if len(rows) <= limit:
+            return rows, None
+        page = rows[:limit]
+        return page, encode_cursor(page[-1].created_at, page[-1].id)
+
+    @staticmethod
+    def get_template_submissions_page(
+        db: Session,
+        template_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[List[FormSubmission], Optional[str]]:
+        """
+        Hämta en sida submissions med keyset-paginering.
+        Kostar lika mycket oavsett hur djupt man bläddrar, till skillnad från OFFSET.
+
+        Raises:
+            ValueError: Om cursor är ogiltig
+        """
+        query = FormBuilderService._submissions_page_query(template_id, limit, cursor)
+        rows = list(db.execute(query).scalars().all())
+        return FormBuilderService._page_with_cursor(rows, limit)
+
+    @staticmethod
+    def count_template_submissions(
+        db: Session, template_id: str, cap: int = 10000
+    ) -> tuple[int, bool]:
+        """
+        Räkna submissions för en template, men högst upp till cap rader.
+        Över cap används PostgreSQL-planerarens uppskattning i stället för en full räkning.
+
+        Returns:
+            (antal, True om antalet är en uppskattning)
+        """
+        capped = select(FormSubmission.id).filter(
+            FormSubmission.template_id == template_id
+        ).limit(cap + 1).subquery()
+        count = db.scalar(select(func.count()).select_from(capped))
+        if count <= cap:
+            return count, False
+
+        if db.get_bind().dialect.name == "postgresql":
+            plan = db.execute(
+                text(
+                    "EXPLAIN (FORMAT JSON) "
+                    "SELECT 1 FROM form_submissions WHERE template_id = :template_id"
+                ),
+                {"template_id": template_id}
+            ).scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return max(int(plan[0]["Plan"]["Plan Rows"]), cap), True
+        return cap, True
     
     @staticmethod
     def list_templates(db: Session, project_id: Optional[str] = None) -> List[FormTemplate]:
@@ -214,3 +280,58 @@ class FormBuilderService:
         if project_id:
             query = query.filter(FormTemplate.project_id == project_id)
         return query.order_by(FormTemplate.created_at.desc()).all()
+
+    @staticmethod
+    async def list_templates_async(
+        db: AsyncSession, project_id: Optional[str] = None
+    ) -> List[FormTemplate]:
+        """List all form templates, optionally filtered by project_id (AsyncSession)"""
+        query = select(FormTemplate).filter(FormTemplate.is_active == True)  # noqa: E712
+        if project_id:
+            query = query.filter(FormTemplate.project_id == project_id)
+        result = await db.execute(query.order_by(FormTemplate.created_at.desc()))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_template_async(db: AsyncSession, template_id: str) -> Optional[FormTemplate]:
+        """Hämta en formulärmall (AsyncSession)"""
+        return await db.get(FormTemplate, template_id)
+
+    @staticmethod
+    async def create_submission_async(
+        db: AsyncSession,
+        template_id: str,
+        data: Dict[str, Any],
+        submitted_from: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> FormSubmission:
+        """Spara en formulärinlämning (AsyncSession)"""
+        submission = FormSubmission(
+            template_id=template_id,
+            data=data,
+            submitted_from=submitted_from,
+            ip_address=ip_address
+        )
+        db.add(submission)
+        await db.commit()
+        await db.refresh(submission)
+        return submission
+
+    @staticmethod
+    async def get_template_submissions_page_async(
+        db: AsyncSession,
+        template_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[List[FormSubmission], Optional[str]]:
+        """Hämta en sida submissions med keyset-paginering (AsyncSession)"""
+        query = FormBuilderService._submissions_page_query(template_id, limit, cursor)
+        rows = list((await db.execute(query)).scalars().all())
+        return FormBuilderService._page_with_cursor(rows, limit)
+
+    @staticmethod
+    async def count_template_submissions_async(
+        db: AsyncSession, template_id: str, cap: int = 10000
+    ) -> tuple[int, bool]:
+        """Räkna submissions för en template, högst upp till cap (AsyncSession)"""
+        return await db.run_sync(FormBuilderService.count_template_submissions, template_id, cap)
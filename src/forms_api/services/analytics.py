@@ -0,0 +1,454 @@
+"""
+Submission analytics backed by daily rollups.
+
+Dashboard queries used to count and group every submission in the period
+on each load. Instead, a compaction job aggregates submissions per template
+and day into `submission_daily_rollups`; analytics read those rows for the
+compacted days and aggregate only the submissions after the watermark
+(normally just today) live. A dashboard load therefore reads O(days) rows
+rather than O(submissions).
+
+Compaction re-aggregates the last `reopen_days` compacted days on every run,
+so late inserts within that window are picked up. Processing or deleting a
+submission of a compacted day moves the watermark back to that day in the
+same transaction, so the day is aggregated live until the next compaction
+recomputes it. One compaction runs at a time across replicas: it holds a
+lock on the watermark row, and runs that find it taken are skipped.
+"""
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import (
+    Select, case, delete, event, func, insert, inspect, literal, select, tuple_, update
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.forms_api.db import SessionLocal
+from src.forms_api.models import (
+    AnalyticsRollupState, FormSubmission, FormTemplate, SubmissionDailyRollup
+)
+
+logger = logging.getLogger(__name__)
+
+_STATE_ID = 1
+
+
+def _as_date(value: Any) -> date:
+    """`date()` of a timestamp is a string on SQLite and a date elsewhere"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def get_watermark(db: Session) -> Optional[date]:
+    """Return the first day that is not rolled up yet, or None before the first compaction"""
+    state = db.get(AnalyticsRollupState, _STATE_ID)
+    return state.compacted_until if state else None
+
+
+def _lock_state(db: Session, today: date) -> Optional[AnalyticsRollupState]:
+    """
+    Lock the watermark row for one compaction, creating it on the first run.
+
+    Returns None if another compaction holds the lock.
+    """
+    if db.get(AnalyticsRollupState, _STATE_ID) is None:
+        # Nothing is rolled up before the first submission
+        first = db.execute(select(func.min(FormSubmission.created_at))).scalar()
+        start = _as_date(first) if first is not None else today
+        db.add(AnalyticsRollupState(id=_STATE_ID, compacted_until=start))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # Created by a concurrent first run
+    return db.execute(
+        select(AnalyticsRollupState)
+        .where(AnalyticsRollupState.id == _STATE_ID)
+        .with_for_update(skip_locked=True)
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+
+
+def compact_rollups(db: Session, today: Optional[date] = None, reopen_days: int = 3) -> int:
+    """
+    Roll up all complete days since the last compaction.
+
+    Days from `watermark - reopen_days` up to (not including) today are
+    recomputed from the submissions table and the watermark moves to today.
+    The first run rolls up the whole history. Each run replaces the rows of
+    the days it covers, under a lock on the watermark row; a run that finds
+    another compaction holding it does nothing.
+
+    Args:
+        db: Database session; committed on success
+        today: First day to leave open (defaults to the current UTC day)
+        reopen_days: Already compacted days to recompute
+
+    Returns:
+        Number of rollup rows written
+    """
+    today = today or datetime.utcnow().date()
+    try:
+        state = _lock_state(db, today)
+        if state is None:
+            db.rollback()
+            logger.info("Submission rollups are being compacted elsewhere, skipping")
+            return 0
+        start = min(state.compacted_until - timedelta(days=max(0, reopen_days)), today)
+
+        db.execute(
+            delete(SubmissionDailyRollup).where(
+                SubmissionDailyRollup.day >= start,
+                SubmissionDailyRollup.day < today
+            )
+        )
+        day = func.date(FormSubmission.created_at)
+        aggregate = select(
+            day,
+            FormSubmission.template_id,
+            FormTemplate.project_id,
+            func.count(FormSubmission.id),
+            func.sum(case((FormSubmission.is_processed == True, 1), else_=0))  # noqa: E712
+        ).join(
+            FormTemplate, FormTemplate.id == FormSubmission.template_id
+        ).where(
+            FormSubmission.created_at >= _day_start(start),
+            FormSubmission.created_at < _day_start(today)
+        ).group_by(
+            day, FormSubmission.template_id, FormTemplate.project_id
+        )
+        written = db.execute(
+            insert(SubmissionDailyRollup).from_select(
+                ["day", "template_id", "project_id", "submission_count", "processed_count"],
+                aggregate
+            )
+        ).rowcount
+
+        if state.compacted_until < today:
+            state.compacted_until = today
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Compacted submission rollups from {start} to {today}: {written} rows")
+    return written
+
+
+def reopen_day(connection, day: date) -> None:
+    """
+    Move the watermark back to `day`, so it is aggregated live and recomputed
+    by the next compaction. Runs in the caller's transaction; waits for a
+    compaction in progress to commit first.
+    """
+    connection.execute(
+        update(AnalyticsRollupState)
+        .where(AnalyticsRollupState.id == _STATE_ID, AnalyticsRollupState.compacted_until > day)
+        .values(compacted_until=day)
+    )
+
+
+def _submission_day(submission: FormSubmission) -> Optional[date]:
+    created_at = submission.created_at
+    if created_at is None:
+        return None
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+@event.listens_for(FormSubmission, "after_update")
+def _reopen_processed_day(mapper, connection, target) -> None:
+    """A compacted day's processed count changes with the submission's status"""
+    day = _submission_day(target)
+    # Today is never compacted
+    if day is None or day >= datetime.utcnow().date():
+        return
+    if inspect(target).attrs.is_processed.history.has_changes():
+        reopen_day(connection, day)
+
+
+@event.listens_for(FormSubmission, "after_delete")
+def _reopen_deleted_day(mapper, connection, target) -> None:
+    day = _submission_day(target)
+    if day is not None and day < datetime.utcnow().date():
+        reopen_day(connection, day)
+
+
+def rebuild_rollups(db: Session, today: Optional[date] = None) -> int:
+    """Drop all rollups and compact the whole history again"""
+    db.execute(delete(SubmissionDailyRollup))
+    db.execute(delete(AnalyticsRollupState))
+    db.commit()
+    return compact_rollups(db, today=today)
+
+
+class AnalyticsEngine:
+    """
+    Computes submission totals, the daily histogram and processing times
+    over raw submissions in a single aggregate statement.
+
+    On PostgreSQL the statement groups by `GROUPING SETS ((day), ())`: one
+    row per day plus a period row carrying the totals and time-to-process
+    percentiles, with processed counts as `FILTER` aggregates. Other
+    databases (SQLite in tests) group by day and get the period totals from
+    window functions over the daily rows; percentiles are not available
+    there and are reported as None.
+    """
+
+    PERCENTILES = (0.5, 0.9, 0.95)
+
+    def __init__(self, dialect_name: str):
+        self.dialect_name = dialect_name
+        self.grouping_sets = dialect_name == "postgresql"
+
+    @classmethod
+    def for_session(cls, db: Session) -> "AnalyticsEngine":
+        return cls(db.get_bind().dialect.name)
+
+    def _processing_seconds(self):
+        """Seconds from submission to processing; NULL while unprocessed"""
+        if self.dialect_name == "postgresql":
+            return func.extract("epoch", FormSubmission.processed_at - FormSubmission.created_at)
+        processed_at = func.julianday(FormSubmission.processed_at)
+        return (processed_at - func.julianday(FormSubmission.created_at)) * 86400
+
+    def statement(
+        self,
+        start: datetime,
+        project_id: Optional[str] = None,
+        template_id: Optional[str] = None,
+        processing_times: bool = False
+    ) -> Select:
+        """
+        Build the aggregate statement for submissions created at or after `start`.
+
+        Every row has `day`, `is_period`, `submissions` and `processed`;
+        with `processing_times` also `avg_seconds` and `p50_seconds` etc.
+        """
+        day = func.date(FormSubmission.created_at).label("day")
+        submissions = func.count(FormSubmission.id)
+        processed = func.count(FormSubmission.id).filter(
+            FormSubmission.is_processed == True  # noqa: E712
+        )
+        seconds = self._processing_seconds()
+
+        if self.grouping_sets:
+            columns = [
+                day,
+                func.grouping(day).label("is_period"),
+                submissions.label("submissions"),
+                processed.label("processed"),
+            ]
+            if processing_times:
+                columns.append(func.avg(seconds).label("avg_seconds"))
+                columns.extend(
+                    func.percentile_cont(fraction)
+                    .within_group(seconds)
+                    .label(f"p{int(fraction * 100)}_seconds")
+                    for fraction in self.PERCENTILES
+                )
+            query = select(*columns).group_by(func.grouping_sets(tuple_(day), tuple_()))
+        else:
+            columns = [
+                day,
+                literal(0).label("is_period"),
+                submissions.label("submissions"),
+                processed.label("processed"),
+                func.sum(submissions).over().label("period_submissions"),
+                func.sum(processed).over().label("period_processed"),
+            ]
+            if processing_times:
+                # Period average weighted by each day's processed count
+                columns.append(
+                    (
+                        func.sum(func.sum(seconds)).over()
+                        / func.sum(func.count(seconds)).over()
+                    ).label("avg_seconds")
+                )
+            query = select(*columns).group_by(day)
+
+        query = query.where(FormSubmission.created_at >= start)
+        if template_id:
+            query = query.where(FormSubmission.template_id == template_id)
+        elif project_id:
+            query = query.join(FormTemplate, FormTemplate.id == FormSubmission.template_id).where(
+                FormTemplate.project_id == project_id
+            )
+        return query
+
+    def run(
+        self,
+        db: Session,
+        start: datetime,
+        project_id: Optional[str] = None,
+        template_id: Optional[str] = None,
+        processing_times: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute the statement and shape the result.
+
+        Returns:
+            Dict with `daily` ({date: [submissions, processed]}),
+            `submissions`, `processed` and, with `processing_times`,
+            `time_to_process` (seconds; percentiles None without PostgreSQL)
+        """
+        result = {"daily": {}, "submissions": 0, "processed": 0}
+        period = None
+        for row in db.execute(self.statement(start, project_id, template_id, processing_times)):
+            if row.is_period:
+                period = row
+                continue
+            result["daily"][_as_date(row.day)] = [int(row.submissions), int(row.processed or 0)]
+            if not self.grouping_sets:
+                period = row
+
+        if period is not None:
+            if self.grouping_sets:
+                result["submissions"] = int(period.submissions)
+                result["processed"] = int(period.processed or 0)
+            else:
+                result["submissions"] = int(period.period_submissions)
+                result["processed"] = int(period.period_processed or 0)
+
+        if processing_times:
+            metrics = {"avg_seconds": None}
+            metrics.update(
+                {f"p{int(fraction * 100)}_seconds": None for fraction in self.PERCENTILES}
+            )
+            if period is not None:
+                for name in metrics:
+                    value = getattr(period, name, None)
+                    metrics[name] = round(float(value), 3) if value is not None else None
+            result["time_to_process"] = metrics
+        return result
+
+
+def get_submission_analytics(
+    db: Session,
+    project_id: Optional[str] = None,
+    template_id: Optional[str] = None,
+    days: int = 30,
+    today: Optional[date] = None,
+    processing_times: bool = False
+) -> Dict[str, Any]:
+    """
+    Submission totals and daily counts for the last `days` days.
+
+    The period starts at midnight UTC `days` days ago. Compacted days are
+    read from the rollups and the days from the watermark on are aggregated
+    from the submissions table in one statement. Processing-time metrics
+    need the raw rows, so with `processing_times` the whole period is
+    aggregated from the submissions table, still in one statement.
+
+    Args:
+        db: Database session
+        project_id: Limit to one project
+        template_id: Limit to one template (takes precedence over project_id)
+        days: Length of the period in days
+        today: Current UTC day (for testing)
+        processing_times: Add `time_to_process` average and percentiles
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days)
+    engine = AnalyticsEngine.for_session(db)
+
+    if processing_times:
+        live_start = start
+    else:
+        live_start = max(start, get_watermark(db) or start)
+
+    live = engine.run(db, _day_start(live_start), project_id, template_id, processing_times)
+    daily = live["daily"]
+    total_submissions = live["submissions"]
+    processed_submissions = live["processed"]
+
+    if live_start > start:
+        rollups = select(
+            SubmissionDailyRollup.day,
+            func.sum(SubmissionDailyRollup.submission_count),
+            func.sum(SubmissionDailyRollup.processed_count)
+        ).where(
+            SubmissionDailyRollup.day >= start,
+            SubmissionDailyRollup.day < live_start
+        ).group_by(SubmissionDailyRollup.day)
+        if template_id:
+            rollups = rollups.where(SubmissionDailyRollup.template_id == template_id)
+        elif project_id:
+            rollups = rollups.where(SubmissionDailyRollup.project_id == project_id)
+
+        for row_day, count, processed in db.execute(rollups):
+            daily[_as_date(row_day)] = [int(count or 0), int(processed or 0)]
+            total_submissions += int(count or 0)
+            processed_submissions += int(processed or 0)
+
+    analytics = {
+        "period_days": days,
+        "total_submissions": total_submissions,
+        "processed_submissions": processed_submissions,
+        "completion_rate": (
+            (processed_submissions / total_submissions * 100) if total_submissions > 0 else 0
+        ),
+        "avg_submissions_per_day": total_submissions / days if days > 0 else 0,
+        "daily_submissions": [
+            {"date": row_day.isoformat(), "count": daily[row_day][0]}
+            for row_day in sorted(daily)
+        ]
+    }
+    if processing_times:
+        analytics["time_to_process"] = live["time_to_process"]
+    return analytics
+
+
+class RollupCompactor:
+    """
+    Background thread running `compact_rollups` periodically.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, reopen_days: int = 3) -> int:
+        with self._session_factory() as db:
+            return compact_rollups(db, reopen_days=reopen_days)
+
+    def start(self, interval: float, reopen_days: int = 3) -> None:
+        """Start compacting every `interval` seconds; the first run is immediate"""
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval, reopen_days), name="analytics-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, interval: float, reopen_days: int) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once(reopen_days)
+            except Exception:
+                logger.exception("Analytics rollup compaction failed")
+            self._stop.wait(interval)
+
+
+# Global compactor instance
+rollup_compactor = RollupCompactor()
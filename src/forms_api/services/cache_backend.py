@@ -0,0 +1,618 @@
+"""
+Shared cache backends and two-tier caching for HSQ Forms API.
+
+Each replica keeps hot entries in its own process (L1, a `TTLCache`). A
+`CacheBackend` adds a second tier shared by all replicas (L2), so a cold
+replica reads what another replica already computed instead of going to
+the database. Invalidations are written to L2 and broadcast on a pub/sub
+channel so every replica drops its L1 copy.
+
+Backends, chosen by CACHE_BACKEND:
+
+- `none`: L1 only (default).
+- `memory`: in-process L2 with in-process pub/sub; for tests and local runs.
+- `sqlite`: a SQLite file shared by processes on one host; invalidations are
+  polled from a message table.
+- `redis`: a Redis server, e.g. Azure Cache for Redis, through the `redis`
+  package; use `rediss://` for TLS.
+
+The shared tier is best-effort: backend errors are logged and treated as
+misses, never surfaced to requests. Backends are blocking; coroutines use
+the `TieredCache.aget`/`aset` variants, which run L2 calls in a thread.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from src.forms_api.config import get_settings
+from src.forms_api.utils.cache import TTLCache, cache_registry
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "hsq-forms:cache-invalidation"
+
+
+class CacheBackend(ABC):
+    """
+    Interface of a shared cache tier.
+
+    Values are bytes; keys are strings. Subscribers are called with each
+    message published on a channel, and with `None` after a reconnect when
+    messages may have been missed.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a value, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally expiring after ttl seconds"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value"""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer counter and return the new value"""
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Broadcast a message to all subscribers of a channel"""
+
+    @abstractmethod
+    def subscribe(self, channel: str, handler: Callable[[Optional[str]], None]) -> None:
+        """Call handler for every message on a channel"""
+
+    def close(self) -> None:
+        """Release connections and stop background threads"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process backend; pub/sub delivers synchronously to local subscribers."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values: Dict[str, tuple] = {}
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._values[key] = (value, self._clock() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int((self._values.get(key) or (b"0", None))[0]) + 1
+            self._values[key] = (str(value).encode(), None)
+            return value
+
+    def publish(self, channel: str, message: str) -> None:
+        for handler in list(self._subscribers.get(channel, [])):
+            handler(message)
+
+    def subscribe(self, channel: str, handler: Callable[[Optional[str]], None]) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(handler)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend in a SQLite file, shared by processes on the same host.
+
+    Subscribers poll a message table; published messages are kept for a
+    minute.
+    """
+
+    MESSAGE_RETENTION_SECONDS = 60
+
+    def __init__(self, path: str, poll_interval: float = 0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_messages "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "message TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl if ttl else None)
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            value = int(bytes(row[0])) + 1 if row else 1
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, NULL)",
+                (key, str(value).encode())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def publish(self, channel: str, message: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO cache_messages (channel, message, created_at) VALUES (?, ?, ?)",
+            (channel, message, now)
+        )
+        conn.execute(
+            "DELETE FROM cache_messages WHERE created_at < ?",
+            (now - self.MESSAGE_RETENTION_SECONDS,)
+        )
+
+    def subscribe(self, channel: str, handler: Callable[[Optional[str]], None]) -> None:
+        row = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM cache_messages").fetchone()
+        thread = threading.Thread(
+            target=self._poll, args=(channel, handler, row[0]), name="cache-subscriber", daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _poll(self, channel: str, handler: Callable[[Optional[str]], None], last_id: int) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, message FROM cache_messages "
+                    "WHERE channel = ? AND id > ? ORDER BY id",
+                    (channel, last_id)
+                ).fetchall()
+                for message_id, message in rows:
+                    last_id = message_id
+                    handler(message)
+            except Exception:
+                logger.exception("Polling cache invalidations failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend on a Redis server, through redis-py.
+
+    Commands go through redis-py's thread-safe connection pool; each
+    subscription has its own connection and thread.
+    """
+
+    RETRY_AFTER_SECONDS = 5.0
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        try:
+            import redis
+            from redis.backoff import NoBackoff
+            from redis.retry import Retry
+        except ImportError:
+            raise ValueError("The redis cache backend needs the redis package (pip install redis)")
+        self.url = url
+        self.timeout = timeout
+        self._errors = (redis.RedisError, OSError)
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            protocol=2,
+            retry=Retry(NoBackoff(), 1)  # Reconnect once after a dropped connection
+        )
+        self._subscribers: List["_RedisSubscription"] = []
+        self._retry_at = 0.0
+
+    def _execute(self, command: str, *args: Any, **options: Any) -> Any:
+        # After a failed command, fail fast for a while instead of waiting on timeouts
+        if time.monotonic() < self._retry_at:
+            raise ConnectionError("Cache server unavailable")
+        try:
+            return getattr(self._client, command)(*args, **options)
+        except self._errors:
+            self._retry_at = time.monotonic() + self.RETRY_AFTER_SECONDS
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._execute("get", key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._execute("set", key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self._execute("delete", key)
+
+    def incr(self, key: str) -> int:
+        return self._execute("incr", key)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._execute("publish", channel, message)
+
+    def subscribe(self, channel: str, handler: Callable[[Optional[str]], None]) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        subscription = _RedisSubscription(pubsub, channel, handler)
+        self._subscribers.append(subscription)
+        subscription.start(self.timeout)
+
+    def close(self) -> None:
+        for subscription in self._subscribers:
+            subscription.stop(self.timeout)
+        self._subscribers.clear()
+        self._client.close()
+
+
+class _RedisSubscription:
+    """
+    A channel subscription with its own connection and listener thread.
+
+    redis-py reconnects and resubscribes by itself; the handler is called
+    with None after every reconnect since messages may have been missed.
+    """
+
+    def __init__(self, pubsub: Any, channel: str, handler: Callable[[Optional[str]], None]):
+        self.pubsub = pubsub
+        self.channel = channel
+        self.handler = handler
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._listen, name="cache-subscriber", daemon=True)
+
+    def start(self, timeout: float) -> None:
+        self._thread.start()
+        self._ready.wait(timeout)
+
+    def stop(self, timeout: float) -> None:
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    def _reconnected(self, connection: Any) -> None:
+        self.handler(None)
+
+    def _listen(self) -> None:
+        backoff = 0.5
+        first = True
+        while not self._stop.is_set():
+            try:
+                self.pubsub.subscribe(self.channel)
+                # Weakly referenced by redis-py, so it has to be a bound method
+                self.pubsub.connection.register_connect_callback(self._reconnected)
+                if not first:
+                    self.handler(None)
+                first = False
+                backoff = 0.5
+                self._ready.set()
+                while not self._stop.is_set():
+                    message = self.pubsub.get_message(timeout=0.5)
+                    if message is not None and message["type"] == "message":
+                        self.handler(message["data"].decode("utf-8"))
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"Cache subscription to {self.channel} lost: {e}; reconnecting")
+                self._ready.set()
+                self.pubsub.reset()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+        self.pubsub.close()
+
+
+def create_cache_backend(kind: str, url: str = "") -> Optional[CacheBackend]:
+    """
+    Build a backend from CACHE_BACKEND / CACHE_BACKEND_URL values.
+
+    Raises:
+        ValueError: If the kind is unknown or a required URL is missing
+    """
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return MemoryCacheBackend()
+    if kind == "sqlite":
+        return SQLiteCacheBackend(url or "./data/cache.sqlite3")
+    if kind == "redis":
+        if not url:
+            raise ValueError("CACHE_BACKEND_URL is required for the redis cache backend")
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+_backend: Optional[CacheBackend] = None
+_backend_created = False
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Get (and create on first call) the configured shared backend"""
+    global _backend, _backend_created
+    with _backend_lock:
+        if not _backend_created:
+            settings = get_settings()
+            _backend = create_cache_backend(settings.cache_backend, settings.cache_backend_url)
+            _backend_created = True
+        return _backend
+
+
+def close_cache_backend() -> None:
+    """Close the shared backend at shutdown"""
+    global _backend, _backend_created
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
+        _backend_created = False
+
+
+class TieredCache:
+    """
+    Two-tier cache: a process-local TTLCache in front of a shared backend.
+
+    Reads try L1, then L2 (filling L1). Writes go to both. `delete` and
+    `clear` also notify other processes, which drop their L1 copies. `clear`
+    bumps a generation counter that is part of every L2 key, so all shared
+    entries are orphaned at once and expire on their own.
+
+    The generation is kept locally and re-read from L2 at most every
+    `GENERATION_TTL_SECONDS`, or as soon as another process announces a
+    `clear`, so an L1 miss normally costs a single L2 read.
+    """
+
+    GENERATION_TTL_SECONDS = 5.0
+
+    def __init__(
+        self,
+        name: str,
+        l1: TTLCache,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        encode: Callable[[Any], bytes] = orjson.dumps,
+        decode: Callable[[bytes], Any] = orjson.loads
+    ):
+        self.name = name
+        self.l1 = l1
+        self.backend = None
+        self.ttl = ttl if ttl is not None else l1.ttl
+        self._encode = encode
+        self._decode = decode
+        self._origin = uuid.uuid4().hex
+        self._generation = 0
+        self._generation_checked = float("-inf")
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        if backend is not None:
+            self.attach(backend)
+
+    def attach(self, backend: Optional[CacheBackend]) -> None:
+        """Put a shared tier behind this cache and listen for invalidations"""
+        if backend is None or backend is self.backend:
+            return
+        backend.subscribe(INVALIDATION_CHANNEL, self._on_message)
+        self.backend = backend
+        self._generation_checked = float("-inf")
+        # Entries cached before attaching were never written to L2
+        self.l1.clear()
+
+    def detach(self) -> None:
+        """Fall back to L1 only"""
+        self.backend = None
+
+    def _l2_key(self, key: str) -> str:
+        return f"{self.name}:{self._generation}:{key}"
+
+    def _l2(self, operation: Callable[[], Any], default: Any = None) -> Any:
+        """Run a backend call; failures count as misses"""
+        try:
+            return operation()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning(f"Shared cache {self.name} unavailable: {e}")
+            return default
+
+    def _current_generation(self) -> int:
+        """The shared generation, re-read at most every GENERATION_TTL_SECONDS"""
+        now = time.monotonic()
+        if now >= self._generation_checked + self.GENERATION_TTL_SECONDS:
+            self._generation_checked = now
+            generation = self._l2(lambda: self.backend.get(f"{self.name}:generation"))
+            if generation is not None:
+                self._generation = int(generation)
+        return self._generation
+
+    def _get_l2(self, key: str, default: Any) -> Any:
+        backend = self.backend
+        if backend is None:
+            return default
+        l2_key = f"{self.name}:{self._current_generation()}:{key}"
+        raw = self._l2(lambda: backend.get(l2_key))
+        if raw is None:
+            self.l2_misses += 1
+            return default
+        self.l2_hits += 1
+        value = self._decode(raw)
+        self.l1.set(key, value)
+        return value
+
+    def _set_l2(self, key: str, value: Any) -> None:
+        backend = self.backend
+        if backend is not None:
+            l2_key = self._l2_key(key)
+            self._l2(lambda: backend.set(l2_key, self._encode(value), self.ttl))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.l1.get(key)
+        if value is not None or self.backend is None:
+            return default if value is None else value
+        return self._get_l2(key, default)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """`get` for coroutines: an L1 miss goes to L2 in a worker thread"""
+        value = self.l1.get(key)
+        if value is not None or self.backend is None:
+            return default if value is None else value
+        return await asyncio.to_thread(self._get_l2, key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.l1.set(key, value)
+        self._set_l2(key, value)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """`set` for coroutines: the L2 write runs in a worker thread"""
+        self.l1.set(key, value)
+        if self.backend is not None:
+            await asyncio.to_thread(self._set_l2, key, value)
+
+    def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        backend, l2_key = self.backend, self._l2_key(key)
+        if backend is not None:
+            self._offload(lambda: self._delete_l2(backend, l2_key, key))
+
+    def clear(self) -> None:
+        self.l1.clear()
+        backend = self.backend
+        if backend is not None:
+            self._offload(lambda: self._bump_generation(backend))
+
+    def _delete_l2(self, backend: CacheBackend, l2_key: str, key: str) -> None:
+        self._l2(lambda: backend.delete(l2_key))
+        self._publish(backend, key)
+
+    def _bump_generation(self, backend: CacheBackend) -> None:
+        generation = self._l2(lambda: backend.incr(f"{self.name}:generation"))
+        if generation is not None:
+            self._generation = int(generation)
+            self._generation_checked = time.monotonic()
+        self._publish(backend, None)
+
+    @staticmethod
+    def _offload(operation: Callable[[], Any]) -> None:
+        """
+        Run a blocking L2 write, or hand it to a worker thread when called on
+        an event loop (e.g. invalidation from an async session's flush).
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            operation()
+        else:
+            loop.run_in_executor(None, operation)
+
+    def _publish(self, backend: CacheBackend, key: Optional[str]) -> None:
+        message = json.dumps({"cache": self.name, "key": key, "origin": self._origin})
+        self._l2(lambda: backend.publish(INVALIDATION_CHANNEL, message))
+
+    def _on_message(self, message: Optional[str]) -> None:
+        """Drop L1 entries invalidated by another process"""
+        if message is None:
+            self._generation_checked = float("-inf")
+            self.l1.clear()
+            return
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        if payload.get("cache") != self.name or payload.get("origin") == self._origin:
+            return
+        if payload.get("key") is None:
+            self._generation_checked = float("-inf")
+            self.l1.clear()
+        else:
+            self.l1.delete(payload["key"])
+
+    def sweep(self) -> int:
+        return self.l1.sweep()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.l1.stats()
+        stats["l2"] = None if self.backend is None else {
+            "backend": type(self.backend).__name__,
+            "hits": self.l2_hits,
+            "misses": self.l2_misses,
+            "errors": self.l2_errors,
+        }
+        return stats
+
+
+def tiered_cache(name: str, l1: TTLCache, **kwargs: Any) -> TieredCache:
+    """
+    Create a TieredCache and register it for stats and sweeping.
+
+    It starts out L1-only; `attach_shared_backend` adds the configured
+    shared tier at startup, so importing a module never opens connections.
+    """
+    return cache_registry.register(name, TieredCache(name, l1, **kwargs))
+
+
+def attach_shared_backend() -> Optional[CacheBackend]:
+    """Attach the configured backend to every registered TieredCache"""
+    backend = get_cache_backend()
+    if backend is not None:
+        for cache in cache_registry.caches().values():
+            if isinstance(cache, TieredCache):
+                cache.attach(backend)
+    return backend
+
+
+def detach_shared_backend() -> None:
+    """Detach all TieredCaches and close the shared backend"""
+    for cache in cache_registry.caches().values():
+        if isinstance(cache, TieredCache):
+            cache.detach()
+    close_cache_backend()
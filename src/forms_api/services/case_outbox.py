@@ -0,0 +1,280 @@
+"""
+Transactional outbox for ESB case creation.
+
+A B2B support submission and the ESB case to create for it are written in
+the same transaction (`enqueue_case`), so the form is answered as soon as
+the submission is stored and no case is lost when the ESB is slow or down.
+`CaseDispatcher` claims due rows in the background and calls `create_case`,
+retrying with exponential backoff. Every attempt for a submission sends the
+same Idempotency-Key, so a retry after a lost response does not create a
+second case.
+
+Claiming a row moves its `next_attempt_at` forward by a lease: if the
+dispatcher dies mid-attempt the row is picked up again once the lease runs
+out. On PostgreSQL rows are claimed with FOR UPDATE SKIP LOCKED, so the
+dispatchers of all workers and replicas can run side by side without
+sending a case twice.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.forms_api.config import get_settings
+from src.forms_api.db import SessionLocal
+from src.forms_api.models import EsbCaseOutbox, FormSubmission
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+CREATED = "created"
+FAILED = "failed"
+
+CreateCase = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_case(
+    db: Session,
+    submission: FormSubmission,
+    account_id: str,
+    customer_number: str,
+    customer_code: str,
+    description: str
+) -> EsbCaseOutbox:
+    """
+    Add the outbox row for a submission to the session.
+
+    Nothing is committed: the row is stored by the caller's commit, together
+    with the submission.
+    """
+    if submission.id is None:
+        db.flush()  # Assigns the submission id
+    entry = EsbCaseOutbox(
+        submission_id=submission.id,
+        idempotency_key=f"b2b-case-{submission.id}",
+        payload={
+            "account_id": account_id,
+            "customer_number": customer_number,
+            "customer_code": customer_code,
+            "description": description,
+        },
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=_utcnow()
+    )
+    db.add(entry)
+    return entry
+
+
+def get_case_status(db: Session, submission_id: str) -> Optional[EsbCaseOutbox]:
+    """Outbox row of a submission, or None if it has no ESB case"""
+    return db.execute(
+        select(EsbCaseOutbox).where(EsbCaseOutbox.submission_id == submission_id)
+    ).scalar_one_or_none()
+
+
+def retry_delay(attempts: int, base_seconds: float, max_seconds: float) -> float:
+    """Backoff before the next attempt, after `attempts` failed ones"""
+    return min(max_seconds, base_seconds * 2 ** max(0, attempts - 1))
+
+
+def is_permanent_error(error: BaseException) -> bool:
+    """Whether retrying cannot help: the ESB rejected the request itself"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return 400 <= status < 500 and status not in (408, 409, 429)
+    return False
+
+
+class CaseDispatcher:
+    """
+    Background task sending outbox rows to the ESB.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        create_case: Optional[CreateCase] = None,
+        batch_size: int = 20,
+        max_attempts: int = 10,
+        retry_base_seconds: float = 10.0,
+        retry_max_seconds: float = 3600.0,
+        lease_seconds: float = 120.0,
+        clock: Callable[[], datetime] = _utcnow
+    ):
+        self._session_factory = session_factory
+        self._create_case = create_case
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.created = 0
+        self.retries = 0
+        self.failed = 0
+
+    def _esb_create_case(self) -> CreateCase:
+        if self._create_case is not None:
+            return self._create_case
+        # Imported here: the ESB modules pull in the HTTP client and caches
+        if get_settings().environment == "development":
+            from src.forms_api.mock_esb_service import mock_esb_service
+            return mock_esb_service.create_case
+        from src.forms_api.esb_service import esb_service
+        return esb_service.create_case
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """Lease up to `batch_size` due rows to this dispatcher"""
+        now = self._clock()
+        with self._session_factory() as db:
+            entries = db.execute(
+                select(EsbCaseOutbox)
+                .where(EsbCaseOutbox.status == PENDING, EsbCaseOutbox.next_attempt_at <= now)
+                .order_by(EsbCaseOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            claimed = []
+            for entry in entries:
+                entry.attempts += 1
+                entry.next_attempt_at = now + timedelta(seconds=self.lease_seconds)
+                claimed.append({
+                    "id": entry.id,
+                    "submission_id": entry.submission_id,
+                    "idempotency_key": entry.idempotency_key,
+                    "payload": entry.payload,
+                    "attempts": entry.attempts,
+                })
+            db.commit()
+        return claimed
+
+    def settle(self, entry_id: str, attempts: int, case_id: Optional[str] = None,
+               error: Optional[BaseException] = None) -> str:
+        """Record the outcome of an attempt; returns the new status"""
+        now = self._clock()
+        with self._session_factory() as db:
+            entry = db.get(EsbCaseOutbox, entry_id)
+            if error is None:
+                entry.status = CREATED
+                entry.case_id = case_id
+                entry.last_error = None
+            elif is_permanent_error(error) or attempts >= self.max_attempts:
+                entry.status = FAILED
+                entry.last_error = str(error)
+            else:
+                entry.next_attempt_at = now + timedelta(
+                    seconds=retry_delay(attempts, self.retry_base_seconds, self.retry_max_seconds)
+                )
+                entry.last_error = str(error)
+            status = entry.status
+            db.commit()
+        return status
+
+    async def _send(self, claimed: Dict[str, Any]) -> None:
+        create_case = self._esb_create_case()
+        try:
+            response = await create_case(
+                idempotency_key=claimed["idempotency_key"], **claimed["payload"]
+            )
+        except Exception as e:
+            status = await asyncio.to_thread(
+                self.settle, claimed["id"], claimed["attempts"], error=e
+            )
+            if status == FAILED:
+                self.failed += 1
+                logger.error(f"ESB case for submission {claimed['submission_id']} failed: {e}")
+            else:
+                self.retries += 1
+                logger.warning(
+                    f"ESB case for submission {claimed['submission_id']} will be retried: {e}"
+                )
+            return
+
+        case_id = response.get("caseId") or response.get("id")
+        await asyncio.to_thread(self.settle, claimed["id"], claimed["attempts"], case_id=case_id)
+        self.created += 1
+        logger.info(f"ESB case {case_id} created for submission {claimed['submission_id']}")
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due cases; returns how many were attempted"""
+        claimed = await asyncio.to_thread(self.claim)
+        if claimed:
+            await asyncio.gather(*(self._send(entry) for entry in claimed))
+        return len(claimed)
+
+    def start(self, interval: float) -> None:
+        """Start dispatching every `interval` seconds, and whenever notified"""
+        if self._task is not None or interval <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(interval))
+
+    def notify(self) -> None:
+        """Wake the dispatcher now, e.g. right after a case was enqueued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the background task; in-flight attempts are retried after their lease"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                # A full batch means more may be due; go again without waiting
+                while await self.dispatch_once() >= self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("ESB case dispatch failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Outcome counters of this worker's dispatcher"""
+        return {
+            "running": self._task is not None,
+            "created": self.created,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+
+def case_counts(db: Session) -> Dict[str, int]:
+    """Outbox rows per status"""
+    rows = db.execute(
+        select(EsbCaseOutbox.status, func.count()).group_by(EsbCaseOutbox.status)
+    ).all()
+    return {status: count for status, count in rows}
+
+
+# Global dispatcher instance
+_settings = get_settings()
+case_dispatcher = CaseDispatcher(
+    batch_size=_settings.esb_case_dispatch_batch_size,
+    max_attempts=_settings.esb_case_max_attempts,
+    retry_base_seconds=_settings.esb_case_retry_base_seconds,
+    retry_max_seconds=_settings.esb_case_retry_max_seconds,
+    lease_seconds=_settings.esb_case_lease_seconds
+)
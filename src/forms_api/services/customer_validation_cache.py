@@ -0,0 +1,176 @@
+"""
+Cache for customer number validation against the Husqvarna ESB.
+
+The B2B support form validates the customer number as it is typed, so the
+same `(customer_number, customer_code)` is looked up over and over. Results
+are cached with separate TTLs for found (positive) and not found (negative)
+customers:
+
+- fresh entries are served from the cache;
+- positive entries past their TTL but within the stale window are served
+  immediately while one background lookup refreshes them;
+- concurrent lookups of the same key share one upstream request (the
+  `customer_validation` single-flight group).
+
+Upstream errors are never cached. Entries go through a TieredCache, so with
+a shared cache backend (CACHE_BACKEND) all replicas share the results; the
+shared tier is read and written off the event loop.
+"""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from src.forms_api.config import get_settings
+from src.forms_api.services.cache_backend import TieredCache
+from src.forms_api.utils.cache import TTLCache, cache_registry
+from src.forms_api.utils.singleflight import SingleFlight, single_flight
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class CustomerValidationCache:
+    """
+    Async read-through cache with negative caching, stale-while-revalidate
+    and coalescing of concurrent lookups.
+    """
+
+    def __init__(
+        self,
+        positive_ttl: float = 300,
+        negative_ttl: float = 30,
+        stale_ttl: float = 600,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.time,
+        flights: Optional[SingleFlight] = None
+    ):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        # Wall-clock expiry is kept in each entry, so replicas agree on it
+        self.entries = TieredCache(
+            "customer_validation",
+            TTLCache(maxsize=maxsize, ttl=positive_ttl + stale_ttl)
+        )
+        self.flights = flights or SingleFlight("customer_validation")
+        self.hits = 0
+        self.negative_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def _key(key: Sequence[str]) -> str:
+        return ":".join(str(part) for part in key)
+
+    async def get_or_load(
+        self,
+        key: Sequence[str],
+        loader: Loader,
+        is_negative: Callable[[Any], bool] = lambda value: value is None,
+        cacheable: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        Return the cached result for a key, loading it upstream when needed.
+
+        Args:
+            key: Lookup key, e.g. (namespace, customer_number, customer_code)
+            loader: Coroutine function performing the upstream lookup
+            is_negative: Whether a result means "not found" (negative TTL, no stale serving)
+            cacheable: Whether a result may be cached at all (e.g. not a fallback answer)
+
+        Raises:
+            Whatever the loader raises; errors are not cached
+        """
+        cache_key = self._key(key)
+        entry = await self.entries.aget(cache_key)
+        if entry is not None:
+            now = self._clock()
+            if now < entry["fresh_until"]:
+                if entry["negative"]:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return entry["value"]
+            if now < entry["stale_until"]:
+                self.stale_hits += 1
+                if not self.flights.running(cache_key):
+                    self.refreshes += 1
+                    fetch = self._fetcher(cache_key, loader, is_negative, cacheable)
+                    refresh = self.flights.spawn(cache_key, fetch)
+                    refresh.add_done_callback(
+                        lambda done: self._log_failed_refresh(cache_key, done)
+                    )
+                return entry["value"]
+
+        self.misses += 1
+        fetch = self._fetcher(cache_key, loader, is_negative, cacheable)
+        return await self.flights.do(cache_key, fetch)
+
+    def _fetcher(
+        self, cache_key: str, loader: Loader, is_negative: Callable, cacheable: Callable
+    ) -> Loader:
+        """Wrap the loader so the upstream result is stored once, by whoever runs it"""
+        async def fetch() -> Any:
+            value = await loader()
+            if cacheable(value):
+                await self._store(cache_key, value, is_negative(value))
+            return value
+        return fetch
+
+    @staticmethod
+    def _log_failed_refresh(cache_key: str, refresh) -> None:
+        if not refresh.cancelled() and refresh.exception() is not None:
+            logger.warning(
+                f"Refreshing customer validation for {cache_key} failed: {refresh.exception()}"
+            )
+
+    async def _store(self, cache_key: str, value: Any, negative: bool) -> None:
+        now = self._clock()
+        fresh_until = now + (self.negative_ttl if negative else self.positive_ttl)
+        await self.entries.aset(cache_key, {
+            "value": value,
+            "negative": negative,
+            "fresh_until": fresh_until,
+            # Not-found results are not served stale: the customer may just have been created
+            "stale_until": fresh_until if negative else fresh_until + self.stale_ttl,
+        })
+
+    def invalidate(self, key: Sequence[str]) -> None:
+        """Drop one cached result"""
+        self.entries.delete(self._key(key))
+
+    def clear(self) -> None:
+        """Drop all cached results"""
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counters (entry counts are under the `customer_validation` cache)"""
+        lookups = self.hits + self.negative_hits + self.stale_hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else None,
+            "coalesced": self.flights.collapsed,
+            "background_refreshes": self.refreshes,
+            "upstream_errors": self.flights.errors,
+            "in_flight": self.flights.in_flight(),
+        }
+
+
+# Global cache instance
+_settings = get_settings()
+customer_validation_cache = CustomerValidationCache(
+    positive_ttl=_settings.customer_validation_cache_ttl_seconds,
+    negative_ttl=_settings.customer_validation_negative_ttl_seconds,
+    stale_ttl=_settings.customer_validation_stale_seconds,
+    maxsize=_settings.customer_validation_cache_size,
+    flights=single_flight("customer_validation")
+)
+cache_registry.register("customer_validation", customer_validation_cache.entries)
+cache_registry.register("customer_validation.lookups", customer_validation_cache)
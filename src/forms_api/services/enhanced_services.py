@@ -2,17 +2,26 @@
 Enhanced FormBuilderService med prestanda-optimeringar
 """
 import json
-import asyncio
-from typing import Dict, Any, List, Optional, Tuple
+import hashlib
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from functools import lru_cache
-from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, insert
 
-from .models import FormTemplate, FlexibleFormSubmission, FlexibleFormAttachment
-from .schemas import FormTemplateCreate, FlexibleFormSubmissionCreate
+from src.forms_api.config import get_settings
+from src.forms_api.models import FormTemplate, FormSubmission
+from src.forms_api.schemas import FormTemplateCreate
 import jsonschema
-from jsonschema import validate, ValidationError
+from src.forms_api.services.analytics import get_submission_analytics
+from src.forms_api.services.cache_backend import tiered_cache
+from src.forms_api.services.validation_executor import validation_executor
+from src.forms_api.services.validator_cache import schema_fingerprint
+from src.forms_api.utils.cache import TTLCache, cache_registry
+
+logger = logging.getLogger(__name__)
+_settings = get_settings()
 
 
 class EnhancedFormBuilderService:
@@ -27,9 +36,18 @@ class EnhancedFormBuilderService:
     - Analytics integration
     """
     
-    # Class-level cache för schemas (i produktion: använd Redis)
-    _schema_cache = {}
-    _validation_cache = {}
+    # Begränsade cacher (LRU + TTL + minnesbudget), statistik på /internal/caches.
+    # Schemacachen delas mellan repliker via CACHE_BACKEND.
+    _schema_cache = tiered_cache("enhanced.schemas", TTLCache(
+        maxsize=500,
+        ttl=3600,
+        max_bytes=_settings.cache_memory_budget_mb * 1024 * 1024 // 16
+    ))
+    _validation_cache = cache_registry.register("enhanced.validation", TTLCache(
+        maxsize=10000,
+        ttl=300,
+        max_bytes=_settings.cache_memory_budget_mb * 1024 * 1024 // 2
+    ))
     
     @staticmethod
     @lru_cache(maxsize=500)
@@ -134,7 +152,7 @@ class EnhancedFormBuilderService:
         # Konvertera fields till dict format
         fields_dict = [field.model_dump() for field in form_data.fields]
         fields_json = json.dumps(fields_dict, sort_keys=True)
-        fields_hash = str(hash(fields_json))
+        fields_hash = hashlib.sha256(fields_json.encode("utf-8")).hexdigest()
         
         # Generera JSON schema med caching
         if enable_caching:
@@ -168,7 +186,7 @@ class EnhancedFormBuilderService:
         
         # Cache schema för framtida användning
         if enable_caching:
-            EnhancedFormBuilderService._schema_cache[form_template.id] = schema
+            EnhancedFormBuilderService._schema_cache.set(form_template.id, schema)
         
         return form_template
     
@@ -203,11 +221,11 @@ class EnhancedFormBuilderService:
         if include_stats:
             template_ids = [t.id for t in templates]
             submission_counts = db.query(
-                FlexibleFormSubmission.template_id,
-                func.count(FlexibleFormSubmission.id).label('count')
+                FormSubmission.template_id,
+                func.count(FormSubmission.id).label('count')
             ).filter(
-                FlexibleFormSubmission.template_id.in_(template_ids)
-            ).group_by(FlexibleFormSubmission.template_id).all()
+                FormSubmission.template_id.in_(template_ids)
+            ).group_by(FormSubmission.template_id).all()
             
             count_dict = {sc.template_id: sc.count for sc in submission_counts}
             
@@ -225,67 +243,44 @@ class EnhancedFormBuilderService:
         """
         Asynkron validation med caching
         """
-        cache_key = f"{template.id}:{hash(json.dumps(data, sort_keys=True))}"
+        # Nyckeln innehåller schemats hash så att en ändrad template inte ger gamla resultat
+        cache_key = (template.id, schema_fingerprint(template.schema), schema_fingerprint(data))
         
-        if use_cache and cache_key in EnhancedFormBuilderService._validation_cache:
-            cached_result = EnhancedFormBuilderService._validation_cache[cache_key]
-            if cached_result['expires'] > datetime.utcnow():
-                return cached_result['result']
+        if use_cache:
+            cached_result = EnhancedFormBuilderService._validation_cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
         
-        try:
-            # Kör validation i thread pool för att inte blockera
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                validate,
-                data,
-                template.schema
-            )
-            
-            validation_result = (True, None)
-            
-        except ValidationError as e:
-            errors = []
-            
-            def extract_errors(error, path=""):
-                current_path = f"{path}.{error.path[0]}" if error.path else path
-                current_path = current_path.lstrip(".")
-                
-                if error.context:
-                    for sub_error in error.context:
-                        extract_errors(sub_error, current_path)
-                else:
-                    error_msg = f"{current_path}: {error.message}" if current_path else error.message
-                    errors.append(error_msg)
-            
-            extract_errors(e)
-            validation_result = (False, errors)
-            
-        except Exception as e:
-            validation_result = (False, [f"Schema validation error: {str(e)}"])
+        # Kör validation i valideringspoolen för att inte blockera event loop
+        validation_result = await validation_executor.validate_async(
+            template.id, template.schema, data
+        )
         
-        # Cache resultatet i 5 minuter
+        # Cache resultatet i 5 minuter (cachens TTL)
         if use_cache:
-            EnhancedFormBuilderService._validation_cache[cache_key] = {
-                'result': validation_result,
-                'expires': datetime.utcnow() + timedelta(minutes=5)
-            }
+            EnhancedFormBuilderService._validation_cache.set(cache_key, validation_result)
         
         return validation_result
     
     @staticmethod
-    async def create_batch_submissions(
+    def create_batch_submissions(
         db: Session,
         template_id: str,
-        submissions_data: List[Dict[str, Any]],
-        batch_size: int = 50
+        submissions_data: Iterable[Dict[str, Any]],
+        chunk_size: int = 500,
+        ip_address: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Batch creation av submissions för hög prestanda
-        """
-        if len(submissions_data) > batch_size:
-            raise ValueError(f"Batch size cannot exceed {batch_size}")
         
+        Raderna valideras och skrivs i chunks om chunk_size. Varje chunk blir en
+        multi-row INSERT ... RETURNING (id och created_at utan refresh per rad)
+        och committas för sig, så en trasig chunk påverkar inte de andra.
+        Resultatet har en post per inskickad rad, i samma ordning.
+
+        Raises:
+            ValueError: Om templaten saknas eller är inaktiv
+        """
         # Hämta template en gång
         template = db.query(FormTemplate).filter(
             FormTemplate.id == template_id,
@@ -296,131 +291,104 @@ class EnhancedFormBuilderService:
             raise ValueError("Form template not found or inactive")
         
         results = []
-        successful_submissions = []
-        
-        try:
-            # Validera alla submissions först
-            validation_tasks = []
-            for i, submission_data in enumerate(submissions_data):
-                task = EnhancedFormBuilderService.validate_submission_data_async(
-                    template, 
-                    submission_data.get("data", {}),
-                    use_cache=True
-                )
-                validation_tasks.append((i, task))
-            
-            # Kör alla validations parallellt
-            validation_results = []
-            for i, task in validation_tasks:
-                is_valid, errors = await task
-                validation_results.append((i, is_valid, errors))
-            
-            # Skapa submissions för valid data
-            for i, is_valid, errors in validation_results:
-                if not is_valid:
-                    results.append({
-                        "index": i,
-                        "status": "error",
-                        "errors": errors
-                    })
-                    continue
-                
-                submission_data = submissions_data[i]
-                
-                # Skapa submission
-                submission = FlexibleFormSubmission(
-                    template_id=template_id,
-                    data=submission_data.get("data", {}),
-                    submitted_by=submission_data.get("submitted_by"),
-                    submitted_from_project=submission_data.get("submitted_from_project"),
-                    submitted_from_ip=submission_data.get("ip_address"),
-                    user_agent=submission_data.get("user_agent")
+        chunk = []
+        for index, submission_data in enumerate(submissions_data):
+            chunk.append((index, submission_data))
+            if len(chunk) >= chunk_size:
+                results.extend(
+                    EnhancedFormBuilderService._insert_submission_chunk(
+                        db, template, chunk, ip_address
+                    )
                 )
-                
-                db.add(submission)
-                successful_submissions.append((i, submission))
-            
-            # Commit alla på en gång
-            db.commit()
-            
-            # Refresh alla submissions
-            for i, submission in successful_submissions:
-                db.refresh(submission)
-                results.append({
-                    "index": i,
-                    "status": "success",
-                    "submission_id": submission.id,
-                    "submitted_at": submission.created_at.isoformat()
-                })
-            
-            return results
-            
-        except Exception as e:
-            db.rollback()
-            raise ValueError(f"Batch submission failed: {str(e)}")
+                chunk = []
+        if chunk:
+            results.extend(
+                EnhancedFormBuilderService._insert_submission_chunk(db, template, chunk, ip_address)
+            )
+
+        return results
+
+    @staticmethod
+    def _insert_submission_chunk(
+        db: Session,
+        template: FormTemplate,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        ip_address: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Validera och skriv en chunk; returnerar status per rad i chunkens ordning"""
+        results = {}
+        rows = []
+        row_indexes = []
+
+        # Validera hela chunken parallellt i valideringspoolen
+        chunk_data = [submission_data.get("data") or {} for _, submission_data in chunk]
+        validation_results = validation_executor.validate_many(
+            template.id, template.schema, chunk_data
+        )
+
+        validated = zip(chunk, chunk_data, validation_results)
+        for (index, submission_data), data, (is_valid, errors) in validated:
+            if not is_valid:
+                results[index] = {"index": index, "status": "invalid", "errors": errors}
+                continue
+            rows.append({
+                "template_id": template.id,
+                "data": data,
+                "submitted_from": submission_data.get("submitted_from"),
+                "ip_address": ip_address
+            })
+            row_indexes.append(index)
+
+        if rows:
+            statement = insert(FormSubmission).returning(
+                FormSubmission.id,
+                FormSubmission.created_at,
+                sort_by_parameter_order=True
+            )
+            try:
+                returned = db.execute(statement, rows).all()
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Batch insert of {len(rows)} submissions failed: {e}")
+                for index in row_indexes:
+                    results[index] = {
+                        "index": index, "status": "failed", "errors": ["Could not store submission"]
+                    }
+            else:
+                for index, row in zip(row_indexes, returned):
+                    results[index] = {
+                        "index": index,
+                        "status": "created",
+                        "submission_id": row.id,
+                        "created_at": row.created_at
+                    }
+
+        return [results[index] for index, _ in chunk]
     
     @staticmethod
     def get_analytics_data(
         db: Session,
         project_id: Optional[str] = None,
         template_id: Optional[str] = None,
-        days: int = 30
+        days: int = 30,
+        include_processing_times: bool = False
     ) -> Dict[str, Any]:
         """
         Hämta analytics data för dashboard
+
+        Läser dagliga rollups för komprimerade dagar och räknar bara dagens
+        inlämningar live, i en enda aggregatfråga (se services/analytics.py).
+        Med include_processing_times läggs genomsnitt och percentiler för
+        tid till behandling till.
         """
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Base query
-        submission_query = db.query(FlexibleFormSubmission).join(FormTemplate)
-        
-        # Filter by project or template
-        if template_id:
-            submission_query = submission_query.filter(FormTemplate.id == template_id)
-        elif project_id:
-            submission_query = submission_query.filter(FormTemplate.project_id == project_id)
-        
-        # Date filter
-        submission_query = submission_query.filter(
-            FlexibleFormSubmission.created_at >= start_date
+        return get_submission_analytics(
+            db,
+            project_id=project_id,
+            template_id=template_id,
+            days=days,
+            processing_times=include_processing_times
         )
-        
-        # Calculate metrics
-        total_submissions = submission_query.count()
-        
-        processed_submissions = submission_query.filter(
-            FlexibleFormSubmission.is_processed == True
-        ).count()
-        
-        # Daily submissions
-        daily_stats = db.query(
-            func.date(FlexibleFormSubmission.created_at).label('date'),
-            func.count(FlexibleFormSubmission.id).label('count')
-        ).join(FormTemplate).filter(
-            FlexibleFormSubmission.created_at >= start_date
-        )
-        
-        if template_id:
-            daily_stats = daily_stats.filter(FormTemplate.id == template_id)
-        elif project_id:
-            daily_stats = daily_stats.filter(FormTemplate.project_id == project_id)
-        
-        daily_stats = daily_stats.group_by(
-            func.date(FlexibleFormSubmission.created_at)
-        ).order_by('date').all()
-        
-        return {
-            "period_days": days,
-            "total_submissions": total_submissions,
-            "processed_submissions": processed_submissions,
-            "completion_rate": (processed_submissions / total_submissions * 100) if total_submissions > 0 else 0,
-            "avg_submissions_per_day": total_submissions / days if days > 0 else 0,
-            "daily_submissions": [
-                {"date": stat.date.isoformat(), "count": stat.count}
-                for stat in daily_stats
-            ]
-        }
     
     @staticmethod
     def clear_caches():
@@ -0,0 +1,273 @@
+"""
+Shared, pooled HTTP clients for outbound calls.
+
+Creating an `httpx.AsyncClient` per call means a new TCP and TLS handshake
+for every request to the same upstream. Instead, each upstream gets a named
+long-lived client from `http_clients`, whose connection pool keeps
+connections alive between calls. The app lifespan closes the clients on
+shutdown.
+
+Every client's transport caps concurrent connections per host and counts
+new connections, TLS handshakes and reused connections (from httpcore's
+trace events); the counters are served at /internal/http-clients.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from src.forms_api.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ConnectionStats:
+    """Counters for one named client, kept across client re-creation"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.reused_connections = 0
+        self.errors = 0
+        self.in_flight: Dict[str, int] = {}
+        self.waiting: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": (
+                round(self.reused_connections / self.requests, 4) if self.requests else None
+            ),
+            "errors": self.errors,
+            "in_flight": {host: count for host, count in self.in_flight.items() if count},
+            "waiting_for_connection": {
+                host: count for host, count in self.waiting.items() if count
+            },
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees the host slot once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """
+    HTTP transport with a per-host connection cap and reuse metrics.
+
+    A request holds its host's slot from sending until the response body is
+    closed, so at most `max_connections_per_host` connections to one host
+    are busy at a time; further requests wait for a slot, at most the
+    request's pool timeout, then fail with `httpx.PoolTimeout`.
+    """
+
+    def __init__(self, stats: ConnectionStats, max_connections_per_host: int = 20, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.max_connections_per_host = max(1, max_connections_per_host)
+        self._host_slots: Dict[Tuple[str, str, Optional[int]], asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = (request.url.scheme, request.url.host, request.url.port)
+        host_name = f"{request.url.host}:{request.url.port or ''}".rstrip(":")
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        stats = self.stats
+        stats.waiting[host_name] = stats.waiting.get(host_name, 0) + 1
+        try:
+            # Waiting for a host slot counts against the pool timeout, as waiting for a
+            # connection does
+            pool_timeout = request.extensions.get("timeout", {}).get("pool")
+            await asyncio.wait_for(slots.acquire(), pool_timeout)
+        except asyncio.TimeoutError:
+            stats.errors += 1
+            raise httpx.PoolTimeout(
+                f"Timed out waiting for a connection slot to {host_name}", request=request
+            )
+        finally:
+            stats.waiting[host_name] -= 1
+        stats.in_flight[host_name] = stats.in_flight.get(host_name, 0) + 1
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                stats.in_flight[host_name] -= 1
+                slots.release()
+
+        new_connection = False
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            nonlocal new_connection
+            if event_name == "connection.connect_tcp.complete":
+                new_connection = True
+                stats.new_connections += 1
+            elif event_name == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            stats.errors += 1
+            release()
+            raise
+
+        stats.requests += 1
+        if not new_connection:
+            stats.reused_connections += 1
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+
+class HTTPClientRegistry:
+    """
+    Named, long-lived `httpx.AsyncClient`s sharing pool settings.
+
+    Clients are created on first use in the running event loop. A client's
+    pool is bound to its loop, so a call from a different loop (e.g. in
+    tests) gets a fresh client.
+    """
+
+    def __init__(self, settings_factory: Callable[[], Any] = get_settings):
+        self._settings_factory = settings_factory
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._transport_options: Dict[str, Dict[str, Any]] = {}
+        self._clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._stats: Dict[str, ConnectionStats] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        http2: Optional[bool] = None,
+        max_connections_per_host: Optional[int] = None,
+        **client_options: Any
+    ) -> None:
+        """
+        Declare a named client.
+
+        Args:
+            name: Client name, one per upstream
+            http2: Override HTTP_CLIENT_HTTP2 for this client
+            max_connections_per_host: Override HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST for this client
+            client_options: Extra `httpx.AsyncClient` arguments, e.g. timeout or base_url
+        """
+        with self._lock:
+            self._options[name] = client_options
+            self._transport_options[name] = {
+                "http2": http2,
+                "max_connections_per_host": max_connections_per_host,
+            }
+            self._stats.setdefault(name, ConnectionStats())
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        settings = self._settings_factory()
+        overrides = self._transport_options.get(name, {})
+        http2 = settings.http_client_http2 if overrides.get("http2") is None else overrides["http2"]
+        if http2 and not http2_available():
+            logger.warning(
+                "HTTP_CLIENT_HTTP2 is set but the h2 package is not installed; using HTTP/1.1"
+            )
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.http_client_max_connections,
+            max_keepalive_connections=settings.http_client_max_keepalive_connections,
+            keepalive_expiry=settings.http_client_keepalive_expiry_seconds
+        )
+        transport = PooledTransport(
+            self._stats.setdefault(name, ConnectionStats()),
+            max_connections_per_host=(
+                overrides.get("max_connections_per_host")
+                or settings.http_client_max_connections_per_host
+            ),
+            limits=limits,
+            http2=http2
+        )
+        options = {"timeout": settings.http_client_timeout_seconds, **self._options.get(name, {})}
+        return httpx.AsyncClient(transport=transport, **options)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for an upstream; call from within the event loop.
+
+        Do not close the returned client or use it as a context manager.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(name)
+            if entry is None or entry[0] is not loop or entry[1].is_closed:
+                client = self._create(name)
+                self._clients[name] = (loop, client)
+                return client
+            return entry[1]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection counters for every named client"""
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in sorted(self._stats.items())}
+
+    async def aclose(self) -> None:
+        """Close the clients created in the current event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [
+                client for client_loop, client in self._clients.values() if client_loop is loop
+            ]
+            self._clients = {
+                name: entry for name, entry in self._clients.items() if entry[0] is not loop
+            }
+        for client in clients:
+            await client.aclose()
+
+
+# Global registry instance
+http_clients = HTTPClientRegistry()
+
+# Husqvarna Group ESB: customer validation, case creation and the validation proxies
+http_clients.register("esb", timeout=30.0)
+
+# Webhook subscribers: fan-out of form events, one pool shared by all receivers
+_settings = get_settings()
+http_clients.register(
+    "webhooks",
+    http2=_settings.webhook_http2,
+    max_connections_per_host=_settings.webhook_max_connections_per_host,
+    timeout=_settings.webhook_timeout_seconds
+)
@@ -0,0 +1,426 @@
+"""
+Write-behind ingestion of form submissions.
+
+In journal mode a submission is acknowledged as soon as it has been appended
+to a local append-only journal. A background thread drains the journal into
+`form_submissions` with batched multi-row INSERTs, and any segments left
+behind by a crash are replayed on startup.
+
+Each worker process journals into its own `worker-N` directory under the
+configured journal directory, taking the first one no other process holds
+(an exclusive lock file guards each). On startup a worker also replays the
+directories of workers that are gone, e.g. after scaling down.
+"""
+import fcntl
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from src.forms_api.config import get_settings
+from src.forms_api.db import SessionLocal
+from src.forms_api.models import FormSubmission, FormTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class JournalLocked(RuntimeError):
+    """Raised when another process owns a journal directory"""
+
+
+class SubmissionJournal:
+    """
+    Segmented append-only journal of accepted submissions.
+
+    Records are appended to the active segment. Rotating seals the active
+    segment so it can be flushed and deleted while new records go to a
+    fresh one.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".jsonl"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self._active_path: Optional[Path] = None
+        self._active_file = None
+        self._active_records = 0
+        self._sequence = 0
+        self._lock_file = None
+
+    def open(self) -> None:
+        """Create the journal directory, take the lock and open a new active segment."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock_file = open(self.directory / self.LOCK_FILE, "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise JournalLocked(f"Submission journal {self.directory} is locked by another process")
+
+        existing = self._segment_paths()
+        self._sequence = self._segment_sequence(existing[-1]) + 1 if existing else 1
+        self._open_active()
+
+    def close(self) -> None:
+        """Close the active segment and release the lock."""
+        if self._active_file:
+            self._active_file.close()
+            self._active_file = None
+            if self._active_records == 0 and self._active_path:
+                self._active_path.unlink(missing_ok=True)
+        if self._lock_file:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Durably append a record to the active segment."""
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        self._active_file.write(line + "\n")
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+        self._active_records += 1
+
+    def rotate(self) -> None:
+        """Seal the active segment and start a new one."""
+        if self._active_records == 0:
+            return
+        self._active_file.close()
+        self._sequence += 1
+        self._open_active()
+
+    def sealed_segments(self) -> List[Path]:
+        """Return all segments except the active one, oldest first."""
+        return [p for p in self._segment_paths() if p != self._active_path]
+
+    @staticmethod
+    def read_segment(path: Path) -> List[Dict[str, Any]]:
+        """
+        Read all complete records from a segment.
+
+        A torn last line (crash in the middle of a write) is skipped; that
+        submission was never acknowledged.
+        """
+        records = []
+        with open(path, "r", encoding="utf-8") as segment:
+            for line_number, line in enumerate(segment, start=1):
+                if not line.endswith("\n"):
+                    logger.warning(f"Skipping torn record at {path}:{line_number}")
+                    continue
+                records.append(json.loads(line))
+        return records
+
+    @staticmethod
+    def remove(path: Path) -> None:
+        """Delete a flushed segment."""
+        path.unlink(missing_ok=True)
+
+    def _open_active(self) -> None:
+        name = f"{self.SEGMENT_PREFIX}{self._sequence:012d}{self.SEGMENT_SUFFIX}"
+        self._active_path = self.directory / name
+        self._active_file = open(self._active_path, "a", encoding="utf-8")
+        self._active_records = 0
+
+    def _segment_paths(self) -> List[Path]:
+        return sorted(self.directory.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"))
+
+    def _segment_sequence(self, path: Path) -> int:
+        return int(path.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)])
+
+
+class SubmissionIngestor:
+    """
+    Accepts submissions into the journal and flushes them to the database in batches.
+
+    A flush is triggered when `batch_size` submissions are pending or when
+    `flush_interval` seconds have passed, whichever comes first.
+
+    `journal_dir` is shared by all workers; each ingestor journals into its
+    own `worker-N` subdirectory.
+    """
+
+    WORKER_PREFIX = "worker-"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        journal_dir: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        fsync: bool = True
+    ):
+        self.session_factory = session_factory
+        self.journal_dir = Path(journal_dir)
+        self.fsync = fsync
+        self.journal: Optional[SubmissionJournal] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = 0
+        self._fresh_segments: Set[Path] = set()
+        self._known_templates: Set[str] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def open_journal(self) -> SubmissionJournal:
+        """Open the first worker directory under `journal_dir` that no other process holds."""
+        for slot in itertools.count():
+            directory = self.journal_dir / f"{self.WORKER_PREFIX}{slot}"
+            journal = SubmissionJournal(str(directory), fsync=self.fsync)
+            try:
+                journal.open()
+            except JournalLocked:
+                continue
+            self.journal = journal
+            return journal
+
+    def start(self) -> None:
+        """Open a journal, replay leftover segments and start the flush thread."""
+        self.open_journal()
+        replayed = self.flush() + self._replay_orphans()
+        if replayed:
+            logger.info(f"Replayed {replayed} journaled submissions on startup")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="submission-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread, flush what is pending and close the journal."""
+        if not self.running:
+            return
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        self.journal.close()
+
+    def _replay_orphans(self) -> int:
+        """
+        Flush the journals of workers that are no longer running, and any
+        segments left directly in `journal_dir` by the single-directory layout.
+        """
+        directories = [self.journal_dir] + sorted(
+            path for path in self.journal_dir.glob(f"{self.WORKER_PREFIX}*")
+            if path.is_dir() and path != self.journal.directory
+        )
+        replayed = 0
+        for directory in directories:
+            orphan = SubmissionJournal(str(directory), fsync=False)
+            try:
+                orphan.open()
+            except JournalLocked:
+                continue  # A live worker's journal
+            try:
+                for segment in orphan.sealed_segments():
+                    replayed += self._write_segment(segment, dedupe=True)
+                    orphan.remove(segment)
+            except Exception as e:
+                # Left in place for the next startup
+                logger.error(f"Failed to replay submission journal {directory}: {e}")
+            finally:
+                orphan.close()
+        return replayed
+
+    def enqueue(
+        self,
+        db: Optional[Session],
+        template_id: str,
+        data: Dict[str, Any],
+        submitted_from: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> FormSubmission:
+        """
+        Durably queue a submission.
+
+        Args:
+            db: Session used to verify that the template exists, or None if
+                the caller has already verified it
+            template_id: ID of the template the submission belongs to
+            data: Form data
+            submitted_from: App/site that submitted the form
+            ip_address: Client IP address
+
+        Returns:
+            A transient FormSubmission carrying the assigned id and timestamp
+
+        Raises:
+            ValueError: If the template does not exist
+        """
+        if db is not None:
+            self._ensure_template_exists(db, template_id)
+
+        submission = FormSubmission(
+            id=str(uuid.uuid4()),
+            template_id=template_id,
+            data=data,
+            submitted_from=submitted_from,
+            ip_address=ip_address,
+            created_at=datetime.now(timezone.utc)
+        )
+        record = {
+            "id": submission.id,
+            "template_id": submission.template_id,
+            "data": submission.data,
+            "submitted_from": submission.submitted_from,
+            "ip_address": submission.ip_address,
+            "created_at": submission.created_at.isoformat(),
+        }
+
+        with self._cond:
+            self.journal.append(record)
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._cond.notify()
+
+        return submission
+
+    def flush(self) -> int:
+        """
+        Seal the active segment and write all sealed segments to the database.
+
+        Returns:
+            Number of submissions inserted
+        """
+        with self._flush_lock:
+            with self._cond:
+                if self._pending:
+                    self.journal.rotate()
+                    self._fresh_segments.add(self.journal.sealed_segments()[-1])
+                    self._pending = 0
+
+            inserted = 0
+            for segment in self.journal.sealed_segments():
+                # Segments from earlier runs or failed attempts may be partly committed
+                dedupe = segment not in self._fresh_segments
+                self._fresh_segments.discard(segment)
+                try:
+                    inserted += self._write_segment(segment, dedupe)
+                except Exception as e:
+                    logger.error(f"Failed to flush submission journal segment {segment.name}: {e}")
+                    break
+                self.journal.remove(segment)
+            return inserted
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if self._pending < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            self.flush()
+        self.flush()
+
+    def _ensure_template_exists(self, db: Session, template_id: str) -> None:
+        if template_id in self._known_templates:
+            return
+        exists = db.query(FormTemplate.id).filter(FormTemplate.id == template_id).first()
+        if not exists:
+            raise ValueError(f"Template {template_id} not found")
+        self._known_templates.add(template_id)
+
+    def _write_segment(self, segment: Path, dedupe: bool) -> int:
+        records = self.journal.read_segment(segment)
+        inserted = 0
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start:start + self.batch_size]
+            inserted += self._insert_chunk(chunk, dedupe, segment)
+        return inserted
+
+    def _insert_chunk(self, records: List[Dict[str, Any]], dedupe: bool, segment: Path) -> int:
+        rows = [self._record_to_row(record) for record in records]
+
+        with self.session_factory() as db:
+            if dedupe:
+                ids = [row["id"] for row in rows]
+                existing = {
+                    row_id for (row_id,) in
+                    db.query(FormSubmission.id).filter(FormSubmission.id.in_(ids)).all()
+                }
+                rows = [row for row in rows if row["id"] not in existing]
+            if not rows:
+                return 0
+
+            try:
+                db.execute(insert(FormSubmission.__table__), rows)
+                db.commit()
+                return len(rows)
+            except Exception as e:
+                db.rollback()
+                if not self._is_row_error(e):
+                    # Database unavailable: keep the segment, it is retried with dedupe
+                    # on the next flush
+                    raise
+                logger.warning(f"Batch insert from {segment.name} failed, retrying row by row: {e}")
+
+            inserted = 0
+            for row in rows:
+                try:
+                    db.execute(insert(FormSubmission.__table__), [row])
+                    db.commit()
+                    inserted += 1
+                except Exception as e:
+                    db.rollback()
+                    if not self._is_row_error(e):
+                        raise
+                    self._reject(row, str(e))
+            return inserted
+
+    @staticmethod
+    def _is_row_error(error: BaseException) -> bool:
+        """Whether the database refused the rows themselves, as opposed to being unreachable"""
+        return isinstance(error, (IntegrityError, DataError)) and not error.connection_invalidated
+
+    def _reject(self, row: Dict[str, Any], error: str) -> None:
+        """Park a submission the database refuses so it does not block the journal."""
+        logger.error(f"Rejected journaled submission {row['id']}: {error}")
+        rejected_path = self.journal.directory / "rejected.jsonl"
+        with open(rejected_path, "a", encoding="utf-8") as rejected:
+            rejected.write(json.dumps({"row": row, "error": error}, default=str) + "\n")
+
+    @staticmethod
+    def _record_to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": record["id"],
+            "template_id": record["template_id"],
+            "data": record["data"],
+            "submitted_from": record.get("submitted_from"),
+            "ip_address": record.get("ip_address"),
+            "created_at": datetime.fromisoformat(record["created_at"]),
+        }
+
+
+def _create_ingestor() -> SubmissionIngestor:
+    settings = get_settings()
+    return SubmissionIngestor(
+        session_factory=SessionLocal,
+        journal_dir=settings.submission_journal_dir,
+        batch_size=settings.submission_flush_batch_size,
+        flush_interval=settings.submission_flush_interval_ms / 1000,
+        fsync=settings.submission_journal_fsync
+    )
+
+
+# Global ingestor instance, started by the app lifespan in journal mode
+submission_ingestor = _create_ingestor()
@@ -0,0 +1,217 @@
+"""
+Read-through cache for form template responses.
+
+Templates change rarely but are fetched by every form on page load. The
+serialized `FormTemplateResponse` bodies for single templates and template
+lists are cached together with a strong ETag, so repeat requests skip the
+database and JSON encoding, and clients or CDNs holding the ETag get a 304.
+
+Writes invalidate the cache when they commit. Without a shared cache
+backend (CACHE_BACKEND) each worker caches on its own and other workers
+converge within the TTL; with one, invalidations reach every worker.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.forms_api.config import get_settings
+from src.forms_api.models import FormTemplate
+from src.forms_api.services.cache_backend import TieredCache
+from src.forms_api.utils.cache import TTLCache, cache_registry
+from src.forms_api.utils.serialization import (
+    dumps, json_bytes_response, template_to_dict, templates_to_json
+)
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """A serialized JSON response body and its strong ETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CachedBody":
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(body=body, etag=f'"{digest}"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, RFC 7232).
+
+    Args:
+        if_none_match: Raw header value, may list several tags or be `*`
+        etag: The current strong ETag
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class TemplateCache:
+    """
+    TTL/LRU cache of serialized template responses.
+
+    Loads capture `generation` before reading the database and pass it to
+    `store_*`; if a template was invalidated in between, the stale result is
+    returned to the caller but not cached.
+
+    Entries live in a TieredCache, so with a shared cache backend configured
+    a cold replica is served bodies cached by the others, and an update on
+    one replica invalidates all of them.
+    """
+
+    def __init__(
+        self, maxsize: int = 512, ttl: float = 30.0, max_age: int = 60,
+        max_bytes: Optional[int] = None
+    ):
+        self._entries = TieredCache(
+            "templates",
+            TTLCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes),
+            encode=lambda cached: cached.body,
+            decode=CachedBody.from_body
+        )
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.max_age = max_age
+
+    @property
+    def entries(self) -> TieredCache:
+        """The underlying two-tier cache"""
+        return self._entries
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation"""
+        return self._generation
+
+    def get_template(self, template_id: str) -> Optional[CachedBody]:
+        """Get the cached body for a single template"""
+        return self._entries.get(f"template:{template_id}")
+
+    def get_list(self, project_id: Optional[str]) -> Optional[CachedBody]:
+        """Get the cached body for a template listing"""
+        return self._entries.get(f"list:{project_id or ''}")
+
+    async def aget_template(self, template_id: str) -> Optional[CachedBody]:
+        """`get_template` for coroutines, without blocking on the shared tier"""
+        return await self._entries.aget(f"template:{template_id}")
+
+    async def aget_list(self, project_id: Optional[str]) -> Optional[CachedBody]:
+        """`get_list` for coroutines, without blocking on the shared tier"""
+        return await self._entries.aget(f"list:{project_id or ''}")
+
+    def store_template(self, template: FormTemplate, generation: int) -> CachedBody:
+        """Serialize a template and cache it unless it was invalidated since `generation`"""
+        cached = CachedBody.from_body(dumps(template_to_dict(template)))
+        self._store(f"template:{template.id}", cached, generation)
+        return cached
+
+    def store_list(
+        self, project_id: Optional[str], templates: Iterable[FormTemplate], generation: int
+    ) -> CachedBody:
+        """Serialize a template listing and cache it unless invalidated since `generation`"""
+        cached = CachedBody.from_body(templates_to_json(templates))
+        self._store(f"list:{project_id or ''}", cached, generation)
+        return cached
+
+    async def astore_template(self, template: FormTemplate, generation: int) -> CachedBody:
+        """`store_template` for coroutines"""
+        cached = CachedBody.from_body(dumps(template_to_dict(template)))
+        await self._astore(f"template:{template.id}", cached, generation)
+        return cached
+
+    async def astore_list(
+        self, project_id: Optional[str], templates: Iterable[FormTemplate], generation: int
+    ) -> CachedBody:
+        """`store_list` for coroutines"""
+        cached = CachedBody.from_body(templates_to_json(templates))
+        await self._astore(f"list:{project_id or ''}", cached, generation)
+        return cached
+
+    def _store(self, key: str, cached: CachedBody, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._entries.set(key, cached)
+
+    async def _astore(self, key: str, cached: CachedBody, generation: int) -> None:
+        # The lock cannot be held across the L2 write, so check again after it
+        if generation != self._generation:
+            return
+        await self._entries.aset(key, cached)
+        with self._lock:
+            if generation != self._generation:
+                self._entries.delete(key)
+
+    def invalidate(self, template_id: Optional[str] = None) -> None:
+        """
+        Drop cached templates and listings.
+
+        Everything is dropped, not just `template_id`: any template change can
+        alter every listing, and listings cached by other replicas are not
+        known here.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def clear(self) -> None:
+        """Drop all entries - useful for testing."""
+        self.invalidate()
+
+    def response(self, request: Request, cached: CachedBody) -> Response:
+        """
+        Build a JSON response for a cached body, or a 304 if the client's ETag matches.
+        """
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return json_bytes_response(cached.body, headers=headers)
+
+
+# Global cache instance
+_settings = get_settings()
+template_cache = TemplateCache(
+    maxsize=_settings.template_cache_size,
+    ttl=_settings.template_cache_ttl_seconds,
+    max_age=_settings.template_cache_max_age_seconds,
+    max_bytes=_settings.cache_memory_budget_mb * 1024 * 1024 // 4  # A quarter of the cache budget
+)
+cache_registry.register("templates", template_cache.entries)
+
+_PENDING_KEY = "template_cache_pending"
+
+
+@event.listens_for(FormTemplate, "after_insert")
+@event.listens_for(FormTemplate, "after_update")
+@event.listens_for(FormTemplate, "after_delete")
+def _invalidate_changed_template(mapper, connection, target) -> None:
+    """Invalidate on flush, and remember the id so it is invalidated again on commit."""
+    template_cache.invalidate(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_templates(session) -> None:
+    """Readers between flush and commit may have cached the old row; drop it again."""
+    for template_id in session.info.pop(_PENDING_KEY, ()):
+        template_cache.invalidate(template_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_templates(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,183 @@
+"""
+Concurrent validation of submission data.
+
+JSON schema validation is pure Python, so validating a large batch on the
+request thread (or in the default thread executor) is serialised by the
+GIL. `ValidationExecutor` spreads a batch over a pool of workers in chunks:
+
+- `inline`: validate on the calling thread (no pool).
+- `thread`: a thread pool; overlaps with I/O but shares the GIL.
+- `process`: a process pool; validation runs in parallel on all cores.
+  Workers compile validators into their own `validator_registry`.
+
+The number of chunks in flight is bounded process-wide. Callers submitting
+more than that block until a worker frees a slot, so a burst of batches
+queues up instead of piling unbounded work and memory onto the pool.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jsonschema import ValidationError
+
+from src.forms_api.config import get_settings
+from src.forms_api.services.validator_cache import format_validation_errors, validator_registry
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+ValidationResult = Tuple[bool, Optional[List[str]]]
+
+
+def validate_one(template_id: str, schema: Dict[str, Any], data: Any) -> ValidationResult:
+    """
+    Validate one submission against a template schema.
+
+    Returns:
+        (True, None) if valid, otherwise (False, list of error messages)
+    """
+    try:
+        validator_registry.validate(template_id, schema, data)
+        return True, None
+    except ValidationError as e:
+        return False, format_validation_errors(e)
+    except Exception as e:
+        return False, [f"Schema validation error: {str(e)}"]
+
+
+def validate_chunk(
+    template_id: str, schema: Dict[str, Any], chunk: List[Any]
+) -> List[ValidationResult]:
+    """Validate a chunk of submissions; module level so process workers can unpickle it"""
+    return [validate_one(template_id, schema, data) for data in chunk]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ValidationExecutor:
+    """
+    Bounded pool for validating submission batches concurrently.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 32,
+        chunk_size: int = 50
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(
+                f"Validation executor must be one of {', '.join(EXECUTOR_KINDS)}, got {kind!r}"
+            )
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.chunk_size = max(1, chunk_size)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # spawn: forking a process that runs background threads is unsafe
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="validation"
+                    )
+            return self._pool
+
+    def _submit(self, template_id: str, schema: Dict[str, Any], chunk: List[Any]) -> Future:
+        """Submit a chunk once a slot is free; the slot is released when the chunk is done"""
+        self._slots.acquire()
+        try:
+            future = self._get_pool().submit(validate_chunk, template_id, schema, chunk)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def validate_many(
+        self, template_id: str, schema: Dict[str, Any], items: Iterable[Any]
+    ) -> List[ValidationResult]:
+        """
+        Validate submissions concurrently, returning results in input order.
+
+        Blocks while the executor is at `max_pending` chunks in flight.
+
+        Args:
+            template_id: ID of the template owning the schema
+            schema: The template's JSON schema
+            items: Submission data dicts
+        """
+        if self.kind == "inline":
+            return validate_chunk(template_id, schema, list(items))
+
+        results: List[ValidationResult] = []
+        in_flight: "deque[Future]" = deque()
+        for chunk in _chunks(items, self.chunk_size):
+            # Collect finished chunks in order as we go so results do not pile up
+            while in_flight and in_flight[0].done():
+                results.extend(in_flight.popleft().result())
+            in_flight.append(self._submit(template_id, schema, chunk))
+        while in_flight:
+            results.extend(in_flight.popleft().result())
+        return results
+
+    async def validate_async(
+        self, template_id: str, schema: Dict[str, Any], data: Any
+    ) -> ValidationResult:
+        """Validate one submission without blocking the event loop"""
+        if self.kind == "inline":
+            return validate_one(template_id, schema, data)
+        future = await asyncio.to_thread(self._submit, template_id, schema, [data])
+        return (await asyncio.wrap_future(future))[0]
+
+    def warm_up(self) -> None:
+        """Start all workers now rather than on the first batch"""
+        if self.kind == "inline":
+            return
+        warm_up = min(self.max_workers, self.max_pending)
+        futures = [self._submit("warm-up", {}, [{}]) for _ in range(warm_up)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool; it is recreated on next use"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Global executor instance
+_settings = get_settings()
+validation_executor = ValidationExecutor(
+    kind=_settings.validation_executor,
+    max_workers=_settings.validation_workers,
+    max_pending=_settings.validation_max_pending,
+    chunk_size=_settings.validation_chunk_size
+)
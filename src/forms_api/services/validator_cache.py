@@ -0,0 +1,181 @@
+"""
+Process-wide registry of compiled JSON schema validators.
+
+`jsonschema.validate` checks the schema against its meta-schema and builds a
+new validator object on every call. The registry does that work once per
+template schema version and reuses the compiled validator for every
+submission against it.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from sqlalchemy import event
+
+from src.forms_api.config import get_settings
+from src.forms_api.models import FormTemplate
+from src.forms_api.utils.cache import cache_registry
+
+logger = logging.getLogger(__name__)
+
+
+def schema_fingerprint(schema: Dict[str, Any]) -> str:
+    """
+    Compute a stable content hash for a JSON schema.
+
+    Args:
+        schema: The JSON schema
+
+    Returns:
+        Hex encoded SHA-256 of the canonical JSON representation
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def format_validation_errors(error: Any) -> List[str]:
+    """
+    Flatten a jsonschema error into "path: message" strings.
+
+    Errors with sub-errors (anyOf/oneOf) are reported as their leaf errors.
+
+    Args:
+        error: A jsonschema.ValidationError
+
+    Returns:
+        List of human readable error messages
+    """
+    errors = []
+
+    def extract_errors(error, path=""):
+        current_path = f"{path}.{error.path[0]}" if error.path else path
+        current_path = current_path.lstrip(".")
+
+        if error.context:
+            for sub_error in error.context:
+                extract_errors(sub_error, current_path)
+        else:
+            errors.append(f"{current_path}: {error.message}" if current_path else error.message)
+
+    extract_errors(error)
+    return errors
+
+
+class ValidatorRegistry:
+    """
+    LRU registry of compiled validators keyed by template id and schema hash.
+
+    Only the newest schema version of a template is kept; compiling a new
+    version drops the previous one.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._validators: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _compile(schema: Dict[str, Any]) -> Any:
+        """Check the schema against its meta-schema and build a validator."""
+        validator_cls = validator_for(schema)
+        validator_cls.check_schema(schema)
+        return validator_cls(schema)
+
+    def get_validator(self, template_id: str, schema: Dict[str, Any]) -> Any:
+        """
+        Get the compiled validator for a template schema, compiling it on first use.
+
+        Args:
+            template_id: ID of the template owning the schema
+            schema: The template's JSON schema
+
+        Returns:
+            A jsonschema validator instance
+
+        Raises:
+            jsonschema.SchemaError: If the schema itself is invalid
+        """
+        key = (str(template_id), schema_fingerprint(schema))
+
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+                self.hits += 1
+                return validator
+            self.misses += 1
+
+        # Compile outside the lock so a slow schema does not block other templates
+        validator = self._compile(schema)
+
+        with self._lock:
+            for stale_key in [k for k in self._validators if k[0] == key[0] and k != key]:
+                del self._validators[stale_key]
+            self._validators[key] = validator
+            self._validators.move_to_end(key)
+            while len(self._validators) > self.maxsize:
+                self._validators.popitem(last=False)
+                self.evictions += 1
+
+        return validator
+
+    def validate(self, template_id: str, schema: Dict[str, Any], data: Any) -> None:
+        """
+        Validate data against a template schema.
+
+        Behaves like `jsonschema.validate`: the most relevant error is raised.
+
+        Raises:
+            jsonschema.ValidationError: If the data is invalid
+            jsonschema.SchemaError: If the schema itself is invalid
+        """
+        validator = self.get_validator(template_id, schema)
+        error = best_match(validator.iter_errors(data))
+        if error is not None:
+            raise error
+
+    def invalidate(self, template_id: Optional[str]) -> None:
+        """Drop all compiled validators for a template."""
+        if template_id is None:
+            return
+        template_id = str(template_id)
+        with self._lock:
+            for key in [k for k in self._validators if k[0] == template_id]:
+                del self._validators[key]
+
+    def clear(self) -> None:
+        """Drop all compiled validators - useful for testing."""
+        with self._lock:
+            self._validators.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return registry counters."""
+        with self._lock:
+            return {
+                "size": len(self._validators),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Global registry instance
+validator_registry = ValidatorRegistry(maxsize=get_settings().validator_cache_size)
+cache_registry.register("validators", validator_registry)
+
+
+@event.listens_for(FormTemplate, "after_update")
+@event.listens_for(FormTemplate, "after_delete")
+def _invalidate_template_validator(mapper, connection, target) -> None:
+    """Drop compiled validators when a template row changes."""
+    validator_registry.invalidate(target.id)
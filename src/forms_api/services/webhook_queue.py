@@ -0,0 +1,549 @@
+"""
+Durable webhook delivery queue.
+
+Webhook events are stored as one `webhook_deliveries` row per URL, in the
+transaction that produced the event (`enqueue_webhook`), instead of being
+sent from a fire-and-forget task that is lost on restart. `WebhookDispatcher`
+claims due rows in the background and keeps a bounded number of sends in
+flight, claiming more as each one finishes, so webhook fan-out does not
+compete with request handling. A send only takes a slot once its receiver
+admits it, and one receiver holds at most half the slots, so a slow receiver
+does not hold up the others. Failed deliveries are retried with exponential
+backoff and jitter; after
+`max_attempts` a row is marked dead and stays in the table as the
+dead-letter store until it is replayed (`replay_deliveries`).
+
+Claiming works like the ESB case outbox: `next_attempt_at` is moved forward
+by a lease, and on PostgreSQL rows are claimed with FOR UPDATE SKIP LOCKED so
+the dispatchers of all workers can run side by side.
+"""
+import asyncio
+import contextlib
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Union
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from src.forms_api.config import get_settings
+from src.forms_api.db import SessionLocal
+from src.forms_api.models import WebhookDelivery
+from src.forms_api.services.webhook_routing import webhook_router
+from src.forms_api.services.webhook_service import (
+    SubscriberPermit,
+    SubscriberThrottled,
+    WebhookService,
+    WebhookSubscriberLimits,
+    webhook_limits,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+Send = Callable[
+    [str, Union[Dict[str, Any], List[Dict[str, Any]]], Optional[str]],
+    Awaitable[Optional[Dict[str, Any]]]
+]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_webhook(
+    db: Session,
+    event_type: str,
+    form_data: Dict[str, Any],
+    form_id: Optional[str] = None,
+    template_id: Optional[str] = None,
+    project_id: Optional[str] = None
+) -> List[WebhookDelivery]:
+    """
+    Add one delivery per webhook URL routed to the event to the session.
+
+    Nothing is committed: the deliveries are stored by the caller's commit,
+    together with the change they announce.
+
+    Returns:
+        The queued deliveries; empty when webhooks are disabled or no URL matches
+    """
+    settings = get_settings()
+    if not settings.webhooks_enabled:
+        return []
+
+    payload = WebhookService.build_payload(event_type, form_data, form_id, template_id)
+    batching = settings.webhook_batching_config
+    now = _utcnow()
+    deliveries = [
+        WebhookDelivery(
+            event_type=event_type,
+            url=url,
+            payload=payload,
+            status=PENDING,
+            attempts=0,
+            # Batched URLs wait for their window to fill (or for max_events, see
+            # WebhookDispatcher.claim)
+            next_attempt_at=(
+                now + timedelta(seconds=batching[url]["max_wait_seconds"])
+                if url in batching else now
+            )
+        )
+        for url in webhook_router.lookup(event_type, form_id, template_id, project_id)
+    ]
+    db.add_all(deliveries)
+    return deliveries
+
+
+def retry_delay(
+    attempts: int, base_seconds: float, max_seconds: float,
+    rand: Callable[[], float] = random.random
+) -> float:
+    """
+    Backoff before the next attempt, after `attempts` failed ones.
+
+    Half of the exponential delay is fixed and half is random, so retries to
+    a receiver that was down for everyone do not all arrive at once.
+    """
+    ceiling = min(max_seconds, base_seconds * 2 ** max(0, attempts - 1))
+    return ceiling / 2 + rand() * ceiling / 2
+
+
+def list_deliveries(
+    db: Session,
+    status: Optional[str] = None,
+    url: Optional[str] = None,
+    limit: int = 50
+) -> List[WebhookDelivery]:
+    """Deliveries, most recently updated first"""
+    query = select(WebhookDelivery)
+    if status:
+        query = query.where(WebhookDelivery.status == status)
+    if url:
+        query = query.where(WebhookDelivery.url == url)
+    query = query.order_by(WebhookDelivery.updated_at.desc(), WebhookDelivery.id).limit(limit)
+    return list(db.execute(query).scalars().all())
+
+
+def replay_deliveries(
+    db: Session, ids: Optional[Sequence[str]] = None, url: Optional[str] = None
+) -> int:
+    """
+    Queue dead deliveries again with a fresh set of attempts.
+
+    Args:
+        ids: Deliveries to replay; all dead ones (optionally for `url`) if omitted
+        url: Only replay deliveries to this URL
+
+    Returns:
+        Number of deliveries queued
+    """
+    statement = update(WebhookDelivery).where(WebhookDelivery.status == DEAD)
+    if ids is not None:
+        statement = statement.where(WebhookDelivery.id.in_(list(ids)))
+    if url:
+        statement = statement.where(WebhookDelivery.url == url)
+    result = db.execute(
+        statement.values(status=PENDING, attempts=0, next_attempt_at=_utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount
+
+
+def delivery_counts(db: Session) -> Dict[str, int]:
+    """Deliveries per status"""
+    rows = db.execute(
+        select(WebhookDelivery.status, func.count()).group_by(WebhookDelivery.status)
+    ).all()
+    return {status: count for status, count in rows}
+
+
+class WebhookDispatcher:
+    """
+    Background task sending queued webhook deliveries.
+    """
+
+    # Throttled deliveries are put back for at least this long, so a full
+    # receiver is not claimed and deferred in a tight loop
+    MIN_DEFER_SECONDS = 0.5
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        send: Optional[Send] = None,
+        batch_size: int = 100,
+        concurrency: int = 10,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 3600.0,
+        lease_seconds: float = 60.0,
+        clock: Callable[[], datetime] = _utcnow,
+        rand: Callable[[], float] = random.random,
+        limits: Optional[WebhookSubscriberLimits] = None
+    ):
+        self._session_factory = session_factory
+        self._send_webhook = send or WebhookService._send_single_webhook
+        self._limits = limits or webhook_limits
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        # However high a receiver's own limit, it never gets all the slots
+        self.max_receiver_sends = max(1, self.concurrency // 2)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._rand = rand
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._receiver_sends: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.delivered = 0
+        self.retries = 0
+        self.dead = 0
+        self.batches = 0
+        self.throttled = 0
+
+    def claim(
+        self,
+        batching: Optional[Dict[str, Dict[str, float]]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` (default `batch_size`) due deliveries to this dispatcher.
+
+        For batching URLs (see `WEBHOOK_BATCHING`), a due delivery takes the
+        URL's other waiting events along, and a URL with `max_events` waiting
+        is claimed before its window ends.
+        """
+        batching = batching or {}
+        now = self._clock()
+        with self._session_factory() as db:
+            deliveries = list(db.execute(
+                select(WebhookDelivery)
+                .where(WebhookDelivery.status == PENDING, WebhookDelivery.next_attempt_at <= now)
+                .order_by(WebhookDelivery.next_attempt_at)
+                .limit(limit or self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all())
+            if batching:
+                deliveries += self._claim_batch_mates(db, deliveries, batching)
+
+            claimed = []
+            for delivery in deliveries:
+                delivery.attempts += 1
+                delivery.next_attempt_at = now + timedelta(seconds=self.lease_seconds)
+                claimed.append({
+                    "id": delivery.id,
+                    "url": delivery.url,
+                    "payload": delivery.payload,
+                    "attempts": delivery.attempts,
+                })
+            db.commit()
+        return claimed
+
+    @staticmethod
+    def _claim_batch_mates(
+        db: Session,
+        due: List[WebhookDelivery],
+        batching: Dict[str, Dict[str, float]]
+    ) -> List[WebhookDelivery]:
+        """Waiting (never attempted) events to send along with the due ones, per batching URL"""
+        waiting = db.execute(
+            select(WebhookDelivery.url, func.count())
+            .where(
+                WebhookDelivery.status == PENDING,
+                WebhookDelivery.attempts == 0,
+                WebhookDelivery.url.in_(list(batching))
+            )
+            .group_by(WebhookDelivery.url)
+        ).all()
+        full = {url for url, count in waiting if count >= batching[url]["max_events"]}
+        due_ids = {delivery.id for delivery in due}
+
+        mates = []
+        for url in sorted(full | {delivery.url for delivery in due if delivery.url in batching}):
+            queued = sum(1 for delivery in due if delivery.url == url)
+            room = int(batching[url]["max_events"]) - queued
+            if room <= 0:
+                continue
+            query = (
+                select(WebhookDelivery)
+                .where(
+                    WebhookDelivery.status == PENDING,
+                    WebhookDelivery.attempts == 0,
+                    WebhookDelivery.url == url
+                )
+                .order_by(WebhookDelivery.created_at, WebhookDelivery.id)
+                .limit(room + len(due_ids))
+                .with_for_update(skip_locked=True)
+            )
+            candidates = [
+                delivery for delivery in db.execute(query).scalars() if delivery.id not in due_ids
+            ]
+            mates.extend(candidates[:room])
+        return mates
+
+    @staticmethod
+    def group(
+        claimed: List[Dict[str, Any]], batching: Dict[str, Dict[str, float]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Split claimed deliveries into sends: one each, or `max_events` per batching URL"""
+        sends = []
+        by_url: Dict[str, List[Dict[str, Any]]] = {}
+        for delivery in claimed:
+            if delivery["url"] in batching:
+                by_url.setdefault(delivery["url"], []).append(delivery)
+            else:
+                sends.append([delivery])
+        for url, deliveries in by_url.items():
+            size = int(batching[url]["max_events"])
+            sends.extend(
+                deliveries[start:start + size] for start in range(0, len(deliveries), size)
+            )
+        return sends
+
+    def settle(self, claimed: List[Dict[str, Any]], result: Dict[str, Any]) -> List[str]:
+        """Record the outcome of one send for each of its deliveries; returns their new statuses"""
+        now = self._clock()
+        statuses = []
+        with self._session_factory() as db:
+            for entry in claimed:
+                delivery = db.get(WebhookDelivery, entry["id"])
+                delivery.last_status_code = result.get("status_code")
+                if result.get("success"):
+                    delivery.status = DELIVERED
+                    delivery.delivered_at = now
+                    delivery.last_error = None
+                else:
+                    delivery.last_error = result.get("error") or f"HTTP {result.get('status_code')}"
+                    if entry["attempts"] >= self.max_attempts:
+                        delivery.status = DEAD
+                    else:
+                        delay = retry_delay(
+                            entry["attempts"], self.retry_base_seconds,
+                            self.retry_max_seconds, self._rand
+                        )
+                        delivery.next_attempt_at = now + timedelta(seconds=delay)
+                statuses.append(delivery.status)
+            db.commit()
+        return statuses
+
+    def defer(self, claimed: List[Dict[str, Any]], seconds: float) -> None:
+        """Put deliveries back without using up an attempt, e.g. when their receiver is throttled"""
+        now = self._clock()
+        with self._session_factory() as db:
+            for entry in claimed:
+                delivery = db.get(WebhookDelivery, entry["id"])
+                delivery.attempts = entry["attempts"] - 1
+                delivery.next_attempt_at = now + timedelta(seconds=seconds)
+            db.commit()
+
+    async def _deliver(
+        self,
+        deliveries: List[Dict[str, Any]],
+        batched: bool,
+        slots: Optional[asyncio.Semaphore] = None
+    ) -> None:
+        """Wait for the receiver's permit, send one request and settle its deliveries"""
+        try:
+            # The receiver's own limits are taken before a dispatcher slot, so
+            # sends waiting on a slow receiver do not hold slots others could use
+            async with self._limits.permit(deliveries[0]["url"]) as permit:
+                async with slots or contextlib.nullcontext():
+                    result = await self._send(deliveries, batched, permit)
+        except SubscriberThrottled as e:
+            await self._defer_throttled(deliveries, e)
+            return
+        await self._record(deliveries, batched, result)
+
+    async def _deliver_admitted(
+        self,
+        deliveries: List[Dict[str, Any]],
+        batched: bool,
+        admission: contextlib.AsyncExitStack,
+        permit: SubscriberPermit
+    ) -> None:
+        """Send one request under a permit taken by `_run`, and settle its deliveries"""
+        url = deliveries[0]["url"]
+        try:
+            async with admission:
+                result = await self._send(deliveries, batched, permit)
+        finally:
+            self._receiver_sends[url] -= 1
+            if not self._receiver_sends[url]:
+                del self._receiver_sends[url]
+        await self._record(deliveries, batched, result)
+
+    async def _send(
+        self,
+        deliveries: List[Dict[str, Any]],
+        batched: bool,
+        permit: SubscriberPermit
+    ) -> Dict[str, Any]:
+        url = deliveries[0]["url"]
+        # Batching URLs always get a JSON array, even of one event
+        if batched:
+            payload = [delivery["payload"] for delivery in deliveries]
+        else:
+            payload = deliveries[0]["payload"]
+        try:
+            result = await self._send_webhook(url, payload, get_settings().webhook_secret)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        permit.record(result)
+        return result or {"success": False, "error": "No response"}
+
+    async def _defer_throttled(
+        self, deliveries: List[Dict[str, Any]], throttled: SubscriberThrottled
+    ) -> None:
+        self.throttled += len(deliveries)
+        delay = max(throttled.retry_after, self.MIN_DEFER_SECONDS)
+        await asyncio.to_thread(self.defer, deliveries, delay)
+
+    async def _record(
+        self, deliveries: List[Dict[str, Any]], batched: bool, result: Dict[str, Any]
+    ) -> None:
+        if batched:
+            self.batches += 1
+        statuses = await asyncio.to_thread(self.settle, deliveries, result)
+        self.delivered += statuses.count(DELIVERED)
+        self.retries += statuses.count(PENDING)
+        dead = statuses.count(DEAD)
+        if dead:
+            self.dead += dead
+            logger.error(
+                f"{dead} webhook deliveries to {deliveries[0]['url']} "
+                f"moved to dead letters: {result}"
+            )
+
+    async def dispatch_once(self) -> int:
+        """
+        Send one round of due deliveries and wait for all of them; returns how
+        many were attempted. The background task dispatches continuously instead.
+        """
+        batching = get_settings().webhook_batching_config
+        claimed = await asyncio.to_thread(self.claim, batching)
+        if claimed:
+            slots = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(
+                self._deliver(deliveries, deliveries[0]["url"] in batching, slots)
+                for deliveries in self.group(claimed, batching)
+            ))
+        return len(claimed)
+
+    def start(self, interval: float) -> None:
+        """Start dispatching every `interval` seconds, and whenever notified"""
+        if self._task is not None or interval <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(interval))
+
+    def notify(self) -> None:
+        """Wake the dispatcher now; safe to call from request threads"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def stop(self) -> None:
+        """Stop the background task and its sends; in-flight deliveries retry after their lease"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+
+    async def _run(self, interval: float) -> None:
+        """
+        Keep up to `concurrency` sends in flight, claiming more as soon as one
+        finishes, so a slow receiver only holds its own sends and never delays
+        deliveries to the others behind a round.
+
+        A send is only started once its receiver admits it; deliveries whose
+        receiver is at its limit, or already holds `max_receiver_sends`
+        dispatcher slots, are deferred instead of waiting in a slot.
+        """
+        in_flight = self._in_flight
+        try:
+            while True:
+                free = min(self.batch_size, self.concurrency - len(in_flight))
+                claimed: List[Dict[str, Any]] = []
+                if free > 0:
+                    try:
+                        batching = get_settings().webhook_batching_config
+                        claimed = await asyncio.to_thread(self.claim, batching, free)
+                        for deliveries in self.group(claimed, batching):
+                            await self._start(deliveries, deliveries[0]["url"] in batching)
+                    except Exception:
+                        logger.exception("Webhook dispatch failed")
+                # As many due as there was room for: more may be waiting once a slot frees up
+                if claimed and len(claimed) >= free and len(in_flight) < self.concurrency:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            for task in list(in_flight):
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _start(self, deliveries: List[Dict[str, Any]], batched: bool) -> None:
+        """Start a send if its receiver has room right now, otherwise defer it"""
+        url = deliveries[0]["url"]
+        admission = contextlib.AsyncExitStack()
+        try:
+            if self._receiver_sends.get(url, 0) >= self.max_receiver_sends:
+                raise SubscriberThrottled(url, self.MIN_DEFER_SECONDS)
+            permit = await admission.enter_async_context(self._limits.permit(url, max_wait=0))
+        except SubscriberThrottled as e:
+            await self._defer_throttled(deliveries, e)
+            return
+        self._receiver_sends[url] = self._receiver_sends.get(url, 0) + 1
+        task = asyncio.create_task(self._deliver_admitted(deliveries, batched, admission, permit))
+        self._in_flight.add(task)
+        task.add_done_callback(self._sent)
+
+    def _sent(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Webhook delivery failed", exc_info=task.exception())
+        if self._wakeup is not None:
+            # A slot is free: claim what is due right away
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Outcome counters of this worker's dispatcher"""
+        return {
+            "running": self._task is not None,
+            "in_flight": len(self._in_flight),
+            "delivered": self.delivered,
+            "retries": self.retries,
+            "dead": self.dead,
+            "batches_sent": self.batches,
+            "throttled": self.throttled,
+        }
+
+
+# Global dispatcher instance
+_settings = get_settings()
+webhook_dispatcher = WebhookDispatcher(
+    batch_size=_settings.webhook_delivery_batch_size,
+    concurrency=_settings.webhook_delivery_concurrency,
+    max_attempts=_settings.webhook_delivery_max_attempts,
+    retry_base_seconds=_settings.webhook_retry_base_seconds,
+    retry_max_seconds=_settings.webhook_retry_max_seconds,
+    lease_seconds=_settings.webhook_delivery_lease_seconds
+)
@@ -0,0 +1,225 @@
+"""
+Compiled webhook routing table.
+
+Which URLs an event goes to used to be worked out per event from the raw
+settings strings. `WebhookRoutingTable` is built once from the settings
+(`WEBHOOK_URLS`, `WEBHOOK_FORM_SPECIFIC_URLS`) plus an optional routes file
+(`WEBHOOK_ROUTES_FILE`), with the URLs indexed by template/form id, project
+id and event type, so a lookup is a few dict reads.
+
+`webhook_router` holds the current table, used by both the queued and the
+direct send path. Each worker checks the routes
+file's modification time at most every `WEBHOOK_ROUTES_RELOAD_SECONDS` and
+swaps in a new table when it changed, so routes can be edited without
+restarting workers; POST /internal/webhooks/routes/reload forces it. A file
+that fails to load keeps the previous table in place.
+
+Routes file format, each value a URL or a list of URLs:
+
+    {
+        "urls": ["https://example.com/all-events"],
+        "templates": {"template-id": "https://example.com/contact"},
+        "projects": {"project-id": ["https://example.com/project"]},
+        "events": {"submission_created": "https://example.com/created"}
+    }
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from src.forms_api.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Urls = Tuple[str, ...]
+
+
+def _urls(value: Union[str, Iterable[str], None]) -> Urls:
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    return tuple(url.strip() for url in value if url and url.strip())
+
+
+def _index(mapping: Optional[Mapping[str, Any]]) -> Dict[str, Urls]:
+    return {str(key): _urls(value) for key, value in (mapping or {}).items() if _urls(value)}
+
+
+def _merge(*indexes: Dict[str, Urls]) -> Dict[str, Urls]:
+    merged: Dict[str, Urls] = {}
+    for index in indexes:
+        for key, urls in index.items():
+            merged[key] = tuple(dict.fromkeys(merged.get(key, ()) + urls))
+    return merged
+
+
+class WebhookRoutingTable:
+    """
+    Immutable webhook routes with indexed lookups.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str] = (),
+        templates: Optional[Mapping[str, Any]] = None,
+        projects: Optional[Mapping[str, Any]] = None,
+        events: Optional[Mapping[str, Any]] = None,
+        source: str = "settings"
+    ):
+        self.urls = _urls(list(urls))
+        self.templates = _index(templates)
+        self.projects = _index(projects)
+        self.events = _index(events)
+        self.source = source
+        self.loaded_at = datetime.now(timezone.utc)
+        self._cache: Dict[Tuple[Optional[str], ...], List[str]] = {}
+
+    @classmethod
+    def build(
+        cls, settings, routes: Optional[Mapping[str, Any]] = None, source: str = "settings"
+    ) -> "WebhookRoutingTable":
+        """
+        Compile the routes in `settings` and, if given, a routes file's content.
+
+        Global URLs come first, then the ones for the form or template,
+        project and event type, without duplicates.
+        """
+        routes = routes or {}
+        return cls(
+            urls=list(settings.webhook_urls_list) + list(_urls(routes.get("urls"))),
+            templates=_merge(
+                _index(settings.webhook_form_specific_config), _index(routes.get("templates"))
+            ),
+            projects=routes.get("projects"),
+            events=routes.get("events"),
+            source=source
+        )
+
+    def lookup(
+        self,
+        event_type: Optional[str] = None,
+        form_id: Optional[str] = None,
+        template_id: Optional[str] = None,
+        project_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        URLs an event is sent to.
+
+        Like the form-specific settings, a form id takes precedence over the
+        template id when both have routes.
+        """
+        key = (event_type, form_id, template_id, project_id)
+        urls = self._cache.get(key)
+        if urls is None:
+            if form_id and form_id in self.templates:
+                specific = self.templates[form_id]
+            else:
+                specific = self.templates.get(template_id, ()) if template_id else ()
+            urls = list(dict.fromkeys(
+                self.urls
+                + specific
+                + self.projects.get(project_id, ())
+                + self.events.get(event_type, ())
+            ))
+            # Keys are bounded by the number of forms and templates
+            self._cache[key] = urls
+        return list(urls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+            "global_urls": len(self.urls),
+            "templates": len(self.templates),
+            "projects": len(self.projects),
+            "events": len(self.events),
+        }
+
+
+class WebhookRouter:
+    """
+    Holds the current routing table and reloads it when the routes file changes.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._table: Optional[WebhookRoutingTable] = None
+        self._routes_file = ""
+        self._file_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def table(self) -> WebhookRoutingTable:
+        """The current table, reloaded first if the routes file changed"""
+        table = self._table
+        if table is None:
+            return self.reload()
+        if self._routes_file and self._clock() >= self._next_check:
+            self._check_file()
+        return self._table
+
+    def lookup(
+        self,
+        event_type: Optional[str] = None,
+        form_id: Optional[str] = None,
+        template_id: Optional[str] = None,
+        project_id: Optional[str] = None
+    ) -> List[str]:
+        """URLs an event is sent to, see `WebhookRoutingTable.lookup`"""
+        return self.table().lookup(event_type, form_id, template_id, project_id)
+
+    def reload(self) -> WebhookRoutingTable:
+        """Rebuild the table from the settings and routes file now"""
+        with self._lock:
+            settings = get_settings()
+            self._routes_file = settings.webhook_routes_file
+            self._next_check = self._clock() + settings.webhook_routes_reload_seconds
+            routes, mtime, source = None, None, "settings"
+            if self._routes_file:
+                try:
+                    mtime = os.stat(self._routes_file).st_mtime
+                    with open(self._routes_file, encoding="utf-8") as f:
+                        routes = json.load(f)
+                    if not isinstance(routes, dict):
+                        raise ValueError("routes file must contain a JSON object")
+                    source = self._routes_file
+                except (OSError, ValueError) as e:
+                    self.reload_errors += 1
+                    logger.warning(f"Failed to load webhook routes from {self._routes_file}: {e}")
+                    if self._table is not None:
+                        self._file_mtime = mtime
+                        return self._table
+                    routes = None
+            self._table = WebhookRoutingTable.build(settings, routes, source=source)
+            self._file_mtime = mtime
+            self.reloads += 1
+            return self._table
+
+    def _check_file(self) -> None:
+        self._next_check = self._clock() + get_settings().webhook_routes_reload_seconds
+        try:
+            mtime = os.stat(self._routes_file).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._file_mtime:
+            logger.info(f"Webhook routes file {self._routes_file} changed, reloading")
+            self.reload()
+
+    def stats(self) -> Dict[str, Any]:
+        table = self._table
+        return {
+            "table": table.stats() if table is not None else None,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+# Global router instance
+webhook_router = WebhookRouter()
@@ -11,13 +11,263 @@ import httpx
 import asyncio
 import hmac
 import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
+from typing import AsyncIterator, Dict, Any, List, Mapping, Optional, Tuple, Union
 
 from src.forms_api.config import get_settings
+from src.forms_api.services.http_clients import http_clients
+from src.forms_api.services.webhook_routing import webhook_router
+from src.forms_api.utils.adaptive_limiter import AIMDLimit, TokenBucket
+from src.forms_api.utils.circuit_breaker import percentile
 
 logger = logging.getLogger(__name__)
 
+
+class WebhookEndpointMetrics:
+    """Latency and outcome counters per webhook endpoint for this worker"""
+
+    def __init__(self, latency_samples: int = 500):
+        self.latency_samples = latency_samples
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """Endpoint name for a URL, without credentials or query string as they may hold secrets"""
+        return str(httpx.URL(url).copy_with(userinfo=b"", query=None, fragment=None))
+
+    def record(self, url: str, seconds: float, status_code: Optional[int] = None,
+               error: Optional[BaseException] = None) -> None:
+        """Record one delivery attempt"""
+        with self._lock:
+            metrics = self._endpoints.get(self.endpoint(url))
+            if metrics is None:
+                metrics = self._endpoints[self.endpoint(url)] = {
+                    "deliveries": 0,
+                    "succeeded": 0,
+                    "failed": 0,
+                    "errors": 0,
+                    "last_status_code": None,
+                    "latencies": deque(maxlen=self.latency_samples),
+                }
+            metrics["deliveries"] += 1
+            metrics["latencies"].append(seconds)
+            if error is not None:
+                metrics["errors"] += 1
+            elif 200 <= status_code < 300:
+                metrics["succeeded"] += 1
+            else:
+                metrics["failed"] += 1
+            if status_code is not None:
+                metrics["last_status_code"] = status_code
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Counters and latency percentiles (ms) per endpoint"""
+        with self._lock:
+            endpoints = {name: dict(metrics, latencies=list(metrics["latencies"]))
+                         for name, metrics in self._endpoints.items()}
+
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        report = {}
+        for name, metrics in sorted(endpoints.items()):
+            latencies = metrics.pop("latencies")
+            deliveries = metrics["deliveries"]
+            report[name] = {
+                **metrics,
+                "error_rate": (
+                    round((metrics["failed"] + metrics["errors"]) / deliveries, 4)
+                    if deliveries else None
+                ),
+                "latency_ms": {
+                    "p50": ms(percentile(latencies, 0.5)),
+                    "p95": ms(percentile(latencies, 0.95)),
+                    "p99": ms(percentile(latencies, 0.99)),
+                    "max": ms(max(latencies) if latencies else None),
+                },
+            }
+        return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+# Global metrics instance, served at /internal/webhooks
+webhook_metrics = WebhookEndpointMetrics()
+
+
+class SubscriberThrottled(Exception):
+    """Raised instead of sending when a receiver's limits leave no room in time"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Webhook receiver {endpoint} is throttled; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def is_overload(result: Optional[Dict[str, Any]]) -> bool:
+    """Whether a send result suggests the receiver is overloaded: network error, 429 or 5xx"""
+    if not result:
+        return True
+    status_code = result.get("status_code")
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+class SubscriberPermit:
+    """One admitted send; the sender reports how it went with `record`"""
+
+    def __init__(self):
+        self.overloaded: Optional[bool] = None
+
+    def record(self, result: Optional[Dict[str, Any]]) -> None:
+        self.overloaded = is_overload(result)
+
+
+class WebhookSubscriberLimits:
+    """
+    Token-bucket rate limit and AIMD concurrency limit per webhook endpoint.
+
+    Each receiver gets its own limits, so a slow or failing one is held to
+    few requests in flight and cannot use up the connections, tasks and
+    dispatcher slots of the others. A send that would wait longer than
+    `max_wait_seconds` for its receiver raises `SubscriberThrottled`.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = 20.0,
+        burst: int = 40,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 10,
+        slow_seconds: float = 5.0,
+        max_wait_seconds: float = 2.0,
+        overrides: Optional[Mapping[str, Mapping[str, float]]] = None,
+        clock=time.monotonic
+    ):
+        self.defaults = {
+            "rate_per_second": rate_per_second,
+            "burst": burst,
+            "initial_concurrency": initial_concurrency,
+            "max_concurrency": max_concurrency,
+        }
+        self.slow_seconds = slow_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.overrides = {
+            WebhookEndpointMetrics.endpoint(url): options
+            for url, options in (overrides or {}).items()
+        }
+        self._clock = clock
+        self._subscribers: Dict[str, Tuple[TokenBucket, AIMDLimit]] = {}
+        self._throttled: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, endpoint: str) -> Tuple[TokenBucket, AIMDLimit]:
+        with self._lock:
+            limits = self._subscribers.get(endpoint)
+            if limits is None:
+                options = {**self.defaults, **self.overrides.get(endpoint, {})}
+                limits = self._subscribers[endpoint] = (
+                    TokenBucket(options["rate_per_second"], options["burst"], clock=self._clock),
+                    AIMDLimit(
+                        initial=int(options["initial_concurrency"]),
+                        maximum=int(options["max_concurrency"]),
+                        slow_seconds=self.slow_seconds
+                    ),
+                )
+            return limits
+
+    def _throttle(self, endpoint: str, retry_after: float) -> SubscriberThrottled:
+        with self._lock:
+            self._throttled[endpoint] = self._throttled.get(endpoint, 0) + 1
+        return SubscriberThrottled(endpoint, retry_after)
+
+    @asynccontextmanager
+    async def permit(
+        self, url: str, max_wait: Optional[float] = None
+    ) -> AsyncIterator[SubscriberPermit]:
+        """
+        Admit one send to `url` under its receiver's rate and concurrency limits.
+
+        Args:
+            url: Receiver URL
+            max_wait: Seconds to wait for room, `max_wait_seconds` if None; 0 admits only right away
+
+        Raises:
+            SubscriberThrottled: If no token or permit is available within `max_wait`
+        """
+        max_wait = self.max_wait_seconds if max_wait is None else max_wait
+        endpoint = WebhookEndpointMetrics.endpoint(url)
+        bucket, limit = self._limits(endpoint)
+        wait = bucket.reserve(max_wait)
+        if wait is None:
+            raise self._throttle(endpoint, 1 / bucket.rate)
+        started = self._clock()
+        if not await limit.acquire(max_wait):
+            bucket.refund()
+            raise self._throttle(endpoint, max(max_wait, self.max_wait_seconds))
+        try:
+            # The permit is held while waiting for the token, so queued sends do not all
+            # fire at once
+            remaining = wait - (self._clock() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            permit = SubscriberPermit()
+            started = self._clock()
+            yield permit
+            if permit.overloaded is False:
+                limit.on_success(self._clock() - started)
+            else:
+                limit.on_overload()
+        except Exception:
+            limit.on_overload()
+            raise
+        finally:
+            limit.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current limits and throttle counts per endpoint"""
+        with self._lock:
+            subscribers = dict(self._subscribers)
+            throttled = dict(self._throttled)
+        report = {}
+        for endpoint, (bucket, limit) in sorted(subscribers.items()):
+            tokens = bucket.tokens
+            report[endpoint] = {
+                **limit.stats(),
+                "rate_per_second": bucket.rate,
+                "tokens": round(tokens, 2) if tokens is not None else None,
+                "throttled": throttled.get(endpoint, 0),
+            }
+        return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._subscribers.clear()
+            self._throttled.clear()
+
+
+def _create_subscriber_limits() -> WebhookSubscriberLimits:
+    settings = get_settings()
+    return WebhookSubscriberLimits(
+        rate_per_second=settings.webhook_subscriber_rate_per_second,
+        burst=settings.webhook_subscriber_burst,
+        initial_concurrency=settings.webhook_subscriber_initial_concurrency,
+        max_concurrency=settings.webhook_subscriber_max_concurrency,
+        slow_seconds=settings.webhook_subscriber_slow_seconds,
+        max_wait_seconds=settings.webhook_subscriber_max_wait_seconds,
+        overrides=settings.webhook_subscriber_limits_config
+    )
+
+
+# Global per-subscriber limits, shared by the webhook dispatcher and direct sends
+webhook_limits = _create_subscriber_limits()
+
 class WebhookService:
     """Service for handling webhook notifications."""
     
@@ -46,7 +296,35 @@ class WebhookService:
             logger.debug("Webhooks disabled, skipping webhook notification")
             return []
         
-        # Create the webhook payload
+        payload = WebhookService.build_payload(event_type, form_data, form_id, template_id)
+        all_urls = webhook_router.lookup(event_type, form_id, template_id)
+
+        if not all_urls:
+            logger.debug("No webhook URLs configured, skipping webhook notification")
+            return []
+
+        # Send webhooks in parallel
+        return await WebhookService._send_webhooks(all_urls, payload)
+
+    @staticmethod
+    def build_payload(
+        event_type: str,
+        form_data: Dict[str, Any],
+        form_id: Optional[str] = None,
+        template_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the webhook payload for an event.
+
+        Args:
+            event_type: Type of event (e.g., "submission_created", "submission_updated")
+            form_data: The form submission data
+            form_id: ID of the form (for standard forms) or None for flexible forms
+            template_id: ID of the template (for flexible forms) or None for standard forms
+
+        Returns:
+            The webhook payload
+        """
         payload = {
             "event_type": event_type,
             "timestamp": datetime.utcnow().isoformat(),
@@ -60,25 +338,7 @@ class WebhookService:
         if template_id:
             payload["template_id"] = template_id
         
-        # Get webhook URLs
-        webhook_urls = settings.webhook_urls_list
-        
-        # Add form-specific webhook URL if configured
-        form_specific_urls = []
-        if form_id and form_id in settings.webhook_form_specific_config:
-            form_specific_urls.append(settings.webhook_form_specific_config[form_id])
-        elif template_id and template_id in settings.webhook_form_specific_config:
-            form_specific_urls.append(settings.webhook_form_specific_config[template_id])
-        
-        # Combine all webhook URLs
-        all_urls = webhook_urls + form_specific_urls
-        
-        if not all_urls:
-            logger.debug("No webhook URLs configured, skipping webhook notification")
-            return []
-        
-        # Send webhooks in parallel
-        return await WebhookService._send_webhooks(all_urls, payload)
+        return payload
     
     @staticmethod
     async def _send_webhooks(
@@ -104,7 +364,7 @@ class WebhookService:
             if not url:  # Skip empty URLs
                 continue
                 
-            task = WebhookService._send_single_webhook(url, payload, settings.webhook_secret)
+            task = WebhookService._send_limited(url, payload, settings.webhook_secret)
             tasks.append(task)
         
         # Execute tasks in parallel
@@ -114,10 +374,26 @@ class WebhookService:
         
         return [r for r in results if r]  # Filter None results
     
+    @staticmethod
+    async def _send_limited(
+        url: str,
+        payload: Dict[str, Any],
+        secret: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Send a webhook within its receiver's limits, see `WebhookSubscriberLimits`"""
+        try:
+            async with webhook_limits.permit(url) as permit:
+                result = await WebhookService._send_single_webhook(url, payload, secret)
+                permit.record(result)
+                return result
+        except SubscriberThrottled as e:
+            logger.warning(str(e))
+            return {"url": url, "success": False, "error": str(e), "throttled": True}
+
     @staticmethod
     async def _send_single_webhook(
         url: str, 
-        payload: Dict[str, Any],
+        payload: Union[Dict[str, Any], List[Dict[str, Any]]],
         secret: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
@@ -125,32 +401,40 @@ class WebhookService:
         
         Args:
             url: The webhook URL
-            payload: The webhook payload
-            secret: Optional secret for signing the request
+            payload: The webhook payload, or a list of them for a batching URL
+            secret: Optional secret for signing the request (signs the whole body)
             
         Returns:
             Response details or None if failed
         """
+        started = time.perf_counter()
         try:
             headers = {"Content-Type": "application/json"}
             payload_json = json.dumps(payload)
+            if isinstance(payload, list):
+                headers["X-Webhook-Batch-Size"] = str(len(payload))
             
             # Sign the payload if a secret is provided
             if secret:
                 signature = WebhookService._generate_signature(payload_json, secret)
                 headers["X-Webhook-Signature"] = signature
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, content=payload_json, headers=headers)
-                
-                return {
-                    "url": url,
-                    "status_code": response.status_code,
-                    "success": 200 <= response.status_code < 300,
-                    "response": response.text if response.text else None
-                }
+            # Shared pooled client: keeps connections to each receiver alive between events
+            client = http_clients.get("webhooks")
+            response = await client.post(url, content=payload_json, headers=headers)
+            webhook_metrics.record(
+                url, time.perf_counter() - started, status_code=response.status_code
+            )
+
+            return {
+                "url": url,
+                "status_code": response.status_code,
+                "success": 200 <= response.status_code < 300,
+                "response": response.text if response.text else None
+            }
                 
         except Exception as e:
+            webhook_metrics.record(url, time.perf_counter() - started, error=e)
             logger.error(f"Error sending webhook to {url}: {str(e)}")
             return {
                 "url": url,
@@ -0,0 +1,174 @@
+"""
+Startup schema handling and cold-start timing for HSQ Forms API.
+
+Importing the app no longer touches the database. What happens to the
+schema at boot is chosen by DB_SCHEMA_STARTUP:
+
+- `create`: run `Base.metadata.create_all` in the lifespan hook (local
+  development and SQLite).
+- `check`: compare the database's Alembic revision with the migration head
+  in the background, without delaying startup. Alembic is only imported in
+  this mode.
+- `skip`: do nothing; migrations are applied out of band.
+
+`startup_timings` records how long import, app construction, the schema
+step and the first request took for this worker.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_STARTUP_MODES = ("create", "check", "skip")
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class StartupTimings:
+    """
+    Cold-start milestones for this worker, in milliseconds since the app module began importing.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._origin = clock()
+        self.marks: Dict[str, float] = {}
+        self.first_request_ms: Optional[float] = None
+        self.schema: Dict[str, Any] = {"mode": None, "status": "pending"}
+
+    def mark(self, name: str) -> float:
+        """Record a milestone and return its offset in ms"""
+        offset = round((self._clock() - self._origin) * 1000, 2)
+        self.marks[name] = offset
+        return offset
+
+    def phases(self) -> Dict[str, float]:
+        """Durations of the individual startup phases in ms"""
+        phases = {}
+        if "imports" in self.marks:
+            phases["import"] = self.marks["imports"]
+            if "app_constructed" in self.marks:
+                phases["app_construction"] = round(
+                    self.marks["app_constructed"] - self.marks["imports"], 2
+                )
+        if self.first_request_ms is not None:
+            phases["first_request"] = self.first_request_ms
+        return phases
+
+    def report(self) -> Dict[str, Any]:
+        """Return the cold-start report"""
+        return {
+            "phases_ms": self.phases(),
+            "marks_ms": dict(self.marks),
+            "schema": dict(self.schema),
+        }
+
+
+class FirstRequestTimer:
+    """
+    ASGI middleware that times the first HTTP request served by this worker.
+
+    After the first request it only forwards calls.
+    """
+
+    def __init__(self, app, timings: StartupTimings):
+        self.app = app
+        self.timings = timings
+        self._pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not self._pending or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._pending = False
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.timings.first_request_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.timings.mark("first_request")
+            logger.info("Cold start: %s", self.timings.phases())
+
+
+def create_schema(engine: Engine) -> None:
+    """Create missing tables from the SQLAlchemy models"""
+    from src.forms_api.db import Base
+    from src.forms_api import models  # noqa: F401 - register models
+
+    Base.metadata.create_all(bind=engine)
+
+
+def check_alembic_head(engine: Engine, config_path: Path = ALEMBIC_INI) -> Dict[str, Any]:
+    """
+    Compare the database's Alembic revision with the migration scripts' head.
+
+    Returns:
+        Dict with the expected and current revisions and `up_to_date`
+    """
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(config_path))
+    config.set_main_option("script_location", str(config_path.parent / "alembic"))
+    expected = set(ScriptDirectory.from_config(config).get_heads())
+
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+
+    return {
+        "expected": sorted(expected),
+        "current": sorted(current),
+        "up_to_date": current == expected,
+    }
+
+
+async def prepare_schema(mode: str, engine: Engine, timings: StartupTimings) -> None:
+    """
+    Run the configured startup schema step off the event loop.
+
+    Failures of the Alembic check are logged and reported, not raised, so a
+    worker still serves while a migration is being rolled out.
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode not in SCHEMA_STARTUP_MODES:
+        raise ValueError(
+            f"DB_SCHEMA_STARTUP must be one of {', '.join(SCHEMA_STARTUP_MODES)}, got {mode!r}"
+        )
+
+    timings.schema = {"mode": mode, "status": "pending"}
+    started = time.perf_counter()
+
+    if mode == "create":
+        await asyncio.to_thread(create_schema, engine)
+        timings.schema["status"] = "created"
+    elif mode == "check":
+        try:
+            result = await asyncio.to_thread(check_alembic_head, engine)
+        except Exception as e:
+            logger.error(f"Alembic revision check failed: {e}")
+            timings.schema.update(status="error", error=str(e))
+        else:
+            timings.schema.update(result, status="ok" if result["up_to_date"] else "behind")
+            if not result["up_to_date"]:
+                logger.error(
+                    f"Database schema is at {result['current'] or 'no revision'}, "
+                    f"migrations head is {result['expected']}; run 'alembic upgrade head'"
+                )
+    else:
+        timings.schema["status"] = "skipped"
+
+    timings.schema["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    timings.mark("schema_ready")
+
+
+# Global timings for this worker
+startup_timings = StartupTimings()
@@ -0,0 +1,185 @@
+"""
+Rate and concurrency limits for calls to one downstream receiver.
+
+- `TokenBucket` caps the sustained request rate, allowing bursts of up to
+  `burst` requests.
+- `AIMDLimit` caps the requests in flight with a limit that adapts to the
+  receiver: every call that succeeds within `slow_seconds` raises it by
+  about one per limit's worth of calls (additive increase), and an
+  overloaded or slow answer halves it (multiplicative decrease). A
+  struggling receiver is thus held to few concurrent calls while a healthy
+  one grows up to `maximum`.
+
+Both are non-blocking where they can be; `AIMDLimit.acquire` waits for a
+free permit at most `timeout` seconds so callers can give up and retry
+later instead of piling up tasks behind a slow receiver.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations: a call may take a token ahead of time
+    and is told how long to wait before using it.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take a token; returns the seconds to wait before it may be used.
+
+        Returns None, taking nothing, if the wait would exceed `max_wait`.
+        A rate of 0 or less means no limit.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def refund(self) -> None:
+        """Give back a reserved token that was not used"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    @property
+    def tokens(self) -> Optional[float]:
+        if self.rate <= 0:
+            return None
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class AIMDLimit:
+    """
+    Concurrency limit with additive increase and multiplicative decrease.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 10,
+        backoff: float = 0.5,
+        slow_seconds: Optional[float] = None
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.backoff = backoff
+        self.slow_seconds = slow_seconds
+        self._limit = float(min(self.maximum, max(self.minimum, initial)))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """Take a permit if one is free right now"""
+        with self._lock:
+            if self._in_flight < int(self._limit) and not self._waiters:
+                self._in_flight += 1
+                return True
+            return False
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a permit, waiting at most `timeout` seconds; returns whether one was taken"""
+        if self.try_acquire():
+            return True
+        if timeout is not None and timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        if waiter.done() and not waiter.cancelled():
+            # Handed a permit just as the caller gave up
+            self.release()
+
+    def release(self) -> None:
+        """Return a permit, handing it to the longest waiting caller if any"""
+        with self._lock:
+            self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while True:
+            with self._lock:
+                if not self._waiters or self._in_flight >= int(self._limit):
+                    return
+                waiter = self._waiters.popleft()
+                if waiter.done() or waiter.get_loop().is_closed():
+                    continue
+                self._in_flight += 1
+            waiter.set_result(True)
+
+    def on_success(self, seconds: float) -> None:
+        """A call finished normally after `seconds`"""
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            self.on_overload()
+            return
+        with self._lock:
+            if self._limit < self.maximum:
+                self._limit = min(float(self.maximum), self._limit + 1 / self._limit)
+                self.increases += 1
+        self._wake()
+
+    def on_overload(self) -> None:
+        """A call failed in a way that suggests the receiver is overloaded"""
+        with self._lock:
+            if self._limit > self.minimum:
+                self._limit = max(float(self.minimum), self._limit * self.backoff)
+                self.decreases += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
@@ -0,0 +1,255 @@
+"""
+In-process caching helpers for HSQ Forms API.
+
+`TTLCache` is a size- and memory-bounded LRU whose entries expire after a
+TTL. Caches register with `cache_registry`, which sweeps expired entries in
+the background and reports hit/miss/eviction counters for /internal/caches.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """
+    Rough deep size of a cached value in bytes.
+
+    Follows dicts, sequences and object attributes a few levels deep; good
+    enough to keep a cache inside a memory budget, not an exact measure.
+    """
+    size = sys.getsizeof(obj)
+    if _depth >= 6 or isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _depth + 1) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return size + estimate_size(vars(obj), _depth + 1)
+    return size
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed TTL.
+
+    The cache holds at most `maxsize` entries and, when `max_bytes` is set,
+    at most that many (estimated) bytes; the least recently used entries are
+    evicted to make room. Expired entries are dropped when looked up and by
+    `sweep`, which the cache registry runs periodically.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a live entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Returned when the key is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value, _ = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store an entry, evicting least recently used ones if over a limit.
+
+        A value larger than the whole memory budget is not stored.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Overrides the cache TTL for this entry
+        """
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        size = self._sizeof(value) if self.max_bytes else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry; caller holds the lock"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key: Hashable) -> None:
+        """Remove an entry if present"""
+        with self._lock:
+            self._remove(key)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Remove all entries whose key matches a predicate.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def sweep(self) -> int:
+        """
+        Remove all expired entries.
+
+        Returns:
+            Number of entries removed
+        """
+        now = self._clock()
+        with self._lock:
+            expired = [
+                key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now
+            ]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes if self.max_bytes else None,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheRegistry:
+    """
+    Named caches of this process, swept by one background thread.
+
+    Anything with a `stats()` method can be registered; objects that also
+    have `sweep()` are swept.
+    """
+
+    def __init__(self):
+        self._caches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, cache: Any) -> Any:
+        """Register a cache under a unique name and return it"""
+        with self._lock:
+            self._caches[name] = cache
+        return cache
+
+    def get(self, name: str) -> Optional[Any]:
+        """Look up a registered cache"""
+        return self._caches.get(name)
+
+    def caches(self) -> Dict[str, Any]:
+        """Return the registered caches by name"""
+        with self._lock:
+            return dict(self._caches)
+
+    def sweep(self) -> int:
+        """Sweep expired entries from all caches; returns the number removed"""
+        with self._lock:
+            caches = list(self._caches.values())
+        return sum(cache.sweep() for cache in caches if hasattr(cache, "sweep"))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return stats for every registered cache"""
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+    def start_sweeper(self, interval: float) -> None:
+        """Start the background sweeper thread"""
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run_sweeper, args=(interval,), name="cache-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run_sweeper(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Cache sweep failed")
+
+
+# Global registry instance
+cache_registry = CacheRegistry()
@@ -0,0 +1,253 @@
+"""
+Circuit breaker with adaptive timeouts for calls to upstream services.
+
+A `CircuitBreaker` watches the outcomes of recent calls in a rolling time
+window:
+
+- closed: calls go through. When at least `minimum_calls` were made in the
+  window and the error rate or the rate of slow calls crosses its
+  threshold, the circuit opens.
+- open: calls are rejected immediately with `CircuitOpenError`, so callers
+  can fall back without waiting on a failing upstream.
+- half-open: after `open_seconds` a few trial calls are let through; a
+  success closes the circuit, a failure opens it again.
+
+Each call gets a timeout derived from the observed p99 latency of
+successful and timed-out calls (times a multiplier, clamped between a floor
+and a ceiling), so a healthy upstream that answers in 200 ms is not given
+30 s when it starts hanging. Half-open trials get the ceiling.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def percentile(samples: Any, fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a sequence of numbers"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker with error-rate and latency thresholds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate_threshold: float = 0.8,
+        minimum_calls: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 15.0,
+        half_open_max_calls: int = 1,
+        min_timeout: float = 1.0,
+        max_timeout: float = 30.0,
+        timeout_multiplier: float = 2.0,
+        latency_samples: int = 200,
+        min_latency_samples: int = 20,
+        is_failure: Callable[[BaseException], bool] = lambda error: True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_latency_samples = min_latency_samples
+        self.is_failure = is_failure
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        # (finished_at, failed, slow) per call in the window
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """State, moving from open to half-open after the open period; caller holds the lock"""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def timeout(self) -> float:
+        """Timeout for the next call, from the p99 latency of recent successful calls"""
+        with self._lock:
+            if len(self._latencies) < self.min_latency_samples:
+                return self.max_timeout
+            p99 = percentile(self._latencies, 0.99)
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def _acquire(self) -> bool:
+        """Admit a call; returns whether it is a half-open trial call"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self.rejected += 1
+            retry_after = max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def _open(self, now: float) -> None:
+        # Latency seen before the trip says little about the upstream once it recovers
+        self._latencies.clear()
+        self._state = OPEN
+        self._opened_at = now
+        self._trial_calls = 0
+        self.opened += 1
+
+    def _record(self, trial: bool, failed: bool, elapsed: float, timed_out: bool = False) -> None:
+        now = self._clock()
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if not failed or timed_out:
+                # A timed-out call took at least this long: without its sample a
+                # step up in latency would keep every call timing out at the old p99
+                self._latencies.append(elapsed)
+            if trial:
+                self._trial_calls -= 1
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if self._state != CLOSED:
+                return
+
+            self._outcomes.append((now, failed, slow))
+            while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+                self._outcomes.popleft()
+            calls = len(self._outcomes)
+            if calls < self.minimum_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._outcomes if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._outcomes if call_slow)
+            if (
+                failures / calls >= self.failure_rate_threshold
+                or slow_calls / calls >= self.slow_call_rate_threshold
+            ):
+                self._open(now)
+                self._outcomes.clear()
+
+    async def call(self, fn: Callable[[float], Awaitable[T]]) -> T:
+        """
+        Run `fn(timeout)` through the breaker.
+
+        Args:
+            fn: Coroutine function taking the adaptive timeout in seconds
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Whatever `fn` raises; counted as a failure if `is_failure` says so
+        """
+        trial = self._acquire()
+        # Trials get the full timeout, so an upstream that became slower but healthy can
+        # close the circuit
+        timeout = self.max_timeout if trial else self.timeout()
+        started = self._clock()
+        try:
+            result = await fn(timeout)
+        except Exception as e:
+            elapsed = self._clock() - started
+            self._record(trial, self.is_failure(e), elapsed, timed_out=elapsed >= timeout)
+            raise
+        except BaseException:
+            # Cancelled: no verdict on the upstream, just free the trial slot
+            if trial:
+                with self._lock:
+                    self._trial_calls -= 1
+            raise
+        self._record(trial, False, self._clock() - started)
+        return result
+
+    def reset(self) -> None:
+        """Close the circuit and forget all outcomes"""
+        with self._lock:
+            self._state = CLOSED
+            self._trial_calls = 0
+            self._outcomes.clear()
+            self._latencies.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and counters for health reporting"""
+        timeout = self.timeout()
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(1 for _, failed, _ in self._outcomes if failed)
+            return {
+                "state": state,
+                "calls_in_window": calls,
+                "failure_rate": round(failures / calls, 4) if calls else None,
+                "p99_latency_seconds": (
+                    round(percentile(self._latencies, 0.99), 4) if self._latencies else None
+                ),
+                "timeout_seconds": round(timeout, 3),
+                "retry_after_seconds": (
+                    round(max(0.0, self.open_seconds - (self._clock() - self._opened_at)), 1)
+                    if state == OPEN else None
+                ),
+                "times_opened": self.opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(name: str, **options: Any) -> CircuitBreaker:
+    """Get (or create with `options`) the named circuit breaker"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **options)
+        return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshots of every named circuit breaker"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
@@ -0,0 +1,78 @@
+"""
+Keyset pagination helpers for HSQ Forms API.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the sort key
+of the last row on the previous page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import Response
+
+# Response headers carrying pagination metadata (list bodies stay plain arrays)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Count-Estimated"
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, TOTAL_ESTIMATED_HEADER]
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """
+    Encode the (created_at, id) sort key of a row as an opaque cursor.
+
+    Args:
+        created_at: Creation timestamp of the last row on the page
+        row_id: ID of the last row on the page
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: The cursor token
+
+    Returns:
+        Tuple of (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def set_pagination_headers(
+    response: Response,
+    next_cursor: Optional[str],
+    total: Optional[int] = None,
+    total_is_estimate: bool = False
+) -> None:
+    """
+    Set keyset pagination headers on a list response.
+
+    Args:
+        response: The response to decorate
+        next_cursor: Cursor for the next page, or None on the last page
+        total: Total row count, if requested
+        total_is_estimate: Whether the total is an estimate
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+        if total_is_estimate:
+            response.headers[TOTAL_ESTIMATED_HEADER] = "true"
@@ -0,0 +1,65 @@
+"""
+Fast JSON serialization for HSQ Forms API responses.
+
+List endpoints return rows whose `data` and `schema` columns are arbitrary
+JSON blobs. Validating each row into a Pydantic response model and then
+running FastAPI's encoder walks those blobs twice; these helpers map ORM
+rows straight to dicts and encode them with orjson in one pass. The output
+matches the Pydantic response models field for field.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Response
+
+# UTC datetimes as "Z", like Pydantic's JSON mode
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object as JSON bytes"""
+    return orjson.dumps(obj, option=ORJSON_OPTIONS)
+
+
+def submission_to_dict(submission: Any) -> Dict[str, Any]:
+    """Map a FormSubmission row to the FormSubmissionResponse fields"""
+    return {
+        "id": submission.id,
+        "template_id": submission.template_id,
+        "data": submission.data,
+        "submitted_from": submission.submitted_from,
+        "ip_address": submission.ip_address,
+        "created_at": submission.created_at,
+    }
+
+
+def template_to_dict(template: Any) -> Dict[str, Any]:
+    """Map a FormTemplate row to the FormTemplateResponse fields"""
+    return {
+        "id": template.id,
+        "name": template.name,
+        "description": template.description,
+        "project_id": template.project_id,
+        "schema": template.schema,
+        "is_active": template.is_active,
+        "created_at": template.created_at,
+    }
+
+
+def submissions_to_json(submissions: Iterable[Any]) -> bytes:
+    """Encode FormSubmission rows as a JSON array"""
+    return dumps([submission_to_dict(s) for s in submissions])
+
+
+def templates_to_json(templates: Iterable[Any]) -> bytes:
+    """Encode FormTemplate rows as a JSON array"""
+    return dumps([template_to_dict(t) for t in templates])
+
+
+def json_bytes_response(
+    body: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Wrap pre-encoded JSON bytes in a response without re-encoding them"""
+    return Response(
+        content=body, status_code=status_code, media_type="application/json", headers=headers
+    )
@@ -0,0 +1,188 @@
+"""
+Single-flight request coalescing.
+
+When many requests need the same missing value at once (a cold template, a
+customer number validated by every widget on a page), only the first one
+should go upstream; the others wait for it and share its result or error.
+A `SingleFlight` group keeps at most one call in flight per key, for
+coroutines (`do`, `spawn`) and for blocking callables run on worker
+threads (`do_sync`).
+
+Groups are created by name with `single_flight` and report how many calls
+they ran and how many were collapsed into an in-flight one.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    One in-flight call per key; concurrent callers share the outcome.
+
+    Nothing is cached: once a call finishes the next caller starts a new one.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._sync_futures: Dict[Hashable, concurrent.futures.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.collapsed = 0
+        self.errors = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def _run(
+        self, key: Hashable, future: asyncio.Future, fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run the call for `key` and publish its outcome on `future`"""
+        self._count("calls")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Waiters see the cancelled future and retry on their own
+            future.cancel()
+            raise
+        except BaseException as e:
+            self._count("errors")
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; nothing left unretrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()` unless a call for `key` is in flight, then share its outcome.
+
+        The first caller runs `fn` itself, so it may use request-scoped
+        resources. If that caller is cancelled, a waiting caller retries.
+
+        Raises:
+            Whatever the shared call raised
+        """
+        while True:
+            future = self._futures.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._futures[key] = future
+                return await self._run(key, future, fn)
+
+            self._count("collapsed")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This caller was cancelled
+
+    def spawn(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        Start `fn()` in the background unless a call for `key` is in flight.
+
+        Returns:
+            Future of the (possibly already running) call
+        """
+        future = self._futures.get(key)
+        if future is not None:
+            self._count("collapsed")
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        task = asyncio.ensure_future(self._run(key, future, fn))
+        # Keep a reference until done; the outcome is read from `future`
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    def do_sync(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Call `fn()` unless a call for `key` is in flight on another thread,
+        then block until it finishes and share its outcome.
+
+        Raises:
+            Whatever the shared call raised
+        """
+        with self._lock:
+            future = self._sync_futures.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._sync_futures[key] = future
+                self.calls += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._count("errors")
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._sync_futures.get(key) is future:
+                    del self._sync_futures[key]
+
+    def running(self, key: Hashable) -> bool:
+        """Whether a call for `key` is in flight"""
+        return key in self._futures or key in self._sync_futures
+
+    def in_flight(self) -> int:
+        """Number of keys with a call in flight"""
+        return len(self._futures) + len(self._sync_futures)
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters"""
+        with self._lock:
+            requests = self.calls + self.collapsed
+            return {
+                "calls": self.calls,
+                "collapsed": self.collapsed,
+                "collapse_ratio": round(self.collapsed / requests, 4) if requests else None,
+                "errors": self.errors,
+                "in_flight": len(self._futures) + len(self._sync_futures),
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def single_flight(name: str) -> SingleFlight:
+    """Get (or create) the named single-flight group"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters of every named group"""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in sorted(groups.items())}
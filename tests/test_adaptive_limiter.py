@@ -0,0 +1,88 @@
+"""
+Tests for the token bucket and AIMD concurrency limit.
+"""
+import asyncio
+
+import pytest
+
+from src.forms_api.services.webhook_service import SubscriberThrottled, WebhookSubscriberLimits
+from src.forms_api.utils.adaptive_limiter import AIMDLimit, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reserves_ahead_and_refills():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert [bucket.reserve(), bucket.reserve()] == [0, 0]
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve(max_wait=0.5) is None
+    bucket.refund()
+    assert bucket.reserve(max_wait=0.5) == 0.5
+
+    clock.now = 10
+    assert bucket.tokens == 2
+    assert TokenBucket(rate=0, burst=1).reserve(max_wait=0) == 0
+
+
+def test_aimd_limit_grows_additively_and_halves_on_overload():
+    limit = AIMDLimit(initial=4, minimum=1, maximum=6, slow_seconds=1.0)
+
+    for _ in range(5):  # About one per `limit` successes
+        limit.on_success(0.1)
+    assert limit.limit == 5
+
+    limit.on_overload()
+    assert limit.limit == 2
+    limit.on_success(2.0)  # Slow answers count as overload
+    assert limit.limit == 1
+    limit.on_overload()
+    assert limit.limit == 1
+
+    for _ in range(100):
+        limit.on_success(0.1)
+    assert limit.limit == 6
+
+
+@pytest.mark.asyncio
+async def test_aimd_limit_hands_permits_to_waiters_in_order():
+    limit = AIMDLimit(initial=1, maximum=1)
+    assert await limit.acquire() is True
+    assert await limit.acquire(timeout=0.01) is False
+
+    waiter = asyncio.ensure_future(limit.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert limit.stats()["waiting"] == 1
+    limit.release()
+    assert await waiter is True
+    assert limit.stats() == {"limit": 1, "in_flight": 1, "waiting": 0, "increases": 0, "decreases": 0}
+    limit.release()
+    assert limit.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_subscriber_limits_adapt_to_the_outcome():
+    """Test that 5xx answers lower a receiver's limit and throttling is reported per endpoint."""
+    limits = WebhookSubscriberLimits(rate_per_second=0, initial_concurrency=4, max_wait_seconds=0)
+    url = "https://hooks.example/in?token=secret"
+
+    async with limits.permit(url) as permit:
+        permit.record({"status_code": 503, "success": False})
+    assert limits.stats()["https://hooks.example/in"]["limit"] == 2
+
+    async with limits.permit(url) as first, limits.permit(url) as second:
+        first.record({"status_code": 200, "success": True})
+        second.record({"status_code": 400, "success": False})  # Rejected, not overloaded
+        with pytest.raises(SubscriberThrottled):
+            async with limits.permit(url):
+                pass
+
+    stats = limits.stats()["https://hooks.example/in"]
+    assert (stats["in_flight"], stats["throttled"], stats["decreases"]) == (0, 1, 1)
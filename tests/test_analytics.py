@@ -0,0 +1,167 @@
+"""
+Tests for rollup-backed submission analytics.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import case, create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.db import Base
+from src.forms_api.models import FormSubmission, FormTemplate, SubmissionDailyRollup
+from src.forms_api.services.analytics import (
+    AnalyticsEngine,
+    compact_rollups,
+    get_submission_analytics,
+    get_watermark,
+    rebuild_rollups,
+)
+
+TODAY = date(2024, 3, 10)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a SQLite database with submissions over ten days."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add_all([
+        FormTemplate(id="t1", name="Contact", project_id="p1", schema={}),
+        FormTemplate(id="t2", name="Order", project_id="p1", schema={}),
+        FormTemplate(id="t3", name="Survey", project_id="p2", schema={}),
+    ])
+    for offset in range(10):
+        day = datetime.combine(TODAY - timedelta(days=offset), datetime.min.time())
+        for i, template_id in enumerate(["t1", "t1", "t2", "t3"][: 1 + offset % 4]):
+            session.add(FormSubmission(
+                template_id=template_id,
+                data={},
+                is_processed=i % 2 == 0,
+                created_at=day + timedelta(hours=i + 1)
+            ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def expected_analytics(db, days, template_id=None, project_id=None):
+    """The original full-scan computation"""
+    query = select(
+        func.count(FormSubmission.id),
+        func.sum(case((FormSubmission.is_processed == True, 1), else_=0))  # noqa: E712
+    ).join(FormTemplate).where(
+        FormSubmission.created_at >= datetime.combine(TODAY - timedelta(days=days), datetime.min.time())
+    )
+    if template_id:
+        query = query.where(FormTemplate.id == template_id)
+    elif project_id:
+        query = query.where(FormTemplate.project_id == project_id)
+    total, processed = db.execute(query).one()
+    return total, processed or 0
+
+
+@pytest.mark.parametrize("scope", [{}, {"template_id": "t1"}, {"project_id": "p1"}, {"project_id": "p2"}])
+def test_rollups_match_full_scan(db, scope):
+    """Test that analytics give the same numbers before and after compaction."""
+    before = get_submission_analytics(db, days=7, today=TODAY, **scope)
+    compact_rollups(db, today=TODAY)
+    after = get_submission_analytics(db, days=7, today=TODAY, **scope)
+
+    assert before == after
+    total, processed = expected_analytics(db, 7, **scope)
+    assert after["total_submissions"] == total
+    assert after["processed_submissions"] == processed
+    assert sum(day["count"] for day in after["daily_submissions"]) == total
+
+
+def test_compaction_rolls_up_closed_days_only(db):
+    """Test that compaction covers history up to yesterday and today stays live."""
+    written = compact_rollups(db, today=TODAY)
+
+    assert get_watermark(db) == TODAY
+    assert written == db.query(SubmissionDailyRollup).count()
+    assert db.query(func.max(SubmissionDailyRollup.day)).scalar() == TODAY - timedelta(days=1)
+
+    db.add(FormSubmission(template_id="t1", data={}, created_at=datetime.combine(TODAY, datetime.min.time())))
+    db.commit()
+    analytics = get_submission_analytics(db, days=1, today=TODAY, template_id="t1")
+    assert analytics["daily_submissions"][-1] == {"date": TODAY.isoformat(), "count": 2}
+
+
+def test_recompaction_picks_up_late_changes(db):
+    """Test that reopened days are recomputed and older ones need a rebuild."""
+    compact_rollups(db, today=TODAY)
+    two_days_ago = datetime.combine(TODAY - timedelta(days=2), datetime.min.time())
+    recent = db.query(FormSubmission).filter(
+        FormSubmission.is_processed == False,  # noqa: E712
+        FormSubmission.created_at >= two_days_ago,
+        FormSubmission.created_at < datetime.combine(TODAY, datetime.min.time())
+    ).first()
+    recent.is_processed = True
+    old = FormSubmission(template_id="t3", data={}, created_at=datetime(2024, 2, 1, 12, 0))
+    db.add(old)
+    db.commit()
+
+    compact_rollups(db, today=TODAY + timedelta(days=1), reopen_days=3)
+    analytics = get_submission_analytics(db, days=9, today=TODAY + timedelta(days=1))
+    total, processed = expected_analytics(db, 8)
+    assert analytics["total_submissions"] == total
+    assert analytics["processed_submissions"] == processed
+
+    rebuild_rollups(db, today=TODAY + timedelta(days=1))
+    assert db.query(func.min(SubmissionDailyRollup.day)).scalar() == date(2024, 2, 1)
+
+
+def test_processing_an_old_submission_reopens_its_day(db):
+    """Test that status changes on compacted days show up at once and survive the next compaction."""
+    compact_rollups(db, today=TODAY)
+    old_day = TODAY - timedelta(days=7)
+    old = db.query(FormSubmission).filter(
+        FormSubmission.is_processed == False,  # noqa: E712
+        FormSubmission.created_at >= datetime.combine(old_day, datetime.min.time()),
+        FormSubmission.created_at < datetime.combine(old_day + timedelta(days=1), datetime.min.time())
+    ).first()
+    old.is_processed = True
+    db.commit()
+
+    assert get_watermark(db) == old_day
+    total, processed = expected_analytics(db, 9)
+    assert get_submission_analytics(db, days=9, today=TODAY)["processed_submissions"] == processed
+
+    db.delete(old)
+    db.commit()
+    compact_rollups(db, today=TODAY, reopen_days=0)
+    assert get_watermark(db) == TODAY
+    analytics = get_submission_analytics(db, days=9, today=TODAY)
+    assert (analytics["total_submissions"], analytics["processed_submissions"]) == (total - 1, processed - 1)
+
+
+def test_processing_times_in_one_pass(db):
+    """Test that time-to-process metrics come from the same statement as the counts."""
+    for submission in db.query(FormSubmission).filter(FormSubmission.is_processed == True):  # noqa: E712
+        submission.processed_at = submission.created_at + timedelta(minutes=30)
+    db.commit()
+    compact_rollups(db, today=TODAY)
+
+    analytics = get_submission_analytics(db, days=7, today=TODAY, processing_times=True)
+    total, processed = expected_analytics(db, 7)
+
+    assert analytics["total_submissions"] == total
+    assert analytics["processed_submissions"] == processed
+    assert analytics["time_to_process"]["avg_seconds"] == pytest.approx(1800, abs=1)
+    # Percentiles need PostgreSQL
+    assert analytics["time_to_process"]["p50_seconds"] is None
+
+
+def test_postgres_statement_uses_grouping_sets():
+    """Test that PostgreSQL gets one FILTER/GROUPING SETS statement with percentiles."""
+    from sqlalchemy.dialects import postgresql
+
+    statement = AnalyticsEngine("postgresql").statement(datetime(2024, 1, 1), project_id="p1", processing_times=True)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "GROUPING SETS" in sql
+    assert "FILTER (WHERE" in sql
+    assert sql.count("percentile_cont(") == 3
@@ -0,0 +1,83 @@
+"""
+Tests for the async database stack and async template/submission routes.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.forms_api.async_routes import router as async_router
+from src.forms_api.config import Settings
+from src.forms_api.db import Base, get_async_db
+from src.forms_api import models  # noqa: F401 - register models
+
+
+@pytest_asyncio.fixture
+async def async_client(tmp_path):
+    """Return an HTTP client for an app serving the async routes on SQLite."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'forms.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_router, prefix="/api")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    await engine.dispose()
+
+
+def test_async_database_url_is_derived():
+    """Test that the async driver URL is derived from the sync URL."""
+    settings = Settings(database_url="postgresql://user:pw@db:5432/forms")
+    assert settings.effective_async_database_url == "postgresql+asyncpg://user:pw@db:5432/forms"
+
+    settings = Settings(database_url="sqlite:///./forms.db")
+    assert settings.effective_async_database_url == "sqlite+aiosqlite:///./forms.db"
+
+
+@pytest.mark.asyncio
+async def test_async_template_and_submission_flow(async_client):
+    """Test creating a template, submitting to it and listing submissions."""
+    # Arrange
+    template_payload = {
+        "name": "Contact",
+        "project_id": "test-project",
+        "fields": [{"name": "email", "type": "string", "label": "Email", "required": True}]
+    }
+
+    # Act
+    response = await async_client.post("/api/templates", json=template_payload)
+    assert response.status_code == 200, response.text
+    template = response.json()
+
+    response = await async_client.post(
+        f"/api/templates/{template['id']}/submit",
+        json={"data": {"email": "anna@example.com"}, "submitted_from": "test"}
+    )
+    assert response.status_code == 200, response.text
+
+    templates = (await async_client.get("/api/templates")).json()
+    fetched = (await async_client.get(f"/api/templates/{template['id']}")).json()
+    submissions = (await async_client.get(f"/api/templates/{template['id']}/submissions")).json()
+
+    # Assert
+    assert template["schema"]["required"] == ["email"]
+    assert [t["id"] for t in templates] == [template["id"]]
+    assert fetched["name"] == "Contact"
+    assert len(submissions) == 1
+    assert submissions[0]["data"] == {"email": "anna@example.com"}
+
+
+@pytest.mark.asyncio
+async def test_async_get_missing_template(async_client):
+    """Test that a missing template returns 404."""
+    response = await async_client.get("/api/templates/does-not-exist")
+    assert response.status_code == 404
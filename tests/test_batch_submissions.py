@@ -0,0 +1,96 @@
+"""
+Tests for the bulk submission endpoint.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.forms_api.config import get_settings
+from src.forms_api.db import Base, get_db
+from src.forms_api.models import FormSubmission, FormTemplate
+from src.forms_api.routes import router
+from src.forms_api.services.enhanced_services import EnhancedFormBuilderService
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"email": {"type": "string"}},
+    "required": ["email"]
+}
+
+
+@pytest.fixture
+def session_factory():
+    """Return a session factory for an in-memory SQLite database with one template."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(FormTemplate(id="template-1", name="Contact", project_id="test-project", schema=SCHEMA))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    """Return an HTTP client for the sync routes bound to the SQLite database."""
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def test_batch_reports_status_per_item_across_chunks(session_factory):
+    """Test that every item gets a status in order and valid rows are stored with RETURNING values."""
+    items = [{"data": {"email": f"user{i}@example.com"}, "submitted_from": "kiosk"} for i in range(12)]
+    items[3] = {"data": {"name": "missing email"}}
+    items[10] = {"data": {"email": 42}}
+
+    with session_factory() as db:
+        results = EnhancedFormBuilderService.create_batch_submissions(db, "template-1", iter(items), chunk_size=5)
+
+    assert [r["index"] for r in results] == list(range(12))
+    assert [r["status"] for r in results].count("created") == 10
+    assert results[3]["status"] == "invalid" and results[3]["errors"]
+    assert results[10]["status"] == "invalid"
+
+    with session_factory() as db:
+        stored = db.get(FormSubmission, results[0]["submission_id"])
+        assert stored.data == {"email": "user0@example.com"}
+        assert stored.created_at == results[0]["created_at"]
+        assert db.query(FormSubmission).count() == 10
+
+
+def test_batch_for_unknown_template_is_rejected(session_factory):
+    """Test that an unknown template raises ValueError before anything is written."""
+    with session_factory() as db:
+        with pytest.raises(ValueError):
+            EnhancedFormBuilderService.create_batch_submissions(db, "missing", [{"data": {}}])
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint(client, monkeypatch):
+    """Test the HTTP endpoint summary and the item limit."""
+    payload = {"submissions": [{"data": {"email": "a@example.com"}}, {"data": {}}]}
+
+    response = await client.post("/api/templates/template-1/submissions:batch", json=payload)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["total"], body["created"], body["failed"]) == (2, 1, 1)
+    assert body["results"][0]["submission_id"]
+
+    response = await client.post("/api/templates/missing/submissions:batch", json=payload)
+    assert response.status_code == 404
+
+    monkeypatch.setattr(get_settings(), "batch_submission_max_items", 1)
+    response = await client.post("/api/templates/template-1/submissions:batch", json=payload)
+    assert response.status_code == 413
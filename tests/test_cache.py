@@ -0,0 +1,86 @@
+"""
+Tests for the bounded in-process cache subsystem.
+"""
+import time
+
+import pytest
+
+from src.forms_api.models import FormTemplate
+from src.forms_api.services.enhanced_services import EnhancedFormBuilderService
+from src.forms_api.utils.cache import CacheRegistry, TTLCache, estimate_size
+
+
+def test_memory_budget_evicts_least_recently_used():
+    """Test that entries are evicted once the byte budget is exceeded."""
+    cache = TTLCache(maxsize=100, ttl=60, max_bytes=250, sizeof=lambda value: 100)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["bytes"] == 200
+    assert stats["evictions"] == 1
+
+
+def test_oversized_values_are_not_stored():
+    """Test that a value larger than the whole budget is skipped."""
+    cache = TTLCache(max_bytes=10)
+    cache.set("big", "x" * 1000)
+
+    assert cache.get("big") is None
+    assert estimate_size({"key": ["x" * 100]}) > 100
+
+
+def test_sweep_and_counters():
+    """Test that sweeping drops expired entries and counters add up."""
+    now = [0.0]
+    cache = TTLCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.get("missing")
+
+    now[0] = 10
+    assert cache.sweep() == 1
+    assert len(cache) == 1
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_registry_sweeper_runs_in_background():
+    """Test that the registry sweeps registered caches on its own thread."""
+    registry = CacheRegistry()
+    cache = registry.register("short", TTLCache(ttl=0.01))
+    cache.set("a", 1)
+
+    registry.start_sweeper(0.02)
+    try:
+        deadline = time.monotonic() + 2
+        while len(cache) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        registry.stop_sweeper()
+
+    assert len(cache) == 0
+    assert registry.stats()["short"]["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_validation_results_are_cached_per_schema_version():
+    """Test that cached validation results are reused, but not across schema changes."""
+    EnhancedFormBuilderService.clear_caches()
+    template = FormTemplate(id="template-1", schema={"type": "object", "required": ["email"]})
+
+    hits = EnhancedFormBuilderService._validation_cache.stats()["hits"]
+    assert (await EnhancedFormBuilderService.validate_submission_data_async(template, {}))[0] is False
+    assert (await EnhancedFormBuilderService.validate_submission_data_async(template, {}))[0] is False
+    assert EnhancedFormBuilderService._validation_cache.stats()["hits"] == hits + 1
+
+    template.schema = {"type": "object"}
+    assert (await EnhancedFormBuilderService.validate_submission_data_async(template, {}))[0] is True
+    EnhancedFormBuilderService.clear_caches()
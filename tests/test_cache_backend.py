@@ -0,0 +1,279 @@
+"""
+Tests for the shared cache backends and the two-tier cache.
+"""
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from src.forms_api.services.cache_backend import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+    TieredCache,
+    create_cache_backend,
+)
+from src.forms_api.utils.cache import TTLCache
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Minimal Redis-protocol server covering the commands the backend uses."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.values = {}
+        self.subscribers = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def drop(self):
+        """Close every client connection, as a server restart would"""
+        with self.lock:
+            connections, self.connections = self.connections, set()
+            self.subscribers.clear()
+        for connection in connections:
+            connection.shutdown(socket.SHUT_RDWR)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def write(self, data: bytes):
+        with self.server.lock:
+            self.wfile.write(data)
+
+    @staticmethod
+    def bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.request)
+        while True:
+            try:
+                args = self.read_command()
+            except OSError:
+                return
+            if args is None:
+                return
+            command = args[0].upper()
+            if command == b"GET":
+                with server.lock:
+                    value = server.values.get(args[1])
+                self.write(self.bulk(value))
+            elif command == b"SET":
+                with server.lock:
+                    server.values[args[1]] = args[2]
+                self.write(b"+OK\r\n")
+            elif command == b"DEL":
+                with server.lock:
+                    removed = server.values.pop(args[1], None) is not None
+                self.write(b":%d\r\n" % removed)
+            elif command in (b"INCR", b"INCRBY"):
+                with server.lock:
+                    value = int(server.values.get(args[1], b"0")) + (int(args[2]) if len(args) > 2 else 1)
+                    server.values[args[1]] = str(value).encode()
+                self.write(b":%d\r\n" % value)
+            elif command == b"PUBLISH":
+                message = b"*3\r\n" + self.bulk(b"message") + self.bulk(args[1]) + self.bulk(args[2])
+                with server.lock:
+                    subscribers = [handler for handler, channel in server.subscribers if channel == args[1]]
+                for handler in subscribers:
+                    handler.write(message)
+                self.write(b":%d\r\n" % len(subscribers))
+            elif command == b"SUBSCRIBE":
+                with server.lock:
+                    server.subscribers.append((self, args[1]))
+                self.write(b"*3\r\n" + self.bulk(b"subscribe") + self.bulk(args[1]) + b":1\r\n")
+            elif command == b"CLIENT":  # Client name and library info sent on connect
+                self.write(b"+OK\r\n")
+            else:
+                self.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_backend(request, tmp_path):
+    """Factory for backends that two 'replicas' can share"""
+    backends = []
+    server = FakeRedisServer() if request.param == "redis" else None
+    memory = MemoryCacheBackend()
+
+    def factory():
+        if request.param == "memory":
+            return memory
+        if request.param == "sqlite":
+            backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), poll_interval=0.02)
+        else:
+            backend = RedisCacheBackend(server.url)
+        backends.append(backend)
+        return backend
+
+    yield factory
+    for backend in backends:
+        backend.close()
+    if server is not None:
+        server.stop()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_cold_replica_reads_shared_tier(make_backend):
+    """Test that an L1 miss is filled from what another replica stored."""
+    replica_a = TieredCache("schemas", TTLCache(ttl=60), make_backend())
+    replica_b = TieredCache("schemas", TTLCache(ttl=60), make_backend())
+
+    replica_a.set("t1", {"type": "object"})
+
+    assert replica_b.get("t1") == {"type": "object"}
+    assert replica_b.l2_hits == 1
+    assert replica_b.l1.get("t1") == {"type": "object"}
+
+
+def test_invalidations_reach_other_replicas(make_backend):
+    """Test that delete and clear drop the other replica's L1 copies."""
+    replica_a = TieredCache("schemas", TTLCache(ttl=60), make_backend())
+    replica_b = TieredCache("schemas", TTLCache(ttl=60), make_backend())
+    replica_a.set("t1", 1)
+    replica_a.set("t2", 2)
+    assert replica_b.get("t1") == 1
+    assert replica_b.get("t2") == 2
+
+    replica_a.delete("t1")
+    assert wait_for(lambda: replica_b.l1.get("t1") is None)
+    assert replica_b.get("t1") is None
+
+    replica_a.clear()
+    assert wait_for(lambda: replica_b.l1.get("t2") is None)
+    # The shared entry is orphaned by the generation bump
+    assert replica_b.get("t2") is None
+    assert replica_a.get("t2") is None
+
+
+def test_unavailable_backend_counts_as_miss():
+    """Test that backend errors never reach the caller."""
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0", timeout=0.2)
+    cache = TieredCache("schemas", TTLCache(ttl=60), backend)
+
+    cache.set("t1", 1)
+    assert cache.get("t1") == 1  # Still served from L1
+    cache.l1.clear()
+    assert cache.get("t1") is None
+    cache.clear()
+
+    assert cache.stats()["l2"]["errors"] >= 2
+    backend.close()
+
+
+def test_redis_reconnects_after_server_drop(redis_server):
+    """Test that commands and subscriptions are re-established transparently."""
+    backend = RedisCacheBackend(redis_server.url)
+    messages = []
+    backend.subscribe("events", messages.append)
+    backend.set("k", b"v")
+    redis_server.drop()
+
+    assert backend.get("k") == b"v"
+    assert backend.incr("n") == 1
+    # The subscriber is told it may have missed messages, then receives new ones
+    assert wait_for(lambda: None in messages)
+    assert wait_for(lambda: redis_server.subscribers)
+    backend.publish("events", "hello")
+    assert wait_for(lambda: "hello" in messages)
+    backend.close()
+
+
+class CountingBackend(MemoryCacheBackend):
+    """Memory backend that records reads and can be slowed down"""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.reads = []
+
+    def get(self, key):
+        self.reads.append(key)
+        time.sleep(self.delay)
+        return super().get(key)
+
+
+def test_miss_does_not_read_the_generation_each_time():
+    """Test that the generation is cached locally, so a miss costs one L2 read."""
+    backend = CountingBackend()
+    cache = TieredCache("schemas", TTLCache(ttl=60), backend)
+
+    for key in ("t1", "t2", "t3"):
+        assert cache.get(key) is None
+    assert backend.reads == ["schemas:generation", "schemas:0:t1", "schemas:0:t2", "schemas:0:t3"]
+
+
+@pytest.mark.asyncio
+async def test_async_reads_do_not_block_the_event_loop():
+    """Test that aget/aset leave the event loop free while the shared tier is slow."""
+    backend = CountingBackend(delay=0.3)
+    cache = TieredCache("schemas", TTLCache(ttl=60), backend)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        await cache.aset("t1", 1)
+        cache.l1.clear()
+        assert await cache.aget("t1") == 1
+    finally:
+        task.cancel()
+    assert ticks >= 20
+
+
+def test_create_cache_backend():
+    """Test backend selection from settings values."""
+    assert create_cache_backend("none") is None
+    assert isinstance(create_cache_backend("memory"), MemoryCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("redis")
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached")
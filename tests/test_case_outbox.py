@@ -0,0 +1,236 @@
+"""
+Tests for the ESB case outbox and dispatcher.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.db import Base, get_db
+from src.forms_api.models import EsbCaseOutbox, FormSubmission
+from src.forms_api.routes import router
+from src.forms_api.services.case_outbox import (
+    CREATED,
+    FAILED,
+    PENDING,
+    CaseDispatcher,
+    enqueue_case,
+    get_case_status,
+    retry_delay,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class FakeESB:
+    """create_case stand-in that fails a number of times, then creates one case per idempotency key."""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or httpx.ConnectError("ESB unreachable")
+        self.calls = []
+        self.cases = {}
+
+    async def create_case(self, account_id, customer_number, customer_code, description, idempotency_key=None):
+        self.calls.append(idempotency_key)
+        if len(self.calls) <= self.failures:
+            raise self.error
+        case = self.cases.setdefault(idempotency_key, {"caseId": f"CASE-{len(self.cases) + 1}"})
+        return case
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def submit(session_factory, clock):
+    """Store a submission and its outbox row in one transaction, like the B2B endpoint"""
+    with session_factory() as db:
+        submission = FormSubmission(template_id="t1", data={"customerNumber": "1411768"})
+        db.add(submission)
+        enqueue_case(db, submission, "acc-1", "1411768", "DOJ", "Broken mower")
+        db.commit()
+        entry = get_case_status(db, submission.id)
+        entry.next_attempt_at = clock()
+        db.commit()
+        return submission.id
+
+
+def case_of(session_factory, submission_id):
+    with session_factory() as db:
+        return get_case_status(db, submission_id)
+
+
+def make_dispatcher(session_factory, esb, clock, **options):
+    return CaseDispatcher(
+        session_factory=session_factory, create_case=esb.create_case, clock=clock,
+        retry_base_seconds=10, retry_max_seconds=60, **options
+    )
+
+
+def test_outbox_row_is_written_with_the_submission(session_factory):
+    """Test that an uncommitted submission leaves no outbox row behind."""
+    with session_factory() as db:
+        submission = FormSubmission(template_id="t1", data={})
+        db.add(submission)
+        enqueue_case(db, submission, "acc-1", "1411768", "DOJ", "Broken mower")
+        db.rollback()
+
+    with session_factory() as db:
+        assert db.query(EsbCaseOutbox).count() == 0
+        assert db.query(FormSubmission).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_creates_case(session_factory):
+    """Test that a due case is sent once and its case id stored."""
+    clock, esb = Clock(), FakeESB()
+    submission_id = submit(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, esb, clock)
+
+    assert await dispatcher.dispatch_once() == 1
+    assert await dispatcher.dispatch_once() == 0
+
+    case = case_of(session_factory, submission_id)
+    assert (case.status, case.case_id, case.attempts) == (CREATED, "CASE-1", 1)
+    assert esb.calls == [f"b2b-case-{submission_id}"]
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff_and_the_same_key(session_factory):
+    """Test exponential retry delays and that every attempt sends the same idempotency key."""
+    clock, esb = Clock(), FakeESB(failures=2)
+    submission_id = submit(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, esb, clock)
+
+    await dispatcher.dispatch_once()
+    case = case_of(session_factory, submission_id)
+    assert (case.status, case.attempts) == (PENDING, 1)
+    assert "unreachable" in case.last_error
+
+    clock.advance(9)
+    assert await dispatcher.dispatch_once() == 0
+    clock.advance(1)
+    assert await dispatcher.dispatch_once() == 1
+    clock.advance(19)
+    assert await dispatcher.dispatch_once() == 0
+    clock.advance(1)
+    assert await dispatcher.dispatch_once() == 1
+
+    case = case_of(session_factory, submission_id)
+    assert (case.status, case.case_id, case.attempts) == (CREATED, "CASE-1", 3)
+    assert len(set(esb.calls)) == 1
+    assert dispatcher.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts_or_on_client_errors(session_factory):
+    """Test that a case is marked failed when retrying cannot help."""
+    clock = Clock()
+    first = submit(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, FakeESB(failures=10), clock, max_attempts=2)
+    await dispatcher.dispatch_once()
+    clock.advance(10)
+    await dispatcher.dispatch_once()
+    assert case_of(session_factory, first).status == FAILED
+
+    rejected = httpx.HTTPStatusError(
+        "bad request", request=httpx.Request("POST", "http://esb/cases"), response=httpx.Response(400)
+    )
+    second = submit(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, FakeESB(failures=1, error=rejected), clock)
+    await dispatcher.dispatch_once()
+    case = case_of(session_factory, second)
+    assert (case.status, case.attempts) == (FAILED, 1)
+
+
+def test_claimed_rows_are_leased(session_factory):
+    """Test that a claimed row is not claimed again until its lease runs out."""
+    clock = Clock()
+    submission_id = submit(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, FakeESB(), clock, lease_seconds=120)
+
+    assert len(dispatcher.claim()) == 1
+    assert dispatcher.claim() == []
+    clock.advance(120)
+    assert [entry["submission_id"] for entry in dispatcher.claim()] == [submission_id]
+
+
+def test_retry_delay_is_capped():
+    assert [retry_delay(attempts, 10, 60) for attempts in (1, 2, 3, 4, 5)] == [10, 20, 40, 60, 60]
+
+
+@pytest.mark.asyncio
+async def test_b2b_endpoint_queues_case_and_status_is_pollable(session_factory, monkeypatch):
+    """Test that the endpoint returns before the ESB is called and the case id can be polled."""
+    async def validate(customer_number, customer_code):
+        return "acc-1"
+
+    monkeypatch.setattr("src.forms_api.routes.mock_esb_service.validate_customer", validate)
+    monkeypatch.setattr("src.forms_api.routes.esb_service.validate_customer", validate)
+
+    def override_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = override_db
+    esb = FakeESB()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/esb/b2b-support", json={"customer_number": "1411768", "description": "Broken mower"}
+        )
+        body = response.json()
+        assert body["success"] is True
+        assert (body["case_id"], body["case_status"]) == (None, PENDING)
+        assert esb.calls == []
+
+        status = await client.get(f"/api/esb/b2b-support/{body['submission_id']}/case")
+        assert status.json()["status"] == PENDING
+
+        await CaseDispatcher(session_factory=session_factory, create_case=esb.create_case).dispatch_once()
+
+        status = (await client.get(f"/api/esb/b2b-support/{body['submission_id']}/case")).json()
+        assert (status["status"], status["case_id"]) == (CREATED, "CASE-1")
+
+        missing = await client.get("/api/esb/b2b-support/unknown/case")
+        assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_background_dispatcher_is_woken_by_notify(session_factory):
+    """Test that a running dispatcher sends a new case without waiting for its interval."""
+    esb = FakeESB()
+    dispatcher = CaseDispatcher(session_factory=session_factory, create_case=esb.create_case)
+    dispatcher.start(interval=60)
+    try:
+        await asyncio.sleep(0.05)
+        submission_id = submit(session_factory, lambda: datetime.now(timezone.utc))
+        dispatcher.notify()
+        for _ in range(50):
+            if case_of(session_factory, submission_id).status == CREATED:
+                break
+            await asyncio.sleep(0.02)
+        assert case_of(session_factory, submission_id).status == CREATED
+    finally:
+        await dispatcher.stop()
+    assert dispatcher.stats()["running"] is False
@@ -0,0 +1,254 @@
+"""
+Tests for the circuit breaker and adaptive timeouts.
+"""
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.forms_api.esb_service import esb_breaker
+from src.forms_api.routes import query_husqvarna_customer
+from src.forms_api.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **options):
+    options = {"minimum_calls": 4, "window_seconds": 10, "open_seconds": 5, "min_latency_samples": 5, **options}
+    return CircuitBreaker("test", clock=clock, **options)
+
+
+async def succeed(timeout):
+    return "ok"
+
+
+async def fail(timeout):
+    raise httpx.ConnectError("refused")
+
+
+async def run(breaker, fn):
+    try:
+        return await breaker.call(fn)
+    except httpx.HTTPError:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_opens_on_error_rate_and_rejects_fast():
+    """Test that the circuit opens once the failure rate is reached and then rejects calls."""
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    for fn in (succeed, fail, succeed):
+        await run(breaker, fn)
+    assert breaker.state == CLOSED  # Fewer than minimum_calls
+
+    await run(breaker, fail)
+    assert breaker.state == OPEN
+
+    calls = []
+
+    async def record(timeout):
+        calls.append(timeout)
+
+    with pytest.raises(CircuitOpenError) as error:
+        await breaker.call(record)
+    assert calls == []
+    assert error.value.retry_after == pytest.approx(5)
+    assert breaker.snapshot()["rejected_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_outcomes_outside_the_window_are_forgotten():
+    """Test that old failures no longer count towards the rate."""
+    clock = Clock()
+    breaker = make_breaker(clock)
+
+    for _ in range(3):
+        await run(breaker, fail)
+    clock.now += 11
+    await run(breaker, fail)
+
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_or_reopens():
+    """Test that one trial call after the open period decides the next state."""
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        await run(breaker, fail)
+
+    clock.now += 5
+    assert breaker.state == HALF_OPEN
+    await run(breaker, fail)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+    clock.now += 5
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_open_the_circuit():
+    """Test that an upstream answering too slowly trips the circuit like one that fails."""
+    clock = Clock()
+    breaker = make_breaker(clock, slow_call_seconds=2, slow_call_rate_threshold=0.75)
+
+    async def slow(timeout):
+        clock.now += 3
+        return "late"
+
+    await breaker.call(succeed)
+    for _ in range(2):
+        assert await breaker.call(slow) == "late"
+    assert breaker.state == CLOSED
+
+    await breaker.call(slow)
+    assert breaker.state == OPEN  # 3 of 4 calls were slow
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_count_as_failures():
+    """Test that errors rejected by is_failure leave the circuit closed."""
+    clock = Clock()
+    breaker = make_breaker(clock, is_failure=lambda error: not isinstance(error, ValueError))
+
+    async def bad_input(timeout):
+        raise ValueError("bad customer number")
+
+    for _ in range(6):
+        with pytest.raises(ValueError):
+            await breaker.call(bad_input)
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_timeout_adapts_to_p99_latency():
+    """Test that the timeout follows p99 latency times the multiplier, within bounds."""
+    clock = Clock()
+    breaker = make_breaker(clock, min_timeout=0.5, max_timeout=10, timeout_multiplier=2)
+    seen = []
+
+    def answering_in(seconds):
+        async def call(timeout):
+            seen.append(timeout)
+            clock.now += seconds
+        return call
+
+    for _ in range(4):
+        await breaker.call(answering_in(0.2))
+    assert breaker.timeout() == 10  # Too few samples yet
+
+    await breaker.call(answering_in(1.5))
+    assert breaker.timeout() == pytest.approx(3.0)
+    assert seen[:5] == [10] * 5
+
+    for _ in range(5):
+        await breaker.call(answering_in(0.1))
+    assert breaker.timeout() == pytest.approx(3.0)  # p99 is still the 1.5 s outlier
+
+    fast = make_breaker(clock, min_timeout=0.5, timeout_multiplier=2)
+    for _ in range(5):
+        await fast.call(answering_in(0.01))
+    assert fast.timeout() == 0.5
+
+
+@pytest.mark.asyncio
+async def test_timeout_follows_a_latency_step_up():
+    """Test that an upstream that becomes slower but stays healthy is not timed out forever."""
+    clock = Clock()
+    breaker = make_breaker(clock, min_timeout=1, max_timeout=10, timeout_multiplier=2, min_latency_samples=20)
+    latency = 0.2
+
+    async def upstream(timeout):
+        if latency > timeout:
+            clock.now += timeout
+            raise httpx.ReadTimeout("timed out")
+        clock.now += latency
+
+    for _ in range(20):
+        await breaker.call(upstream)
+    assert breaker.timeout() == 1
+
+    latency = 1.5
+    outcomes = []
+    for _ in range(400):
+        try:
+            await breaker.call(upstream)
+            outcomes.append("ok")
+        except httpx.ReadTimeout:
+            outcomes.append("timeout")
+        except CircuitOpenError:
+            outcomes.append("rejected")
+            clock.now += 1
+
+    assert breaker.state == CLOSED
+    assert breaker.timeout() == pytest.approx(3.0)
+    assert outcomes[-100:] == ["ok"] * 100
+    assert outcomes.count("timeout") < 5
+
+
+class FailingClient:
+    """ESB client stand-in that counts requests and refuses connections."""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def request(self, method, url, **kwargs):
+        self.requests += 1
+        raise httpx.ConnectError("refused")
+
+
+@pytest.mark.asyncio
+async def test_husqvarna_proxy_falls_back_instantly_while_open(monkeypatch):
+    """Test that the proxy stops calling a failing API and answers from the local check."""
+    client = FailingClient()
+    monkeypatch.setattr("src.forms_api.esb_service.http_clients.get", lambda name: client)
+    esb_breaker.reset()
+
+    try:
+        for _ in range(esb_breaker.minimum_calls):
+            result = await query_husqvarna_customer("http://esb.test", "key", "1411768", "DOJ")
+            assert result["source"] == "format_validation"
+        assert esb_breaker.state == OPEN
+
+        result = await query_husqvarna_customer("http://esb.test", "key", "1411768", "DOJ")
+        assert result["source"] == "format_validation"
+        assert client.requests == esb_breaker.minimum_calls
+    finally:
+        esb_breaker.reset()
+
+
+@pytest.mark.asyncio
+async def test_health_reports_circuit_states():
+    """Test that /health shows circuit states and is degraded while one is open."""
+    from src.forms_api.app import app
+
+    async def get_health():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/health")
+        assert response.status_code == 200
+        return response.json()
+
+    esb_breaker.reset()
+    health = await get_health()
+    assert health["status"] == "healthy"
+    assert health["circuits"]["esb"]["state"] == CLOSED
+
+    with esb_breaker._lock:
+        esb_breaker._open(esb_breaker._clock())
+    try:
+        health = await get_health()
+        assert health["status"] == "degraded"
+        assert health["circuits"]["esb"]["state"] == OPEN
+        assert health["circuits"]["esb"]["retry_after_seconds"] > 0
+    finally:
+        esb_breaker.reset()
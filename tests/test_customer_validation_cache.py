@@ -0,0 +1,164 @@
+"""
+Tests for the customer validation cache.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.forms_api.routes import router
+from src.forms_api.services.cache_backend import MemoryCacheBackend
+from src.forms_api.services.customer_validation_cache import CustomerValidationCache, customer_validation_cache
+
+
+class Upstream:
+    """Fake upstream lookup that counts calls."""
+
+    def __init__(self, result="account-1", delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def cache(clock):
+    return CustomerValidationCache(positive_ttl=60, negative_ttl=5, stale_ttl=120, clock=lambda: clock[0])
+
+
+@pytest.mark.asyncio
+async def test_positive_and_negative_ttls(cache, clock):
+    """Test that found and not-found results expire after their own TTLs."""
+    found, missing = Upstream("account-1"), Upstream(None)
+
+    for _ in range(3):
+        assert await cache.get_or_load(("esb", "123", "DOJ"), found) == "account-1"
+        assert await cache.get_or_load(("esb", "999", "DOJ"), missing) is None
+    assert (found.calls, missing.calls) == (1, 1)
+
+    clock[0] += 10
+    assert await cache.get_or_load(("esb", "999", "DOJ"), missing) is None
+    assert await cache.get_or_load(("esb", "123", "DOJ"), found) == "account-1"
+    assert (found.calls, missing.calls) == (1, 2)
+    assert cache.stats()["negative_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing(cache, clock):
+    """Test stale-while-revalidate: the stale value is returned and refreshed once."""
+    upstream = Upstream("account-1", delay=0.01)
+    await cache.get_or_load(("esb", "123", "DOJ"), upstream)
+
+    clock[0] += 90
+    upstream.result = "account-2"
+    assert await cache.get_or_load(("esb", "123", "DOJ"), upstream) == "account-1"
+    assert await cache.get_or_load(("esb", "123", "DOJ"), upstream) == "account-1"
+    await asyncio.sleep(0.05)
+
+    assert upstream.calls == 2
+    assert await cache.get_or_load(("esb", "123", "DOJ"), upstream) == "account-2"
+    assert cache.stats()["background_refreshes"] == 1
+
+    clock[0] += 1000
+    assert await cache.get_or_load(("esb", "123", "DOJ"), upstream) == "account-2"
+    assert upstream.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_coalesced(cache):
+    """Test that concurrent lookups of one key make a single upstream call."""
+    upstream = Upstream("account-1", delay=0.05)
+
+    results = await asyncio.gather(*(cache.get_or_load(("esb", "123", "DOJ"), upstream) for _ in range(10)))
+
+    assert results == ["account-1"] * 10
+    assert upstream.calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+class SlowBackend(MemoryCacheBackend):
+    """Shared tier answering after a delay, like a distant Redis."""
+
+    def get(self, key):
+        time.sleep(0.2)
+        return super().get(key)
+
+    def set(self, key, value, ttl=None):
+        time.sleep(0.2)
+        super().set(key, value, ttl)
+
+
+@pytest.mark.asyncio
+async def test_slow_shared_tier_does_not_block_the_event_loop(cache):
+    """Test that L2 reads and writes run off the event loop."""
+    cache.entries.attach(SlowBackend())
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        assert await cache.get_or_load(("esb", "123", "DOJ"), Upstream("account-1")) == "account-1"
+    finally:
+        task.cancel()
+    assert ticks >= 20
+    assert cache.entries.l2_misses == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_and_uncacheable_results_are_not_cached(cache):
+    """Test that upstream errors reach every waiter and are retried on the next lookup."""
+    failing = Upstream(RuntimeError("ESB down"), delay=0.01)
+    results = await asyncio.gather(
+        *(cache.get_or_load(("esb", "123", "DOJ"), failing) for _ in range(3)),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failing.calls == 1
+
+    fallback = Upstream({"valid": True, "source": "local_validation"})
+    for _ in range(2):
+        await cache.get_or_load(
+            ("husqvarna", "123", "DOJ"), fallback, cacheable=lambda result: result["source"] == "husqvarna_api"
+        )
+    assert fallback.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_husqvarna_proxy_uses_cache(monkeypatch):
+    """Test that repeated proxy validations of one customer call the API once."""
+    calls = []
+
+    async def fake_query(base_url, api_key, customer_number, customer_code):
+        calls.append(customer_number)
+        return {"valid": True, "source": "husqvarna_api", "customer_number": customer_number, "account_id": "acc"}
+
+    monkeypatch.setattr("src.forms_api.routes.query_husqvarna_customer", fake_query)
+    customer_validation_cache.clear()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(3):
+            response = await client.get("/api/husqvarna/validate-customer", params={"customer_number": "1411768"})
+            assert response.json()["valid"] is True
+
+    assert calls == ["1411768"]
+    customer_validation_cache.clear()
@@ -0,0 +1,84 @@
+"""
+Tests for streaming submission exports.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.db import Base
+from src.forms_api.models import FormSubmission, FormTemplate
+from src.forms_api.services.export_service import export_submissions, flatten_schema_columns
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "address": {
+            "type": "object",
+            "properties": {"city": {"type": "string"}, "zip": {"type": "string"}}
+        },
+        "tags": {"type": "array"}
+    }
+}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Return a session factory bound to a SQLite database with 7 submissions."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    with factory() as db:
+        db.add(FormTemplate(id="template-1", name="Contact", project_id="test-project", schema=SCHEMA))
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(7):
+            db.add(FormSubmission(
+                id=f"sub-{i}",
+                template_id="template-1",
+                data={"name": f"Person {i}", "address": {"city": "Huskvarna"}, "tags": ["a", "b"]},
+                created_at=start + timedelta(minutes=i)
+            ))
+        db.commit()
+
+    yield factory
+    engine.dispose()
+
+
+def test_schema_columns_are_flattened():
+    """Test that nested object properties become dotted columns."""
+    assert flatten_schema_columns(SCHEMA) == ["name", "address.city", "address.zip", "tags"]
+    assert flatten_schema_columns({}) == []
+
+
+def test_ndjson_export_streams_in_batches(session_factory):
+    """Test that NDJSON is emitted one chunk per fetched batch, oldest first."""
+    chunks = list(export_submissions("template-1", SCHEMA, "ndjson", batch_size=3, session_factory=session_factory))
+
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+    assert [r["id"] for r in records] == [f"sub-{i}" for i in range(7)]
+    assert records[0]["data"]["address"] == {"city": "Huskvarna"}
+
+
+def test_csv_export_uses_schema_columns(session_factory):
+    """Test that CSV rows follow the flattened schema columns."""
+    body = b"".join(export_submissions("template-1", SCHEMA, "csv", batch_size=5, session_factory=session_factory))
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+
+    assert len(rows) == 7
+    assert rows[0]["name"] == "Person 0"
+    assert rows[0]["address.city"] == "Huskvarna"
+    assert rows[0]["address.zip"] == ""
+    assert json.loads(rows[0]["tags"]) == ["a", "b"]
+
+
+def test_unknown_format_is_rejected():
+    """Test that unsupported formats raise ValueError."""
+    with pytest.raises(ValueError):
+        export_submissions("template-1", SCHEMA, "xml")
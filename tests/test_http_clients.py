@@ -0,0 +1,142 @@
+"""
+Tests for the shared pooled HTTP clients.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.forms_api.services.http_clients import HTTPClientRegistry
+
+
+class KeepAliveServer:
+    """HTTP/1.1 server on localhost that keeps connections open and tracks concurrency."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                await asyncio.sleep(self.delay)
+                self.active -= 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 11\r\n\r\n{\"ok\":true}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def make_registry(**overrides) -> HTTPClientRegistry:
+    settings = SimpleNamespace(
+        http_client_max_connections=100,
+        http_client_max_keepalive_connections=20,
+        http_client_keepalive_expiry_seconds=30.0,
+        http_client_max_connections_per_host=20,
+        http_client_timeout_seconds=5.0,
+        http_client_http2=False,
+    )
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    registry = HTTPClientRegistry(settings_factory=lambda: settings)
+    registry.register("upstream")
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused():
+    """Test that sequential calls share one connection and the metrics say so."""
+    registry = make_registry()
+    async with KeepAliveServer() as server:
+        for _ in range(5):
+            response = await registry.get("upstream").get(f"{server.url}/accounts")
+            assert response.json() == {"ok": True}
+        await registry.aclose()
+
+    stats = registry.stats()["upstream"]
+    assert server.connections == 1
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+    assert stats["reuse_ratio"] == 0.8
+    assert stats["in_flight"] == {}
+
+
+@pytest.mark.asyncio
+async def test_per_host_connection_cap():
+    """Test that concurrent calls to one host wait for a free slot."""
+    registry = make_registry(http_client_max_connections_per_host=2)
+    async with KeepAliveServer(delay=0.05) as server:
+        client = registry.get("upstream")
+        responses = await asyncio.gather(*(client.get(server.url) for _ in range(6)))
+        await registry.aclose()
+
+    assert all(response.status_code == 200 for response in responses)
+    assert server.max_active == 2
+    assert server.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_host_slot_honours_the_pool_timeout():
+    """Test that a request queued behind a busy host gives up after the pool timeout."""
+    registry = make_registry(http_client_max_connections_per_host=1)
+    async with KeepAliveServer(delay=0.5) as server:
+        client = registry.get("upstream")
+        busy = asyncio.ensure_future(client.get(server.url))
+        await asyncio.sleep(0.05)
+        with pytest.raises(httpx.PoolTimeout):
+            await client.get(server.url, timeout=httpx.Timeout(5.0, pool=0.1))
+        assert (await busy).status_code == 200
+        # The abandoned wait did not keep the slot
+        assert (await client.get(server.url)).status_code == 200
+        await registry.aclose()
+
+    stats = registry.stats()["upstream"]
+    assert stats["errors"] == 1
+    assert stats["waiting_for_connection"] == {}
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_and_recreated_after_close():
+    """Test that get returns one client per loop until it is closed."""
+    registry = make_registry()
+    client = registry.get("upstream")
+    assert registry.get("upstream") is client
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.get("upstream") is not client
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http2_falls_back_without_h2(monkeypatch):
+    """Test that HTTP_CLIENT_HTTP2 without the h2 package still yields a working client."""
+    monkeypatch.setattr("src.forms_api.services.http_clients.http2_available", lambda: False)
+    registry = make_registry(http_client_http2=True)
+    async with KeepAliveServer() as server:
+        response = await registry.get("upstream").get(server.url)
+        await registry.aclose()
+
+    assert response.status_code == 200
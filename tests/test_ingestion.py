@@ -0,0 +1,170 @@
+"""
+Tests for the write-behind submission ingestion journal.
+"""
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.db import Base
+from src.forms_api.models import FormSubmission, FormTemplate
+from src.forms_api.services.ingestion import SubmissionIngestor, SubmissionJournal
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Return a session factory bound to a fresh SQLite database with one template."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    with factory() as db:
+        db.add(FormTemplate(id="template-1", name="Contact", project_id="test-project", schema={}))
+        db.commit()
+
+    yield factory
+    engine.dispose()
+
+
+def make_ingestor(session_factory, journal_dir, **kwargs):
+    kwargs.setdefault("batch_size", 100)
+    kwargs.setdefault("flush_interval", 60)
+    kwargs.setdefault("fsync", False)
+    return SubmissionIngestor(session_factory, str(journal_dir), **kwargs)
+
+
+def count_submissions(session_factory):
+    with session_factory() as db:
+        return db.query(FormSubmission).count()
+
+
+def test_enqueue_is_flushed_in_batches(session_factory, tmp_path):
+    """Test that queued submissions reach the database on flush."""
+    # Arrange
+    ingestor = make_ingestor(session_factory, tmp_path / "journal")
+    ingestor.start()
+
+    # Act
+    with session_factory() as db:
+        acknowledged = [
+            ingestor.enqueue(db, "template-1", {"n": i}, submitted_from="test")
+            for i in range(250)
+        ]
+    ingestor.stop()
+
+    # Assert
+    assert count_submissions(session_factory) == 250
+    with session_factory() as db:
+        stored = db.get(FormSubmission, acknowledged[0].id)
+        assert stored.data == {"n": 0}
+        assert stored.submitted_from == "test"
+    assert list((tmp_path / "journal").rglob("segment-*.jsonl")) == []
+
+
+def test_unknown_template_is_rejected(session_factory, tmp_path):
+    """Test that submissions for missing templates are not acknowledged."""
+    ingestor = make_ingestor(session_factory, tmp_path / "journal")
+    ingestor.start()
+    try:
+        with session_factory() as db, pytest.raises(ValueError):
+            ingestor.enqueue(db, "missing-template", {"n": 1})
+    finally:
+        ingestor.stop()
+
+
+@pytest.mark.parametrize("leftover_dir", ["worker-0", "worker-3", "."])
+def test_crash_recovery_replays_journal(session_factory, tmp_path, leftover_dir):
+    """Test that segments left behind by a crash, or by a worker that is gone, are replayed on startup."""
+    # Arrange - a segment with two records, one already committed, and a torn write
+    journal_dir = tmp_path / "journal"
+    (journal_dir / leftover_dir).mkdir(parents=True)
+    records = [
+        {"id": f"sub-{i}", "template_id": "template-1", "data": {"n": i},
+         "submitted_from": None, "ip_address": None, "created_at": "2025-06-01T12:00:00+00:00"}
+        for i in range(2)
+    ]
+    with open(journal_dir / leftover_dir / "segment-000000000001.jsonl", "w") as segment:
+        for record in records:
+            segment.write(json.dumps(record) + "\n")
+        segment.write('{"id": "sub-torn", "templ')
+
+    with session_factory() as db:
+        db.add(FormSubmission(id="sub-0", template_id="template-1", data={"n": 0}))
+        db.commit()
+
+    # Act
+    ingestor = make_ingestor(session_factory, journal_dir)
+    ingestor.start()
+    ingestor.stop()
+
+    # Assert
+    assert count_submissions(session_factory) == 2
+    with session_factory() as db:
+        assert db.get(FormSubmission, "sub-torn") is None
+    assert list(journal_dir.rglob("segment-*.jsonl")) == []
+
+
+def test_workers_sharing_a_directory_get_their_own_journals(session_factory, tmp_path):
+    """Test that several workers can run in journal mode with one configured directory."""
+    workers = [make_ingestor(session_factory, tmp_path / "journal") for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    try:
+        assert [worker.journal.directory.name for worker in workers] == ["worker-0", "worker-1", "worker-2"]
+        for n, worker in enumerate(workers):
+            worker.enqueue(None, "template-1", {"n": n})
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    assert count_submissions(session_factory) == 3
+
+
+def test_journal_directory_is_exclusive(tmp_path):
+    """Test that two journals cannot share a directory."""
+    first = SubmissionJournal(str(tmp_path), fsync=False)
+    first.open()
+    try:
+        with pytest.raises(RuntimeError):
+            SubmissionJournal(str(tmp_path), fsync=False).open()
+    finally:
+        first.close()
+
+
+def test_database_outage_keeps_the_segment(session_factory, tmp_path):
+    """Test that acknowledged submissions stay journaled, not rejected, while the database is down."""
+    # Arrange - sessions whose statements fail like a lost connection
+    outage = {"down": True}
+
+    def flaky_factory():
+        db = session_factory()
+        execute = db.execute
+
+        def flaky_execute(statement, *args, **kwargs):
+            if outage["down"]:
+                raise OperationalError("INSERT", {}, Exception("connection refused"))
+            return execute(statement, *args, **kwargs)
+
+        db.execute = flaky_execute
+        return db
+
+    ingestor = make_ingestor(flaky_factory, tmp_path / "journal")
+    journal_dir = ingestor.open_journal().directory
+    for i in range(3):
+        ingestor.enqueue(None, "template-1", {"n": i})
+
+    # Act
+    assert ingestor.flush() == 0
+    sealed_kept = (journal_dir / "segment-000000000001.jsonl").exists()
+    outage["down"] = False
+    inserted = ingestor.flush()
+    ingestor.journal.close()
+
+    # Assert
+    assert sealed_kept
+    assert not (journal_dir / "rejected.jsonl").exists()
+    assert inserted == 3
+    assert count_submissions(session_factory) == 3
+    assert list(journal_dir.glob("segment-*.jsonl")) == []
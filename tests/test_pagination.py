@@ -0,0 +1,73 @@
+"""
+Tests for keyset pagination of template submissions.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.db import Base
+from src.forms_api.models import FormSubmission, FormTemplate
+from src.forms_api.services import FormBuilderService
+from src.forms_api.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Return a session on a fresh SQLite database with 25 submissions for one template."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(FormTemplate(id="template-1", name="Contact", project_id="test-project", schema={}))
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(25):
+        # Pairs share a timestamp so the id tie-breaker is exercised
+        session.add(FormSubmission(
+            id=f"sub-{i:03d}",
+            template_id="template-1",
+            data={"n": i},
+            created_at=start + timedelta(minutes=i // 2)
+        ))
+    session.commit()
+
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the sort key it was built from."""
+    created_at = datetime(2024, 5, 17, 8, 30, 15, 123456)
+    cursor = encode_cursor(created_at, "abc-123")
+
+    assert decode_cursor(cursor) == (created_at, "abc-123")
+
+
+def test_invalid_cursor_is_rejected():
+    """Test that a malformed cursor raises ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_all_rows_without_overlap(db):
+    """Test that walking the cursors visits each submission exactly once, newest first."""
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = FormBuilderService.get_template_submissions_page(db, "template-1", 10, cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert len({s.id for s in seen}) == 25
+    keys = [(s.created_at, s.id) for s in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_count_is_capped(db):
+    """Test that counting stops at the cap and reports an estimate."""
+    assert FormBuilderService.count_template_submissions(db, "template-1", cap=100) == (25, False)
+    assert FormBuilderService.count_template_submissions(db, "template-1", cap=10) == (10, True)
@@ -0,0 +1,66 @@
+"""
+Tests for connection pool settings and telemetry.
+"""
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from src.forms_api.db import _pool_options
+from src.forms_api.pool_metrics import InstrumentedQueuePool, PoolStatistics, pool_snapshot
+
+
+@pytest.fixture
+def instrumented_engine(tmp_path):
+    """Return a single-connection instrumented engine with a short timeout."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    engine.pool.statistics = PoolStatistics("test")
+    yield engine
+    engine.dispose()
+
+
+def test_pool_options_use_settings():
+    """Test that PostgreSQL engines get the configured pool settings."""
+    options = _pool_options("postgresql://user:pw@db/forms", InstrumentedQueuePool)
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= options.keys()
+    assert _pool_options("sqlite:///./forms.db", InstrumentedQueuePool) == {}
+
+
+def test_checkouts_and_occupancy_are_reported(instrumented_engine):
+    """Test that checkouts are counted and occupancy is visible."""
+    with instrumented_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        snapshot = pool_snapshot(instrumented_engine.pool)
+        assert snapshot["checked_out"] == 1
+        assert snapshot["max_connections"] == 1
+
+    snapshot = pool_snapshot(instrumented_engine.pool)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["wait_time_ms"]["count"] == 1
+    assert snapshot["wait_time_ms"]["buckets"]["le_inf"] == 1
+
+
+def test_checkout_timeouts_are_counted(instrumented_engine):
+    """Test that exhausting the pool records a timeout."""
+    with instrumented_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            instrumented_engine.connect()
+
+    snapshot = pool_snapshot(instrumented_engine.pool)
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_time_ms"]["max"] >= 50
+
+
+def test_statistics_survive_dispose(instrumented_engine):
+    """Test that recreating the pool keeps the same statistics object."""
+    statistics = instrumented_engine.pool.statistics
+    instrumented_engine.dispose()
+    assert instrumented_engine.pool.statistics is statistics
@@ -0,0 +1,83 @@
+"""
+Tests and benchmark for the orjson fast serialization path.
+"""
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from src.forms_api.models import FormSubmission, FormTemplate
+from src.forms_api.schemas import FormSubmissionResponse, FormTemplateResponse
+from src.forms_api.utils.serialization import submissions_to_json, templates_to_json
+
+
+def make_submissions(count):
+    """Build transient submissions with a realistic nested payload."""
+    start = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    return [
+        FormSubmission(
+            id=f"sub-{i}",
+            template_id="template-1",
+            data={
+                "name": f"Person {i}",
+                "email": f"person{i}@example.com",
+                "address": {"street": "Drottninggatan 1", "city": "Huskvarna", "zip": "56182"},
+                "products": [{"sku": f"SKU-{n}", "qty": n, "price": 199.5} for n in range(5)],
+                "consent": True,
+                "message": "Hej! " * 20,
+            },
+            submitted_from="forms/b2b-support",
+            ip_address="10.0.0.1",
+            created_at=start + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+def pydantic_path(submissions):
+    """The default path: per-item response models, then FastAPI's encoder."""
+    models = [FormSubmissionResponse.model_validate(s) for s in submissions]
+    return json.dumps(jsonable_encoder(models)).encode("utf-8")
+
+
+def test_submissions_match_response_model():
+    """Test that the fast path produces the same JSON as the Pydantic path."""
+    submissions = make_submissions(3)
+
+    fast = json.loads(submissions_to_json(submissions))
+
+    assert fast == json.loads(pydantic_path(submissions))
+    assert fast[0]["created_at"] == "2024-01-01T12:00:00.123456Z"
+
+
+def test_templates_match_response_model():
+    """Test that template rows encode like FormTemplateResponse."""
+    templates = [FormTemplate(
+        id="template-1", name="Contact", description=None, project_id="test-project",
+        schema={"type": "object", "properties": {"email": {"type": "string"}}},
+        is_active=True, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )]
+
+    expected = jsonable_encoder([FormTemplateResponse.model_validate(t) for t in templates])
+    assert json.loads(templates_to_json(templates)) == expected
+
+
+def test_fast_path_benchmark():
+    """Benchmark both paths on a 2000-row page; the fast path must not be slower."""
+    submissions = make_submissions(2000)
+
+    def best_of(fn, runs=3):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn(submissions)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    slow = best_of(pydantic_path)
+    fast = best_of(submissions_to_json)
+    print(f"\n2000 submissions: pydantic+jsonable_encoder {slow * 1000:.1f} ms, orjson {fast * 1000:.1f} ms "
+          f"({slow / fast:.1f}x)")
+
+    assert fast < slow
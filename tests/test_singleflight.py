@@ -0,0 +1,150 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.forms_api.db import get_db
+from src.forms_api.routes import router, template_loads
+from src.forms_api.services.template_cache import template_cache
+from src.forms_api.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    """Test that callers of one key share a single call; other keys run separately."""
+    flights = SingleFlight("test")
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.02)
+        return key.upper()
+
+    results = await asyncio.gather(
+        *(flights.do("a", lambda: load("a")) for _ in range(5)),
+        flights.do("b", lambda: load("b"))
+    )
+
+    assert results == ["A"] * 5 + ["B"]
+    assert sorted(calls) == ["a", "b"]
+    assert flights.stats()["collapsed"] == 4
+    assert flights.in_flight() == 0
+
+    # Nothing is cached once the call is done
+    await flights.do("a", lambda: load("a"))
+    assert calls.count("a") == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    """Test that every waiter gets the leader's exception."""
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats()["calls"] == 1
+    assert flights.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_leader_is_cancelled():
+    """Test that a cancelled leader does not fail the callers waiting on it."""
+    flights = SingleFlight("test")
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.ensure_future(flights.do("k", slow))
+    await started.wait()
+    waiter = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "done"
+    assert flights.stats()["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_spawn_runs_in_background_once():
+    """Test that spawn starts one background call per key."""
+    flights = SingleFlight("test")
+    calls = []
+
+    async def refresh():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "fresh"
+
+    first = flights.spawn("k", refresh)
+    second = flights.spawn("k", refresh)
+
+    assert first is second
+    assert flights.running("k")
+    assert await first == "fresh"
+    assert calls == [1]
+
+
+def test_sync_calls_are_coalesced_across_threads():
+    """Test do_sync for blocking loaders on worker threads."""
+    flights = SingleFlight("test")
+    calls = []
+    barrier = threading.Barrier(4)
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def call():
+        barrier.wait()
+        return flights.do_sync("k", load)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: call(), range(4)))
+
+    assert results == ["value"] * 4
+    assert calls == [1]
+    assert flights.stats()["collapsed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_template_list_misses_share_one_load(monkeypatch):
+    """Test that concurrent cold listing requests hit the database once."""
+    calls = []
+
+    def slow_list(db, project_id=None):
+        calls.append(project_id)
+        time.sleep(0.1)
+        return []
+
+    monkeypatch.setattr("src.forms_api.routes.FormBuilderService.list_templates", slow_list)
+    template_cache.clear()
+    before = template_loads.stats()["collapsed"]
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.get("/api/templates", params={"project_id": "p1"}) for _ in range(4))
+        )
+
+    assert all(response.status_code == 200 for response in responses)
+    assert calls == ["p1"]
+    assert template_loads.stats()["collapsed"] - before == 3
+    template_cache.clear()
@@ -0,0 +1,83 @@
+"""
+Tests for startup schema handling and cold-start timings.
+"""
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, inspect, text
+
+from src.forms_api.startup import (
+    FirstRequestTimer,
+    StartupTimings,
+    check_alembic_head,
+    prepare_schema,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Return an engine for an empty SQLite database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_timings_report_phases():
+    """Test that phases are derived from the recorded marks."""
+    now = [0.0]
+    timings = StartupTimings(clock=lambda: now[0])
+    now[0] = 0.25
+    timings.mark("imports")
+    now[0] = 0.3
+    timings.mark("app_constructed")
+
+    assert timings.report()["phases_ms"] == {"import": 250.0, "app_construction": 50.0}
+
+
+def test_alembic_check_detects_missing_and_current_revision(engine):
+    """Test that the head check compares the stamped revision with the scripts."""
+    result = check_alembic_head(engine)
+    assert result["current"] == []
+    assert result["up_to_date"] is False
+    assert len(result["expected"]) == 1
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES (:v)"), {"v": result["expected"][0]})
+
+    assert check_alembic_head(engine)["up_to_date"] is True
+
+
+@pytest.mark.asyncio
+async def test_prepare_schema_modes(engine):
+    """Test that create builds tables, skip leaves the database alone and unknown modes fail."""
+    timings = StartupTimings()
+
+    await prepare_schema("skip", engine, timings)
+    assert timings.schema["status"] == "skipped"
+    assert inspect(engine).get_table_names() == []
+
+    await prepare_schema("create", engine, timings)
+    assert timings.schema["status"] == "created"
+    assert "form_templates" in inspect(engine).get_table_names()
+    assert "schema_ready" in timings.marks
+
+    with pytest.raises(ValueError):
+        await prepare_schema("migrate", engine, timings)
+
+
+@pytest.mark.asyncio
+async def test_first_request_is_timed_once():
+    """Test that only the first HTTP request is recorded."""
+    timings = StartupTimings()
+    app = FastAPI()
+    app.get("/ping")(lambda: {"ok": True})
+    app.add_middleware(FirstRequestTimer, timings=timings)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/ping")
+        first = timings.marks["first_request"]
+        await client.get("/ping")
+
+    assert timings.first_request_ms is not None
+    assert timings.marks["first_request"] == first
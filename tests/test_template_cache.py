@@ -0,0 +1,111 @@
+"""
+Tests for the template response cache and conditional GETs.
+"""
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.forms_api.db import Base, get_db
+from src.forms_api.models import FormTemplate
+from src.forms_api.routes import router
+from src.forms_api.services.template_cache import etag_matches, template_cache
+from src.forms_api.utils.cache import TTLCache
+
+
+@pytest.fixture
+def session_factory():
+    """Return a session factory for an in-memory SQLite database with one template."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(FormTemplate(id="template-1", name="Contact", project_id="test-project", schema={}))
+        db.commit()
+
+    template_cache.clear()
+    yield factory
+    template_cache.clear()
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    """Return a test client for the sync routes bound to the SQLite database."""
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def test_ttl_cache_expires_and_evicts():
+    """Test that entries expire after the TTL and the LRU entry is evicted."""
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+
+
+def test_etag_matching():
+    """Test If-None-Match parsing, including lists, weak tags and *."""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_get_template_is_cached_with_etag(client, session_factory):
+    """Test that repeat reads are served from cache and honour If-None-Match."""
+    first = await client.get("/api/templates/template-1")
+    assert first.status_code == 200
+    assert first.json()["name"] == "Contact"
+    etag = first.headers["etag"]
+    assert "max-age" in first.headers["cache-control"]
+
+    # Change the row behind the cache's back (no ORM events)
+    with session_factory() as db:
+        db.execute(FormTemplate.__table__.update().values(name="Changed"))
+        db.commit()
+    assert (await client.get("/api/templates/template-1")).json()["name"] == "Contact"
+
+    not_modified = await client.get("/api/templates/template-1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+
+@pytest.mark.asyncio
+async def test_orm_update_invalidates_cache(client, session_factory):
+    """Test that committing a template change drops cached bodies and changes the ETag."""
+    etag = (await client.get("/api/templates/template-1")).headers["etag"]
+    listing = await client.get("/api/templates")
+    assert [t["id"] for t in listing.json()] == ["template-1"]
+
+    with session_factory() as db:
+        db.get(FormTemplate, "template-1").name = "Renamed"
+        db.add(FormTemplate(id="template-2", name="Support", project_id="test-project", schema={}))
+        db.commit()
+
+    response = await client.get("/api/templates/template-1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.headers["etag"] != etag
+    assert len((await client.get("/api/templates")).json()) == 2
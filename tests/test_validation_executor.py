@@ -0,0 +1,108 @@
+"""
+Tests for the validation executor.
+"""
+import threading
+import time
+
+import pytest
+
+from src.forms_api.services import validation_executor as executor_module
+from src.forms_api.services.validation_executor import ValidationExecutor, validate_one
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "email": {"type": "string", "pattern": "^[^@]+@[^@]+$"},
+        "quantity": {"type": "integer", "minimum": 1},
+        "lines": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"sku": {"type": "string", "minLength": 3}, "qty": {"type": "integer"}},
+                "required": ["sku", "qty"]
+            }
+        }
+    },
+    "required": ["email", "quantity"]
+}
+
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        item = {
+            "email": f"user{i}@example.com",
+            "quantity": i % 5,
+            "lines": [{"sku": f"SKU-{n}", "qty": n} for n in range(20)]
+        }
+        items.append(item)
+    return items
+
+
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+def test_results_are_ordered_and_match_direct_validation(kind):
+    """Test that every executor kind returns the same results, in order."""
+    items = make_items(23)
+    executor = ValidationExecutor(kind=kind, max_workers=2, max_pending=3, chunk_size=4)
+    try:
+        results = executor.validate_many("template-1", SCHEMA, items)
+    finally:
+        executor.shutdown()
+
+    assert results == [validate_one("template-1", SCHEMA, item) for item in items]
+    assert results[0][0] is False
+    assert results[0][1] == ["quantity: 0 is less than the minimum of 1"]
+    assert results[1] == (True, None)
+
+
+def test_pending_chunks_are_bounded(monkeypatch):
+    """Test that no more than max_pending chunks are in flight at once."""
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def slow_chunk(template_id, schema, chunk):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return [(True, None)] * len(chunk)
+
+    monkeypatch.setattr(executor_module, "validate_chunk", slow_chunk)
+    executor = ValidationExecutor(kind="thread", max_workers=8, max_pending=2, chunk_size=1)
+    try:
+        results = executor.validate_many("template-1", SCHEMA, range(20))
+    finally:
+        executor.shutdown()
+
+    assert len(results) == 20
+    assert state["peak"] <= 2
+
+
+@pytest.mark.asyncio
+async def test_validate_async():
+    """Test single-item validation from the event loop."""
+    executor = ValidationExecutor(kind="thread", max_workers=1)
+    try:
+        assert await executor.validate_async("template-1", SCHEMA, make_items(2)[1]) == (True, None)
+    finally:
+        executor.shutdown()
+
+
+def test_chunks_are_validated_concurrently(monkeypatch):
+    """Test that the executor runs chunks side by side instead of serialising them."""
+    barrier = threading.Barrier(4, timeout=5)
+
+    def waiting_chunk(template_id, schema, chunk):
+        barrier.wait()  # Only passes once four chunks are running at the same time
+        return [(True, None)] * len(chunk)
+
+    monkeypatch.setattr(executor_module, "validate_chunk", waiting_chunk)
+    executor = ValidationExecutor(kind="thread", max_workers=4, max_pending=4, chunk_size=1)
+    try:
+        results = executor.validate_many("template-1", SCHEMA, range(8))
+    finally:
+        executor.shutdown()
+
+    assert results == [(True, None)] * 8
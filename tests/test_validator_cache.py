@@ -0,0 +1,98 @@
+"""
+Tests for the compiled JSON schema validator registry.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from jsonschema import SchemaError, ValidationError
+
+from src.forms_api.services import FormBuilderService
+from src.forms_api.services.validator_cache import ValidatorRegistry, validator_registry
+
+
+CONTACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 2},
+        "age": {"type": "integer", "minimum": 0},
+    },
+    "required": ["name"],
+}
+
+
+def test_validator_compiled_once_per_schema_version():
+    """Test that repeated validations reuse the compiled validator."""
+    registry = ValidatorRegistry(maxsize=10)
+
+    with patch.object(ValidatorRegistry, "_compile", wraps=ValidatorRegistry._compile) as compile_spy:
+        for _ in range(5):
+            registry.validate("template-1", CONTACT_SCHEMA, {"name": "Anna"})
+
+    assert compile_spy.call_count == 1
+    assert registry.stats()["hits"] == 4
+
+
+def test_changed_schema_replaces_previous_version():
+    """Test that a new schema version is compiled and the old one dropped."""
+    registry = ValidatorRegistry(maxsize=10)
+    registry.validate("template-1", CONTACT_SCHEMA, {"name": "Anna"})
+
+    updated_schema = dict(CONTACT_SCHEMA, required=["name", "age"])
+    with pytest.raises(ValidationError):
+        registry.validate("template-1", updated_schema, {"name": "Anna"})
+
+    assert registry.stats()["size"] == 1
+
+
+def test_lru_eviction():
+    """Test that the least recently used validator is evicted."""
+    registry = ValidatorRegistry(maxsize=2)
+    registry.get_validator("a", CONTACT_SCHEMA)
+    registry.get_validator("b", CONTACT_SCHEMA)
+    registry.get_validator("a", CONTACT_SCHEMA)
+    registry.get_validator("c", CONTACT_SCHEMA)
+
+    stats = registry.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+
+    # "b" was least recently used and must be recompiled
+    registry.get_validator("b", CONTACT_SCHEMA)
+    assert registry.stats()["misses"] == 4
+
+
+def test_invalidate_template():
+    """Test that invalidation drops the template's validators."""
+    registry = ValidatorRegistry(maxsize=10)
+    registry.get_validator("template-1", CONTACT_SCHEMA)
+    registry.get_validator("template-2", CONTACT_SCHEMA)
+
+    registry.invalidate("template-1")
+
+    assert registry.stats()["size"] == 1
+
+
+def test_invalid_schema_is_not_cached():
+    """Test that schemas failing the meta-schema check raise and are not cached."""
+    registry = ValidatorRegistry(maxsize=10)
+
+    with pytest.raises(SchemaError):
+        registry.get_validator("broken", {"type": "not-a-type"})
+
+    assert registry.stats()["size"] == 0
+
+
+def test_form_builder_validation_uses_registry():
+    """Test that FormBuilderService reports errors like before."""
+    validator_registry.clear()
+    template = SimpleNamespace(id="template-1", schema=CONTACT_SCHEMA)
+
+    is_valid, errors = FormBuilderService.validate_submission_data(template, {"name": "Anna", "age": 30})
+    assert is_valid is True
+    assert errors is None
+
+    is_valid, errors = FormBuilderService.validate_submission_data(template, {"name": "A"})
+    assert is_valid is False
+    assert errors == ["name: 'A' is too short"]
+    assert validator_registry.stats()["misses"] == 1
@@ -0,0 +1,130 @@
+"""
+Tests and benchmark for webhook fan-out over the shared pooled client.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.forms_api.services.http_clients import http_clients
+from src.forms_api.services.webhook_service import WebhookEndpointMetrics, WebhookService, webhook_metrics
+
+
+class Receiver:
+    """Keep-alive HTTP/1.1 webhook receiver on localhost."""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.connections = 0
+        self.received = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:%d/hook" % self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                self.received += 1
+                await asyncio.sleep(self.delay)
+                writer.write(b"HTTP/1.1 %d OK\r\nContent-Length: 2\r\n\r\nok" % self.status)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+PAYLOAD = {"event_type": "submission_created", "form_data": {"id": "s1", "data": {"name": "Ada"}}}
+
+
+@pytest.mark.asyncio
+async def test_fan_out_reuses_connections_per_receiver():
+    """Test that repeated events to the same receivers reuse their connections."""
+    webhook_metrics.reset()
+    async with Receiver() as first, Receiver(status=500) as second:
+        urls = [first.url, second.url]
+        for _ in range(5):
+            await WebhookService._send_webhooks(urls, PAYLOAD)
+        await http_clients.aclose()
+
+    assert (first.received, second.received) == (5, 5)
+    assert (first.connections, second.connections) == (1, 1)
+
+    endpoints = webhook_metrics.snapshot()
+    assert endpoints[urls[0]]["succeeded"] == 5
+    assert endpoints[urls[1]]["failed"] == 5
+    assert endpoints[urls[1]]["error_rate"] == 1.0
+    assert endpoints[urls[0]]["latency_ms"]["p99"] is not None
+    webhook_metrics.reset()
+
+
+@pytest.mark.asyncio
+async def test_network_errors_are_counted_per_endpoint():
+    """Test that connection failures show up as errors of their endpoint."""
+    metrics = WebhookEndpointMetrics()
+    async with Receiver() as receiver:
+        url = receiver.url
+    webhook_metrics.reset()
+
+    result = await WebhookService._send_single_webhook(url + "?token=secret", PAYLOAD)
+    await http_clients.aclose()
+
+    assert result["success"] is False
+    assert webhook_metrics.snapshot()[url]["errors"] == 1
+    webhook_metrics.reset()
+
+    metrics.record("https://user:pw@hooks.example/in?sig=1", 0.1, status_code=204)
+    assert list(metrics.snapshot()) == ["https://hooks.example/in"]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_throughput_benchmark():
+    """Benchmark deliveries/sec to local receivers: client per call vs the shared pool."""
+    events = 30
+
+    async def per_call_client(url, payload):
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            return await client.post(url, json=payload)
+
+    async with Receiver() as first, Receiver() as second, Receiver() as third:
+        urls = [first.url, second.url, third.url]
+
+        started = time.perf_counter()
+        for _ in range(events):
+            await asyncio.gather(*(per_call_client(url, PAYLOAD) for url in urls))
+        per_call = events * len(urls) / (time.perf_counter() - started)
+        per_call_connections = first.connections + second.connections + third.connections
+
+        started = time.perf_counter()
+        for _ in range(events):
+            await WebhookService._send_webhooks(urls, PAYLOAD)
+        pooled = events * len(urls) / (time.perf_counter() - started)
+        await http_clients.aclose()
+        pooled_connections = first.connections + second.connections + third.connections - per_call_connections
+
+    print(f"\n{events} events to {len(urls)} receivers: client per call {per_call:.0f} deliveries/s "
+          f"({per_call_connections} connections), pooled {pooled:.0f} deliveries/s "
+          f"({pooled_connections} connections)")
+    webhook_metrics.reset()
+
+    assert per_call_connections == events * len(urls)
+    assert pooled_connections == len(urls)
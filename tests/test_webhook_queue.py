@@ -0,0 +1,391 @@
+"""
+Tests for the durable webhook delivery queue.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.forms_api.api.routes.webhooks import router
+from src.forms_api.db import Base, get_db
+from src.forms_api.models import FormTemplate, WebhookDelivery
+from src.forms_api.services import FormBuilderService
+from src.forms_api.services import webhook_queue
+from src.forms_api.services.webhook_queue import (
+    DEAD,
+    DELIVERED,
+    PENDING,
+    WebhookDispatcher,
+    enqueue_webhook,
+    retry_delay,
+)
+from src.forms_api.services.webhook_routing import WebhookRouter
+from src.forms_api.services.webhook_service import WebhookSubscriberLimits
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class Receiver:
+    """Stand-in for the HTTP send: answers with queued status codes, then 200."""
+
+    def __init__(self, statuses=(), delay=0.0, delays=None):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.delays = delays or {}
+        self.calls = []
+        self.payloads = []
+        self.active = 0
+        self.max_active = 0
+        self.active_per_url = {}
+        self.max_active_per_url = {}
+
+    async def __call__(self, url, payload, secret=None):
+        self.calls.append(url)
+        self.payloads.append(payload)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.active_per_url[url] = self.active_per_url.get(url, 0) + 1
+        self.max_active_per_url[url] = max(self.max_active_per_url.get(url, 0), self.active_per_url[url])
+        await asyncio.sleep(self.delays.get(url, self.delay))
+        self.active -= 1
+        self.active_per_url[url] -= 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        return {"url": url, "status_code": status, "success": 200 <= status < 300}
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = SimpleNamespace(
+        webhooks_enabled=True,
+        webhook_urls_list=["https://a.example/hook", "https://b.example/hook"],
+        webhook_form_specific_config={},
+        webhook_batching_config={},
+        webhook_routes_file="",
+        webhook_routes_reload_seconds=5.0,
+        webhook_secret="secret"
+    )
+    monkeypatch.setattr("src.forms_api.services.webhook_queue.get_settings", lambda: settings)
+    monkeypatch.setattr("src.forms_api.services.webhook_routing.get_settings", lambda: settings)
+    # Built from these settings on the first event
+    monkeypatch.setattr("src.forms_api.services.webhook_queue.webhook_router", WebhookRouter())
+    return settings
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forms.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(FormTemplate(id="t1", name="Contact", project_id="p1", schema={"type": "object"}))
+        db.commit()
+    return factory
+
+
+def queue_event(session_factory, clock):
+    with session_factory() as db:
+        deliveries = enqueue_webhook(db, "submission_created", {"id": "s1"}, template_id="t1")
+        for delivery in deliveries:
+            delivery.next_attempt_at = clock()
+        db.commit()
+        return [delivery.id for delivery in deliveries]
+
+
+def delivery(session_factory, delivery_id):
+    with session_factory() as db:
+        return db.get(WebhookDelivery, delivery_id)
+
+
+def make_dispatcher(session_factory, receiver, clock, **options):
+    options.setdefault("limits", WebhookSubscriberLimits(rate_per_second=0))
+    return WebhookDispatcher(
+        session_factory=session_factory, send=receiver, clock=clock, rand=lambda: 0.5,
+        retry_base_seconds=10, retry_max_seconds=100, **options
+    )
+
+
+def test_submission_and_deliveries_share_a_transaction(session_factory, settings):
+    """Test that creating a submission queues one delivery per URL with the submission in the payload."""
+    with session_factory() as db:
+        submission = FormBuilderService.create_form_submission(
+            db, SimpleNamespace(template_id="t1", data={"name": "Ada"}, submitted_from="web")
+        )
+        deliveries = db.query(WebhookDelivery).order_by(WebhookDelivery.url).all()
+
+    assert [d.url for d in deliveries] == settings.webhook_urls_list
+    assert all(d.status == PENDING for d in deliveries)
+    assert deliveries[0].payload["form_data"]["id"] == submission.id
+    assert deliveries[0].payload["template_id"] == "t1"
+
+    settings.webhooks_enabled = False
+    with session_factory() as db:
+        assert enqueue_webhook(db, "submission_created", {}) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatch_delivers_with_bounded_concurrency(session_factory, settings):
+    """Test that due deliveries are sent with at most `concurrency` in flight."""
+    clock, receiver = Clock(), Receiver(delay=0.02)
+    for _ in range(3):
+        queue_event(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, receiver, clock, concurrency=2)
+
+    assert await dispatcher.dispatch_once() == 6
+    assert await dispatcher.dispatch_once() == 0
+    assert receiver.max_active == 2
+    assert dispatcher.stats()["delivered"] == 6
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_and_end_in_dead_letters(session_factory, settings):
+    """Test retries with jittered exponential backoff and dead-lettering after max attempts."""
+    settings.webhook_urls_list = ["https://a.example/hook"]
+    clock, receiver = Clock(), Receiver(statuses=[500, 503, 500])
+    [delivery_id] = queue_event(session_factory, clock)
+    dispatcher = make_dispatcher(session_factory, receiver, clock, max_attempts=3)
+
+    await dispatcher.dispatch_once()
+    failed = delivery(session_factory, delivery_id)
+    assert (failed.status, failed.attempts, failed.last_status_code) == (PENDING, 1, 500)
+
+    clock.advance(7.4)  # 10 s ceiling, half fixed + 0.5 of the random half = 7.5 s
+    assert await dispatcher.dispatch_once() == 0
+    clock.advance(0.1)
+    assert await dispatcher.dispatch_once() == 1
+    clock.advance(15)
+    assert await dispatcher.dispatch_once() == 1
+
+    dead = delivery(session_factory, delivery_id)
+    assert (dead.status, dead.attempts, dead.last_error) == (DEAD, 3, "HTTP 500")
+    assert dispatcher.stats()["dead"] == 1
+
+
+def test_retry_delay_has_jitter_and_cap():
+    assert retry_delay(1, 10, 100, rand=lambda: 0.0) == 5
+    assert retry_delay(1, 10, 100, rand=lambda: 1.0) == 10
+    assert retry_delay(3, 10, 100, rand=lambda: 1.0) == 40
+    assert retry_delay(10, 10, 100, rand=lambda: 1.0) == 100
+
+
+@pytest.mark.asyncio
+async def test_dead_letters_are_listed_and_replayed(session_factory, settings):
+    """Test the dead-letter API: list dead deliveries, replay them and deliver again."""
+    settings.webhook_urls_list = ["https://a.example/hook"]
+    clock, receiver = Clock(), Receiver(statuses=[500])
+    [delivery_id] = queue_event(session_factory, clock)
+    await make_dispatcher(session_factory, receiver, clock, max_attempts=1).dispatch_once()
+
+    def override_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = override_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        dead = (await client.get("/api/webhooks/deliveries", params={"status": "dead"})).json()
+        assert [d["id"] for d in dead] == [delivery_id]
+        assert dead[0]["last_status_code"] == 500
+
+        replayed = await client.post(f"/api/webhooks/deliveries/{delivery_id}/replay")
+        assert replayed.json() == {"replayed": 1}
+        again = await client.post(f"/api/webhooks/deliveries/{delivery_id}/replay")
+        assert again.status_code == 404
+
+        bad = await client.get("/api/webhooks/deliveries", params={"status": "lost"})
+        assert bad.status_code == 400
+
+    replayed = delivery(session_factory, delivery_id)
+    assert (replayed.status, replayed.attempts) == (PENDING, 0)
+
+    clock.now = datetime.now(timezone.utc)
+    await make_dispatcher(session_factory, receiver, clock).dispatch_once()
+    assert delivery(session_factory, delivery_id).status == DELIVERED
+
+
+def queue_batched_events(session_factory, count):
+    """Queue events with their real batching window, from enqueue_webhook"""
+    with session_factory() as db:
+        for number in range(count):
+            enqueue_webhook(db, "submission_created", {"id": f"s{number}"}, template_id="t1")
+        db.commit()
+
+
+@pytest.mark.asyncio
+async def test_batching_url_gets_one_array_per_window(session_factory, settings):
+    """Test that events to a batching URL wait for the window and are sent as one array, oldest first."""
+    batched = "https://b.example/hook"
+    settings.webhook_batching_config = {batched: {"max_events": 10, "max_wait_seconds": 30}}
+    clock, receiver = Clock(), Receiver()
+    queue_batched_events(session_factory, 3)
+    clock.now = datetime.now(timezone.utc)
+    dispatcher = make_dispatcher(session_factory, receiver, clock)
+
+    assert await dispatcher.dispatch_once() == 3
+    assert receiver.calls == ["https://a.example/hook"] * 3
+
+    clock.advance(30)
+    assert await dispatcher.dispatch_once() == 3
+    assert receiver.calls[3:] == [batched]
+    assert [event["form_data"]["id"] for event in receiver.payloads[3]] == ["s0", "s1", "s2"]
+    assert dispatcher.stats()["batches_sent"] == 1
+    assert dispatcher.stats()["delivered"] == 6
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_before_the_window_ends(session_factory, settings):
+    """Test that max_events waiting events are sent at once, in batches of at most max_events."""
+    batched = "https://a.example/hook"
+    settings.webhook_urls_list = [batched]
+    settings.webhook_batching_config = {batched: {"max_events": 2, "max_wait_seconds": 300}}
+    clock, receiver = Clock(), Receiver()
+    queue_batched_events(session_factory, 1)
+    clock.now = datetime.now(timezone.utc)
+    dispatcher = make_dispatcher(session_factory, receiver, clock)
+
+    assert await dispatcher.dispatch_once() == 0
+    queue_batched_events(session_factory, 2)
+    assert await dispatcher.dispatch_once() == 2
+    assert [len(payload) for payload in receiver.payloads] == [2]
+
+    clock.advance(301)
+    assert await dispatcher.dispatch_once() == 1
+    assert [len(payload) for payload in receiver.payloads] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_together(session_factory, settings):
+    """Test that every event of a failed batch backs off and is sent again in one request."""
+    batched = "https://a.example/hook"
+    settings.webhook_urls_list = [batched]
+    settings.webhook_batching_config = {batched: {"max_events": 5, "max_wait_seconds": 10}}
+    clock, receiver = Clock(), Receiver(statuses=[502])
+    queue_batched_events(session_factory, 3)
+    clock.now = datetime.now(timezone.utc)
+    dispatcher = make_dispatcher(session_factory, receiver, clock)
+
+    clock.advance(10)
+    assert await dispatcher.dispatch_once() == 3
+    with session_factory() as db:
+        failed = db.query(WebhookDelivery).all()
+    assert {(d.status, d.attempts, d.last_status_code) for d in failed} == {(PENDING, 1, 502)}
+
+    clock.advance(7.5)
+    assert await dispatcher.dispatch_once() == 3
+    assert [len(payload) for payload in receiver.payloads] == [3, 3]
+    assert dispatcher.stats()["delivered"] == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_receiver_is_isolated_and_deferred(session_factory, settings):
+    """Test that a slow receiver is held to its own limit and its excess is deferred, not attempted."""
+    slow, fast = settings.webhook_urls_list
+    clock, receiver = Clock(), Receiver(delays={slow: 0.2})
+    for _ in range(4):
+        queue_event(session_factory, clock)
+    limits = WebhookSubscriberLimits(rate_per_second=0, initial_concurrency=1, max_wait_seconds=0.05)
+    dispatcher = make_dispatcher(session_factory, receiver, clock, concurrency=4, limits=limits)
+
+    assert await dispatcher.dispatch_once() == 8
+    assert receiver.calls.count(fast) == 4
+    assert receiver.calls.count(slow) == 1
+    assert receiver.max_active_per_url[slow] == 1
+    assert dispatcher.stats()["throttled"] == 3
+
+    with session_factory() as db:
+        deferred = db.query(WebhookDelivery).filter(WebhookDelivery.status == PENDING).all()
+    assert [(d.url, d.attempts) for d in deferred] == [(slow, 0)] * 3
+    assert limits.stats()[slow]["throttled"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_defers_beyond_the_burst(session_factory, settings):
+    """Test that deliveries beyond a receiver's token bucket are put back for later."""
+    settings.webhook_urls_list = ["https://a.example/hook"]
+    clock, receiver = Clock(), Receiver()
+    for _ in range(5):
+        queue_event(session_factory, clock)
+    limits = WebhookSubscriberLimits(rate_per_second=0.1, burst=2, max_wait_seconds=1)
+    dispatcher = make_dispatcher(session_factory, receiver, clock, limits=limits)
+
+    assert await dispatcher.dispatch_once() == 5
+    assert len(receiver.calls) == 2
+    assert dispatcher.stats()["throttled"] == 3
+    assert dispatcher.stats()["delivered"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_receiver_is_not_held_up_by_a_slow_one(session_factory, settings):
+    """Test that a delivery arriving while a slow receiver is still answering is sent right away."""
+    slow, fast = settings.webhook_urls_list
+    clock, receiver = Clock(), Receiver(delays={slow: 1.0})
+    dispatcher = make_dispatcher(session_factory, receiver, clock, concurrency=4)
+    dispatcher.start(interval=60)
+    try:
+        queue_event(session_factory, clock)
+        dispatcher.notify()
+        await asyncio.sleep(0.1)
+        assert receiver.active_per_url[slow] == 1
+
+        started = asyncio.get_running_loop().time()
+        settings.webhook_urls_list = [fast]
+        webhook_queue.webhook_router.reload()
+        [delivery_id] = queue_event(session_factory, clock)
+        dispatcher.notify()
+        while delivery(session_factory, delivery_id).status != DELIVERED:
+            assert asyncio.get_running_loop().time() - started < 0.5
+            await asyncio.sleep(0.01)
+        assert receiver.active_per_url[slow] == 1
+        assert dispatcher.stats()["in_flight"] == 1
+    finally:
+        await dispatcher.stop()
+    assert dispatcher.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_receiver_cannot_take_every_slot(session_factory, settings):
+    """Test that a backlog for a slow receiver with a high limit does not starve a fast one."""
+    slow, fast = settings.webhook_urls_list
+    settings.webhook_urls_list = [slow]
+    webhook_queue.webhook_router.reload()
+    clock, receiver = Clock(), Receiver(delays={slow: 1.0})
+    for _ in range(10):
+        queue_event(session_factory, clock)
+    limits = WebhookSubscriberLimits(rate_per_second=0, initial_concurrency=10, max_concurrency=10)
+    dispatcher = make_dispatcher(session_factory, receiver, clock, concurrency=4, limits=limits)
+    dispatcher.start(interval=60)
+    try:
+        dispatcher.notify()
+        await asyncio.sleep(0.1)
+        assert receiver.active_per_url[slow] == 2
+
+        started = asyncio.get_running_loop().time()
+        settings.webhook_urls_list = [fast]
+        webhook_queue.webhook_router.reload()
+        [delivery_id] = queue_event(session_factory, clock)
+        dispatcher.notify()
+        while delivery(session_factory, delivery_id).status != DELIVERED:
+            assert asyncio.get_running_loop().time() - started < 0.5
+            await asyncio.sleep(0.01)
+        assert receiver.max_active_per_url[slow] == 2
+    finally:
+        await dispatcher.stop()
+    assert limits.stats()[slow]["in_flight"] == 0
+    with session_factory() as db:
+        deferred = db.query(WebhookDelivery).filter(WebhookDelivery.url == slow, WebhookDelivery.attempts == 0).count()
+    assert deferred == 8
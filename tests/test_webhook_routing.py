@@ -0,0 +1,166 @@
+"""
+Tests for the compiled webhook routing table and its hot reload.
+"""
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.forms_api.config import Settings
+from src.forms_api.services.webhook_routing import WebhookRouter, WebhookRoutingTable
+from src.forms_api.services.webhook_service import WebhookService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_settings(**overrides):
+    values = dict(
+        webhook_urls_list=["https://all.example/hook"],
+        webhook_form_specific_config={"contact-form": "https://contact.example/hook", "t1": "https://t1.example/hook"},
+        webhook_routes_file="",
+        webhook_routes_reload_seconds=5.0,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = make_settings()
+    monkeypatch.setattr("src.forms_api.services.webhook_routing.get_settings", lambda: settings)
+    return settings
+
+
+def write_routes(path, routes, mtime):
+    path.write_text(json.dumps(routes))
+    os.utime(path, (mtime, mtime))
+
+
+def test_lookup_indexes_templates_projects_and_events():
+    """Test that a lookup combines the global, template, project and event routes without duplicates."""
+    table = WebhookRoutingTable.build(make_settings(), {
+        "urls": ["https://all.example/hook"],
+        "templates": {"t1": ["https://t1-extra.example/hook"]},
+        "projects": {"p1": "https://p1.example/hook"},
+        "events": {"submission_created": ["https://created.example/hook", "https://p1.example/hook"]},
+    })
+
+    assert table.lookup("submission_created", template_id="t1", project_id="p1") == [
+        "https://all.example/hook",
+        "https://t1.example/hook",
+        "https://t1-extra.example/hook",
+        "https://p1.example/hook",
+        "https://created.example/hook",
+    ]
+    assert table.lookup("submission_updated", form_id="contact-form", template_id="t1") == [
+        "https://all.example/hook", "https://contact.example/hook"
+    ]
+    assert table.lookup("submission_updated", template_id="unknown") == ["https://all.example/hook"]
+
+
+@pytest.mark.asyncio
+async def test_direct_sends_follow_the_reloaded_table(settings, tmp_path, monkeypatch):
+    """Test that the direct send path routes through the router, routes file included."""
+    routes_file = tmp_path / "routes.json"
+    write_routes(routes_file, {"projects": {}, "templates": {"t1": "https://t1-file.example/hook"}}, mtime=1000)
+    settings.webhook_routes_file = str(routes_file)
+    router = WebhookRouter(clock=Clock())
+    monkeypatch.setattr("src.forms_api.services.webhook_service.webhook_router", router)
+    monkeypatch.setattr(
+        "src.forms_api.services.webhook_service.get_settings", lambda: SimpleNamespace(webhooks_enabled=True)
+    )
+    sent = []
+
+    async def send(urls, payload):
+        sent.append(urls)
+        return []
+
+    monkeypatch.setattr(WebhookService, "_send_webhooks", send)
+
+    await WebhookService.send_form_submission_webhook("submission_created", {}, template_id="t1")
+    assert sent[-1] == router.lookup("submission_created", template_id="t1") == [
+        "https://all.example/hook", "https://t1.example/hook", "https://t1-file.example/hook"
+    ]
+
+
+def test_routes_file_is_reloaded_when_it_changes(settings, tmp_path):
+    """Test that an edited routes file is picked up at the next check, without a restart."""
+    routes_file = tmp_path / "routes.json"
+    write_routes(routes_file, {"projects": {"p1": "https://p1.example/hook"}}, mtime=1000)
+    settings.webhook_routes_file = str(routes_file)
+    clock = Clock()
+    router = WebhookRouter(clock=clock)
+
+    assert router.lookup("submission_created", project_id="p1")[-1] == "https://p1.example/hook"
+
+    write_routes(routes_file, {"projects": {"p1": "https://p1-new.example/hook"}}, mtime=2000)
+    clock.now = 4.9
+    assert router.lookup("submission_created", project_id="p1")[-1] == "https://p1.example/hook"
+    clock.now = 5.0
+    assert router.lookup("submission_created", project_id="p1")[-1] == "https://p1-new.example/hook"
+    assert router.stats()["reloads"] == 2
+    assert router.stats()["table"]["source"] == str(routes_file)
+
+
+def test_broken_routes_file_keeps_the_previous_table(settings, tmp_path):
+    """Test that a routes file that fails to parse does not drop the routes in use."""
+    routes_file = tmp_path / "routes.json"
+    write_routes(routes_file, {"events": {"submission_created": "https://created.example/hook"}}, mtime=1000)
+    settings.webhook_routes_file = str(routes_file)
+    router = WebhookRouter(clock=Clock())
+    router.reload()
+
+    routes_file.write_text("{not json")
+    os.utime(routes_file, (2000, 2000))
+    router.reload()
+
+    assert "https://created.example/hook" in router.lookup("submission_created")
+    assert router.stats()["reload_errors"] == 1
+
+
+def test_settings_parse_webhook_config_once():
+    settings = Settings(webhook_urls="https://a.example/hook, https://b.example/hook,")
+    assert settings.webhook_urls_list == ["https://a.example/hook", "https://b.example/hook"]
+    assert settings.webhook_urls_list is settings.webhook_urls_list
+    assert settings.webhook_form_specific_config is settings.webhook_form_specific_config
+
+
+def resolve_per_event(settings, template_id):
+    """Routing as the direct path used to do it, from the settings on every event"""
+    specific = settings.webhook_form_specific_config.get(template_id)
+    return settings.webhook_urls_list + ([specific] if specific else [])
+
+
+def test_routing_lookup_benchmark():
+    """Benchmark per-event routing: parsing the settings strings vs the compiled table."""
+    events = 20000
+    urls = ",".join(f"https://hooks{n}.example/in" for n in range(5))
+    specific = json.dumps({f"template-{n}": f"https://t{n}.example/in" for n in range(200)})
+
+    started = time.perf_counter()
+    for n in range(events):
+        parsed = SimpleNamespace(
+            webhook_urls_list=[url.strip() for url in urls.split(",")],
+            webhook_form_specific_config=json.loads(specific),
+        )
+        resolve_per_event(parsed, f"template-{n % 200}")
+    per_event = events / (time.perf_counter() - started)
+
+    table = WebhookRoutingTable.build(SimpleNamespace(
+        webhook_urls_list=urls.split(","), webhook_form_specific_config=json.loads(specific)
+    ))
+    started = time.perf_counter()
+    for n in range(events):
+        table.lookup("submission_created", template_id=f"template-{n % 200}")
+    compiled = events / (time.perf_counter() - started)
+
+    print(f"\n{events} events: parse per event {per_event:.0f} lookups/s, compiled table {compiled:.0f} lookups/s")
+    assert compiled > per_event
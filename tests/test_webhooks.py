@@ -9,18 +9,37 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import datetime
+from types import SimpleNamespace
 from httpx import Response, AsyncClient
 
+from src.forms_api.services import webhook_service
+from src.forms_api.services.webhook_routing import WebhookRouter
 from src.forms_api.services.webhook_service import WebhookService
 
 
+@pytest.fixture(autouse=True)
+def router(monkeypatch):
+    """A fresh routing table built from the settings each test patches into webhook_service"""
+    def routing_settings():
+        settings = webhook_service.get_settings()
+        return SimpleNamespace(
+            webhook_urls_list=settings.webhook_urls_list,
+            webhook_form_specific_config=settings.webhook_form_specific_config,
+            webhook_routes_file="",
+            webhook_routes_reload_seconds=5.0,
+        )
+
+    monkeypatch.setattr("src.forms_api.services.webhook_routing.get_settings", routing_settings)
+    monkeypatch.setattr(webhook_service, "webhook_router", WebhookRouter())
+
+
 def test_webhook_service_initialization():
     """Test that the webhook service can be initialized."""
     service = WebhookService()
     assert service is not None
 
 
-@patch('src.forms_api.services.webhook_service.httpx.AsyncClient')
+@patch('src.forms_api.services.webhook_service.http_clients.get')
 @pytest.mark.asyncio
 async def test_send_webhook_disabled(mock_client):
     """Test that no webhooks are sent when webhooks are disabled."""
@@ -42,7 +61,7 @@ async def test_send_webhook_disabled(mock_client):
         mock_client.assert_not_called()
 
 
-@patch('src.forms_api.services.webhook_service.httpx.AsyncClient')
+@patch('src.forms_api.services.webhook_service.http_clients.get')
 @pytest.mark.asyncio
 async def test_send_webhook_success(mock_client):
     """Test successful webhook sending."""
@@ -52,7 +71,7 @@ async def test_send_webhook_success(mock_client):
     mock_response.text = "Success"
     
     mock_client_instance = AsyncMock()
-    mock_client_instance.__aenter__.return_value.post.return_value = mock_response
+    mock_client_instance.post.return_value = mock_response
     mock_client.return_value = mock_client_instance
     
     with patch('src.forms_api.services.webhook_service.get_settings') as mock_settings:
@@ -77,8 +96,8 @@ async def test_send_webhook_success(mock_client):
         assert results[0]["success"] == True
         
         # Check that post was called with correct data
-        mock_client_instance.__aenter__.return_value.post.assert_called_once()
-        call_args = mock_client_instance.__aenter__.return_value.post.call_args
+        mock_client_instance.post.assert_called_once()
+        call_args = mock_client_instance.post.call_args
         assert call_args[0][0] == "https://example.com/webhook"
         
         # Check that headers contain signature
@@ -86,7 +105,7 @@ async def test_send_webhook_success(mock_client):
         assert "X-Webhook-Signature" in headers
 
 
-@patch('src.forms_api.services.webhook_service.httpx.AsyncClient')
+@patch('src.forms_api.services.webhook_service.http_clients.get')
 @pytest.mark.asyncio
 async def test_signature_generation(mock_client):
     """Test that webhook signatures are correctly generated."""
@@ -94,7 +113,7 @@ async def test_signature_generation(mock_client):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_client_instance = AsyncMock()
-    mock_client_instance.__aenter__.return_value.post.return_value = mock_response
+    mock_client_instance.post.return_value = mock_response
     mock_client.return_value = mock_client_instance
     
     with patch('src.forms_api.services.webhook_service.get_settings') as mock_settings:
@@ -111,7 +130,7 @@ async def test_signature_generation(mock_client):
         )
         
         # Get the content and signature from the call
-        call_kwargs = mock_client_instance.__aenter__.return_value.post.call_args[1]
+        call_kwargs = mock_client_instance.post.call_args[1]
         content = call_kwargs["content"]
         headers = call_kwargs["headers"]
         signature = headers["X-Webhook-Signature"]
@@ -127,7 +146,7 @@ async def test_signature_generation(mock_client):
         assert signature == expected_signature
 
 
-@patch('src.forms_api.services.webhook_service.httpx.AsyncClient')
+@patch('src.forms_api.services.webhook_service.http_clients.get')
 @pytest.mark.asyncio
 async def test_form_specific_webhook(mock_client):
     """Test that form-specific webhooks are correctly identified and used."""
@@ -135,7 +154,7 @@ async def test_form_specific_webhook(mock_client):
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_client_instance = AsyncMock()
-    mock_client_instance.__aenter__.return_value.post.return_value = mock_response
+    mock_client_instance.post.return_value = mock_response
     mock_client.return_value = mock_client_instance
     
     with patch('src.forms_api.services.webhook_service.get_settings') as mock_settings:
@@ -154,7 +173,7 @@ async def test_form_specific_webhook(mock_client):
         )
         
         # Assert that the form-specific URL was used
-        call_args = mock_client_instance.__aenter__.return_value.post.call_args
+        call_args = mock_client_instance.post.call_args
         assert call_args[0][0] == "https://example.com/form-specific"
 
 
@@ -163,7 +182,7 @@ async def test_webhook_exception_handling():
     """Test that exceptions in webhook sending are properly handled."""
     # Arrange
     with patch('src.forms_api.services.webhook_service.get_settings') as mock_settings, \
-         patch('src.forms_api.services.webhook_service.httpx.AsyncClient') as mock_client:
+         patch('src.forms_api.services.webhook_service.http_clients.get') as mock_client:
         
         # Configure mocks
         mock_settings.return_value.webhooks_enabled = True
@@ -171,7 +190,7 @@ async def test_webhook_exception_handling():
         
         # Make the client raise an exception
         mock_client_instance = AsyncMock()
-        mock_client_instance.__aenter__.side_effect = Exception("Test exception")
+        mock_client_instance.post.side_effect = Exception("Test exception")
         mock_client.return_value = mock_client_instance
         
         # Act